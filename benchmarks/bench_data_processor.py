@@ -0,0 +1,89 @@
+# benchmarks/bench_data_processor.py
+"""
+Compara o DataProcessor colunar (NumPy) com a implementação antiga em Pandas.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_data_processor            # 1k, 100k e 1M linhas
+    python -m benchmarks.bench_data_processor 1000 50000
+"""
+import random
+import sys
+import time
+import tracemalloc
+import unicodedata
+
+import pandas as pd
+
+from src.services.data_processor import DataProcessor
+
+
+def legacy_process(raw_data: list, categories: list):
+    # Implementação original (DataFrame + to_numeric por coluna + to_dict)
+    if not raw_data:
+        return {}
+
+    df = pd.DataFrame(raw_data)
+
+    def normalize_col(col):
+        nfkd_form = unicodedata.normalize('NFKD', col)
+        col_ascii = "".join([c for c in nfkd_form if not unicodedata.combining(c)])
+        col_clean = col_ascii.lower()
+        for ignore in [' de ', ' do ', ' da ', ' dos ', ' das ']:
+            col_clean = col_clean.replace(ignore, ' ')
+        return col_clean.strip().replace(' ', '_')
+
+    df.columns = [normalize_col(c) for c in df.columns]
+    for col in df.columns:
+        if col not in ['date', 'mes', 'data', 'mes_ano']:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+
+    result = {'timeline': df.to_dict(orient='records')}
+    result.update(df.mean(numeric_only=True).to_dict())
+    return result
+
+
+def make_rows(n_rows: int, seed: int = 42) -> list:
+    # Planilha sintética no formato de get_all_records (com células vazias e texto)
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_rows):
+        rows.append({
+            "Date": f"{2000 + (i // 365) % 50}-{(i // 30) % 12 + 1:02d}-{i % 28 + 1:02d}",
+            "Taxa de Abertura": round(rng.uniform(10, 40), 2),
+            "Engajamento": rng.randint(0, 1000),
+            "Valor": rng.choice([rng.randint(500, 5000), "", "n/d"]) if i % 50 == 0 else rng.randint(500, 5000),
+            "Leads": str(rng.randint(0, 200)),
+        })
+    return rows
+
+
+def measure(fn):
+    # Tempo e memória em execuções separadas: o tracemalloc distorce o tempo
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(sizes):
+    processor = DataProcessor()
+    print(f"{'linhas':>10} {'caminho':<18} {'tempo (s)':>10} {'pico (MB)':>10}")
+    for n_rows in sizes:
+        rows = make_rows(n_rows)
+        paths = [
+            ("pandas (antigo)", lambda: legacy_process(rows, [])),
+            ("numpy records", lambda: processor.process(rows, [], "records")),
+            ("numpy columns", lambda: processor.process(rows, [], "columns")),
+        ]
+        for name, fn in paths:
+            elapsed, peak = measure(fn)
+            print(f"{n_rows:>10} {name:<18} {elapsed:>10.3f} {peak / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 100_000, 1_000_000])
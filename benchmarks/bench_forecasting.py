@@ -0,0 +1,84 @@
+# benchmarks/bench_forecasting.py
+"""
+Compara predict_trends (mínimos quadrados vetorizados em NumPy) com a
+implementação antiga em scikit-learn.
+
+Uso (na raiz do projeto, requer scikit-learn só para a referência):
+    python -m benchmarks.bench_forecasting                # 100, 10k e 1M linhas
+    python -m benchmarks.bench_forecasting 1000 50000
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from src.services.ai_forecasting import predict_trends
+
+N_SERIES = 8
+REPEAT = 5
+
+
+def legacy_predict_trends(timeline_data: list):
+    # Implementação original: DataFrame + LinearRegression numa única métrica
+    if not timeline_data or len(timeline_data) < 3:
+        return None
+    df = pd.DataFrame(timeline_data)
+    target_col = next((c for c in ['valor', 'receita', 'leads', 'conversoes', 'taxa_abertura'] if c in df.columns), None)
+    if not target_col:
+        return None
+    df['period_idx'] = range(len(df))
+    model = LinearRegression()
+    model.fit(df[['period_idx']].values, df[target_col].values)
+    prediction = model.predict([[len(df)]])[0]
+    return {
+        "metric": target_col,
+        "next_month_value": round(float(prediction), 2),
+        "trend": "up" if model.coef_[0] > 0 else "down",
+        "history": df[['date', target_col]].rename(columns={target_col: 'valor'}).to_dict(orient='records'),
+        "forecast": [{"date": "Previsão", "valor": round(float(prediction), 2)}],
+    }
+
+
+def legacy_all_series(timeline_data: list):
+    # Referência justa: um LinearRegression por métrica, como seria necessário antes
+    df = pd.DataFrame(timeline_data)
+    x = np.arange(len(df)).reshape(-1, 1)
+    for col in df.columns:
+        if col != 'date':
+            LinearRegression().fit(x, df[col].values).predict([[len(df)]])
+
+
+def make_timeline(n_rows: int, seed: int = 7) -> list:
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_rows)
+    data = {"date": [f"d{i}" for i in range(n_rows)]}
+    data["valor"] = (1000 + 3 * t + rng.normal(0, 50, n_rows)).round(2)
+    for k in range(1, N_SERIES):
+        data[f"metrica_{k}"] = (k * t + rng.normal(0, 10, n_rows)).round(2)
+    return pd.DataFrame(data).to_dict(orient="records")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) / REPEAT
+
+
+def main(sizes):
+    print(f"{'linhas':>10} {'sklearn 1 série':>16} {'sklearn todas':>14} {'numpy todas':>12} {'numpy colunas':>14}")
+    for n_rows in sizes:
+        timeline = make_timeline(n_rows)
+        columns = {key: [row[key] for row in timeline] for key in timeline[0]}
+        assert legacy_predict_trends(timeline)["next_month_value"] == predict_trends(timeline)["next_month_value"]
+        print(f"{n_rows:>10} "
+              f"{timed(lambda: legacy_predict_trends(timeline)) * 1000:>14.1f}ms "
+              f"{timed(lambda: legacy_all_series(timeline)) * 1000:>12.1f}ms "
+              f"{timed(lambda: predict_trends(timeline)) * 1000:>10.1f}ms "
+              f"{timed(lambda: predict_trends(columns)) * 1000:>12.1f}ms")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 10_000, 1_000_000])
@@ -0,0 +1,306 @@
+# benchmarks/bench_load.py
+"""
+Teste de carga ponta a ponta: a API roda no mesmo processo (ASGI, sem
+rede) sobre um SQLite temporário. O Google Sheets é o GoogleSheetService
+real (gspread, lotes A1, _to_records, numericise) falando com a sessão HTTP
+falsa de benchmarks.fake_sheets, que responde a API do Sheets/Drive a
+partir de planilhas sintéticas. Usuários virtuais fazem login, listam
+projetos e abrem dashboards; para cada endpoint (isolado) e para o tráfego
+misto, reporta vazão, latência p50/p95/p99, erros e pico de RSS.
+
+Uso (na raiz do projeto, requer httpx):
+    python -m benchmarks.bench_load                          # cenário padrão
+    python -m benchmarks.bench_load --rows 20000 --width 12 --latency-ms 300
+    python -m benchmarks.bench_load --save                   # grava a baseline
+    python -m benchmarks.bench_load --compare                # sai com 1 se regrediu
+
+A baseline (benchmarks/baselines/bench_load.json) só é comparável na mesma
+máquina e com os mesmos parâmetros; o RSS é do processo todo (API + clientes).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "bench_load.json")
+PASSWORD = "load-password"
+
+# Peso de cada endpoint no tráfego misto
+MIX = {"login": 5, "list_projects": 20, "dashboard": 40, "process_data": 25, "overview": 10}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Sem /proc (macOS): pico do processo desde o início
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RSSSampler:
+    """Pico de RSS enquanto o bloco `with` roda (amostrado numa thread)."""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = current_rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+        return False
+
+
+class VirtualUser:
+    def __init__(self, email: str, token: str, projects: list):
+        self.email = email
+        self.headers = {"Authorization": f"Bearer {token}"}
+        # [(id, url da planilha)]
+        self.projects = projects
+        # ETag por (projeto, granularidade), para revalidar como o navegador
+        self.etags = {}
+
+
+# Cenários: cada um faz uma requisição e devolve a resposta
+
+async def login(client, user, rng):
+    return await client.post("/api/auth/token", data={"username": user.email, "password": PASSWORD})
+
+
+async def list_projects(client, user, rng):
+    return await client.get("/api/projects", headers=user.headers)
+
+
+async def dashboard(client, user, rng):
+    project_id, _ = rng.choice(user.projects)
+    granularity = rng.choice([None, "month"])
+    key = (project_id, granularity)
+    headers = {**user.headers, "Accept-Encoding": "gzip, br"}
+    # Metade das aberturas repetidas revalida com If-None-Match (304)
+    if key in user.etags and rng.random() < 0.5:
+        headers["If-None-Match"] = user.etags[key]
+    params = {"granularity": granularity} if granularity else {}
+    response = await client.get(f"/api/projects/{project_id}/dashboard", params=params, headers=headers)
+    if "etag" in response.headers:
+        user.etags[key] = response.headers["etag"]
+    return response
+
+
+async def process_data(client, user, rng):
+    _, url = rng.choice(user.projects)
+    payload = {"spreadsheet_url": url, "categories": [rng.choice(["email", "social", "ads"])]}
+    return await client.post("/api/process-data", json=payload, headers=user.headers)
+
+
+async def overview(client, user, rng):
+    project_ids = [project_id for project_id, _ in user.projects]
+    return await client.post("/api/projects/overview", json={"project_ids": project_ids}, headers=user.headers)
+
+
+SCENARIOS = {
+    "login": login,
+    "list_projects": list_projects,
+    "dashboard": dashboard,
+    "process_data": process_data,
+    "overview": overview,
+}
+
+
+async def create_users(client, args) -> list:
+    from benchmarks.fake_sheets import sheet_url
+
+    users = []
+    for i in range(args.users):
+        email = f"load{i}@example.com"
+        await client.post("/api/auth/register", json={"email": email, "username": f"load{i}", "password": PASSWORD})
+        token = (await client.post("/api/auth/token", data={"username": email, "password": PASSWORD})).json()["access_token"]
+        # Planilhas distribuídas entre os projetos: usuários diferentes compartilham planilhas
+        create = [
+            {"name": f"Cliente {i}-{j}", "spreadsheet_url": sheet_url((i * args.projects + j) % args.sheets), "categories": ["email"]}
+            for j in range(args.projects)
+        ]
+        response = await client.post("/api/projects/bulk", json={"create": create}, headers={"Authorization": f"Bearer {token}"})
+        projects = [(item["id"], item["project"]["spreadsheet_url"]) for item in response.json()["created"]]
+        users.append(VirtualUser(email, token, projects))
+    return users
+
+
+async def run_phase(client, users, weights: dict, n_requests: int, concurrency: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    names = list(weights)
+    plan = iter([(rng.choice(users), rng.choices(names, [weights[n] for n in names])[0]) for _ in range(n_requests)])
+    latencies, errors = defaultdict(list), Counter()
+
+    async def worker():
+        for user, name in plan:
+            start = time.perf_counter()
+            response = await SCENARIOS[name](client, user, rng)
+            latencies[name].append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[name] += 1
+
+    with RSSSampler() as rss:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    def summary(values, n_errors):
+        return {
+            "requests": len(values),
+            "errors": n_errors,
+            "rps": round(len(values) / elapsed, 1),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+            "peak_rss_mb": round(rss.peak / 2 ** 20, 1),
+        }
+
+    result = {name: summary(values, errors[name]) for name, values in latencies.items()}
+    if len(result) > 1:
+        all_latencies = [value for values in latencies.values() for value in values]
+        result["total"] = summary(all_latencies, sum(errors.values()))
+    return result
+
+
+def print_report(phases: dict):
+    print(f"{'fase':<14} {'endpoint':<14} {'req':>6} {'erros':>6} {'req/s':>8} "
+          f"{'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'RSS (MB)':>9}")
+    for phase, endpoints in phases.items():
+        for endpoint, s in endpoints.items():
+            print(f"{phase:<14} {endpoint:<14} {s['requests']:>6} {s['errors']:>6} {s['rps']:>8.1f} "
+                  f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f} {s['peak_rss_mb']:>9.1f}")
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> bool:
+    """Imprime a variação de vazão e p95 contra a baseline; True se regrediu."""
+    if baseline["config"] != result["config"]:
+        print("aviso: parâmetros diferentes da baseline; a comparação é só indicativa")
+    regressed = False
+    print(f"\n{'fase/endpoint':<30} {'req/s':>18} {'p95 (ms)':>20}")
+    for phase, endpoints in result["phases"].items():
+        for endpoint, s in endpoints.items():
+            base = baseline["phases"].get(phase, {}).get(endpoint)
+            if base is None:
+                continue
+            slower = s["p95_ms"] > base["p95_ms"] * (1 + tolerance)
+            fewer = s["rps"] < base["rps"] * (1 - tolerance)
+            flag = "  REGRESSÃO" if slower or fewer else ""
+            regressed = regressed or bool(flag)
+            print(f"{phase + '/' + endpoint:<30} {base['rps']:>8.1f} -> {s['rps']:>7.1f} "
+                  f"{base['p95_ms']:>9.1f} -> {s['p95_ms']:>8.1f}{flag}")
+    return regressed
+
+
+async def run(args) -> dict:
+    import httpx
+
+    from benchmarks.fake_sheets import FakeSheetsBackend, install, sheets_service
+    from src.main import app
+
+    backend = FakeSheetsBackend(args.rows, args.width, args.latency_ms)
+    service = sheets_service(backend)
+    calls = service.client.http_client.session.calls
+    install(service)
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        users = await create_users(client, args)
+
+        # Aquecimento (fora das medições): uma abertura de cada planilha
+        start = time.perf_counter()
+        await run_phase(client, users, {"dashboard": 1}, args.sheets * 2, args.concurrency, args.seed)
+        print(f"aquecimento: {time.perf_counter() - start:.1f}s, {calls['values.batchGet']} chamadas values:batchGet\n")
+
+        phases = {}
+        for name in SCENARIOS:
+            phases[name] = await run_phase(client, users, {name: 1}, args.requests, args.concurrency, args.seed)
+        phases["misto"] = await run_phase(client, users, MIX, args.requests * 2, args.concurrency, args.seed)
+
+    return {
+        "config": {key: value for key, value in vars(args).items() if key not in ("save", "compare", "baseline", "tolerance")},
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "upstream": dict(calls),
+        "phases": phases,
+    }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_load")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--projects", type=int, default=5, help="projetos por usuário")
+    parser.add_argument("--sheets", type=int, default=20, help="planilhas distintas")
+    parser.add_argument("--rows", type=int, default=5000, help="linhas por planilha")
+    parser.add_argument("--width", type=int, default=5, help="colunas de métricas por planilha")
+    parser.add_argument("--latency-ms", type=float, default=150, help="latência de cada chamada à API do Sheets")
+    parser.add_argument("--sheet-ttl", type=float, default=60, help="SHEET_CACHE_TTL_SECONDS")
+    parser.add_argument("--requests", type=int, default=200, help="requisições por fase (o misto faz o dobro)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="grava o resultado como baseline")
+    parser.add_argument("--compare", action="store_true", help="compara com a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="variação aceita (fração)")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+
+    # Configuração lida no import de src.*: precisa vir antes dele
+    db_dir = tempfile.mkdtemp(prefix="dashmaster-load-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_dir}/load.db"
+    os.environ["SHEET_CACHE_TTL_SECONDS"] = str(args.sheet_ttl)
+    os.environ.setdefault("REFRESH_MODE", "disabled")
+    # Mede capacidade, não os limites por usuário/planilha
+    os.environ.setdefault("RATE_LIMIT_USER_PER_SECOND", "0")
+    os.environ.setdefault("RATE_LIMIT_SHEET_PER_SECOND", "0")
+
+    result = asyncio.run(run(args))
+    print_report(result["phases"])
+
+    status = 0
+    if args.compare:
+        with open(args.baseline) as f:
+            status = 1 if compare(result, json.load(f), args.tolerance) else 0
+        print("FALHOU" if status else "OK")
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"baseline gravada em {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
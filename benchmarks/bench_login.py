@@ -0,0 +1,102 @@
+# benchmarks/bench_login.py
+"""
+Vazão de login e latência das demais rotas durante uma rajada de logins,
+com o bcrypt no pool dedicado ("pool") e rodando dentro do event loop
+("inline", como era antes).
+
+Uso (na raiz do projeto, requer httpx):
+    python -m benchmarks.bench_login               # 200 logins, 32 simultâneos
+    python -m benchmarks.bench_login 500 64
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp(prefix="dashmaster-bench-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_dir}/bench.db"
+os.environ.setdefault("REFRESH_MODE", "disabled")
+
+import httpx
+
+from src.auth import verify_password
+from src.database import engine
+from src.main import app
+from src.models import Base
+from src.routers import auth_router
+
+CREDENTIALS = {"username": "bench@example.com", "password": "bench-password"}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def _inline_verify(plain_password, hashed_password):
+    # Comportamento antigo: bcrypt direto no event loop
+    return verify_password(plain_password, hashed_password)
+
+
+async def run_burst(client, n_logins, concurrency, token):
+    slots = asyncio.Semaphore(concurrency)
+    login_latencies, probe_latencies, statuses = [], [], {}
+    done = asyncio.Event()
+
+    async def login():
+        async with slots:
+            start = time.perf_counter()
+            response = await client.post("/api/auth/token", data=CREDENTIALS)
+            login_latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async def probe():
+        # Rota barata e autenticada: mede o quanto a rajada atrasa o resto da API
+        headers = {"Authorization": f"Bearer {token}"}
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/api/auth/profile", headers=headers)
+            probe_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(n_logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    return elapsed, login_latencies, probe_latencies, statuses
+
+
+async def main(n_logins, concurrency):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/auth/register", json={
+            "email": CREDENTIALS["username"],
+            "username": "bench",
+            "password": CREDENTIALS["password"],
+        })
+        token = (await client.post("/api/auth/token", data=CREDENTIALS)).json()["access_token"]
+
+        original = auth_router.verify_password_async
+        print(f"{'modo':<8} {'logins/s':>9} {'login p50':>10} {'login p99':>10} "
+              f"{'outras p50':>11} {'outras p99':>11}  status")
+        for mode in ("inline", "pool"):
+            auth_router.verify_password_async = _inline_verify if mode == "inline" else original
+            elapsed, logins, probes, statuses = await run_burst(client, n_logins, concurrency, token)
+            print(f"{mode:<8} {n_logins / elapsed:>9.1f} {statistics.median(logins) * 1000:>8.0f}ms "
+                  f"{percentile(logins, 99) * 1000:>8.0f}ms {statistics.median(probes) * 1000:>9.1f}ms "
+                  f"{percentile(probes, 99) * 1000:>9.1f}ms  {statuses}")
+        auth_router.verify_password_async = original
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    asyncio.run(main(*(args + [200, 32][len(args):])))
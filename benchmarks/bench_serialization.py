@@ -0,0 +1,58 @@
+# benchmarks/bench_serialization.py
+"""
+Serialização da resposta do dashboard: jsonable_encoder + json.dumps (caminho
+antigo) contra src.services.serialization.dumps (orjson, numpy nativo).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_serialization              # timeline de 100k linhas
+    python -m benchmarks.bench_serialization 10000 1000000
+"""
+import json
+import sys
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.bench_data_processor import legacy_process, make_rows, measure
+from src.services.ai_forecasting import predict_trends
+from src.services.data_processor import DataProcessor
+from src.services.serialization import dumps
+
+
+def legacy_dumps(payload) -> bytes:
+    # Como o endpoint serializava antes (mesmos parâmetros do JSONResponse)
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def payload(data: dict) -> dict:
+    return {"status": "success", "data": data, "ai_insights": predict_trends(data.get("timeline", []))}
+
+
+def main(sizes):
+    processor = DataProcessor()
+    print(f"{'linhas':>10} {'caminho':<34} {'tempo (s)':>10} {'pico (MB)':>10} {'tamanho (MB)':>13}")
+    for n_rows in sizes:
+        rows = make_rows(n_rows)
+        legacy = payload(legacy_process(rows, []))
+        records = payload(processor.process(rows, [], "records"))
+        columns = payload(processor.process(rows, [], "columns"))
+        assert json.loads(legacy_dumps(records)) == json.loads(dumps(records))
+
+        paths = [
+            ("antigo: pandas dict + json", lambda: legacy_dumps(legacy)),
+            ("antigo: records + json", lambda: legacy_dumps(records)),
+            ("orjson: records", lambda: dumps(records)),
+            ("orjson: columns (arrays numpy)", lambda: dumps(columns)),
+        ]
+        for name, fn in paths:
+            elapsed, peak = measure(fn)
+            print(f"{n_rows:>10} {name:<34} {elapsed:>10.3f} {peak / 1e6:>10.1f} {len(fn()) / 1e6:>13.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100_000])
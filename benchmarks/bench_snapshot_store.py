@@ -0,0 +1,117 @@
+# benchmarks/bench_snapshot_store.py
+"""
+Memória de N workers (processos) servindo as mesmas planilhas: cada um com
+as suas linhas em memória (SheetCache sem store) contra os snapshots
+colunares em disco abertos com mmap (SNAPSHOT_STORE_DIR). O primeiro worker
+baixa e grava; os demais só abrem o que ele publicou.
+
+Mede, com todos os workers vivos ao mesmo tempo, o PSS (memória
+proporcional: páginas compartilhadas divididas entre os processos) e a
+memória privada ganhos depois de carregar as planilhas e processar um
+dashboard de cada uma. Só Linux (/proc/self/smaps_rollup).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_snapshot_store                 # 4 workers, 20 planilhas de 20000 linhas
+    python -m benchmarks.bench_snapshot_store 8 40 50000 12   # workers, planilhas, linhas, colunas de métricas
+"""
+import asyncio
+import gc
+import multiprocessing
+import sys
+import tempfile
+import time
+
+
+def memory() -> dict:
+    """Rss/Pss/Private_* (bytes) do processo atual."""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as rollup:
+        for line in rollup:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    fields["Private"] = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return fields
+
+
+async def load(cache, processor, urls) -> tuple:
+    start = time.perf_counter()
+    snapshots = [await cache.get_snapshot(url) for url in urls]
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    for snapshot in snapshots:
+        processor.process(snapshot.data, ["email"], granularity="month")
+    return snapshots, loaded, time.perf_counter() - start
+
+
+def worker(index, mode, directory, args, first_loaded, measured, results):
+    n_sheets, n_rows, width = args
+    from benchmarks.fake_sheets import FakeSheetsBackend, sheet_url
+    from src.services.data_processor import DataProcessor
+    from src.services.lazy import numpy as np
+    from src.services.sheet_cache import SheetCache
+    from src.services.snapshot_store import ColumnarSnapshotStore
+
+    np.zeros(1)
+    backend = FakeSheetsBackend(rows=n_rows, width=width, latency_ms=0, version_latency_ms=0)
+    store = ColumnarSnapshotStore(directory, 64 * 1024 ** 3) if mode == "store" else None
+    cache = SheetCache(backend, ttl=3600, max_bytes=64 * 1024 ** 3, store=store)
+    processor = DataProcessor()
+    urls = [sheet_url(i) for i in range(n_sheets)]
+
+    gc.collect()
+    before = memory()
+    if index > 0:
+        first_loaded.wait()
+    snapshots, loaded, processed = asyncio.run(load(cache, processor, urls))
+    if index == 0:
+        first_loaded.set()
+    # As planilhas geradas pelo backend falso não contam (seriam a resposta da API)
+    backend._sheets.clear()
+    gc.collect()
+
+    measured.wait()  # todos vivos: o PSS divide as páginas compartilhadas
+    after = memory()
+    results.put((index, loaded, processed, {name: after[name] - before[name] for name in ("Rss", "Pss", "Private")}))
+    measured.wait()
+    del snapshots
+
+
+def run(mode, n_workers, args) -> list:
+    context = multiprocessing.get_context("fork")
+    first_loaded, measured = context.Event(), context.Barrier(n_workers)
+    results = context.Queue()
+    with tempfile.TemporaryDirectory(prefix="dashmaster-snapshots-") as directory:
+        processes = [
+            context.Process(target=worker, args=(i, mode, directory, args, first_loaded, measured, results))
+            for i in range(n_workers)
+        ]
+        for process in processes:
+            process.start()
+        rows = sorted(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+    return rows
+
+
+def main(n_workers, n_sheets, n_rows, width):
+    mb = 1024 * 1024
+    print(f"{n_workers} workers, {n_sheets} planilhas x {n_rows} linhas x {width} métricas")
+    print(f"{'modo':<7} {'carga 1º (s)':>13} {'carga demais (s)':>17} {'process (s)':>12} "
+          f"{'RSS/worker (MB)':>16} {'privada/worker (MB)':>20} {'PSS total (MB)':>15}")
+    for mode in ("linhas", "store"):
+        rows = run(mode, n_workers, (n_sheets, n_rows, width))
+        others = [loaded for index, loaded, _, _ in rows if index > 0] or [0.0]
+        print(
+            f"{mode:<7} {rows[0][1]:>13.2f} {sum(others) / len(others):>17.2f} "
+            f"{sum(r[2] for r in rows) / len(rows):>12.2f} "
+            f"{sum(r[3]['Rss'] for r in rows) / len(rows) / mb:>16.1f} "
+            f"{sum(r[3]['Private'] for r in rows) / len(rows) / mb:>20.1f} "
+            f"{sum(r[3]['Pss'] for r in rows) / mb:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    params = [int(value) for value in sys.argv[1:5]]
+    defaults = [4, 20, 20000, 5]
+    main(*(params + defaults[len(params):]))
@@ -0,0 +1,100 @@
+# benchmarks/bench_startup.py
+"""
+Tempo de boot da API: quanto custa `import src.main` num processo novo,
+quais módulos dominam esse tempo (relatório de `python -X importtime`) e
+se alguma dependência pesada voltou a ser importada no boot.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_startup            # 5 processos, orçamento 1500ms
+    python -m benchmarks.bench_startup 10 800     # 10 processos, orçamento 800ms
+
+Sai com código 1 se a mediana passar do orçamento (STARTUP_BUDGET_MS) ou se
+algum módulo de HEAVY_MODULES for carregado no import — serve como teste de
+regressão no CI.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+# Devem ficar fora do boot (carregados sob demanda por src.services.lazy)
+HEAVY_MODULES = ("numpy", "pandas", "sklearn", "gspread", "oauth2client", "httplib2")
+
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", 1500))
+TOP_MODULES = 15
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import src.main
+elapsed = time.perf_counter() - start
+heavy = [name for name in json.loads(sys.argv[1]) if name in sys.modules]
+print(json.dumps({"ms": elapsed * 1000, "heavy": heavy}))
+"""
+
+
+def _run(args):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, check=True, env=env
+    )
+
+
+def measure_boot():
+    result = _run(["-c", _PROBE, json.dumps(HEAVY_MODULES)])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_report():
+    """
+    Via -X importtime: tempo próprio (ms) somado por pacote de primeiro nível
+    e tempo cumulativo (ms) de cada módulo do projeto (src.*), que inclui o
+    que ele puxou de dependências.
+    """
+    stderr = _run(["-X", "importtime", "-c", "import src.main"]).stderr
+    self_ms, cumulative_ms = defaultdict(float), {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        self_ms[name.split(".")[0]] += int(self_us) / 1000
+        if name.startswith("src."):
+            cumulative_ms[name] = int(cumulative_us) / 1000
+    return self_ms, cumulative_ms
+
+
+def main(runs, budget_ms):
+    # Primeiro processo aquece o cache de disco; não entra na mediana
+    measure_boot()
+    samples = [measure_boot() for _ in range(runs)]
+    timings = [s["ms"] for s in samples]
+    heavy = sorted({name for s in samples for name in s["heavy"]})
+
+    self_ms, cumulative_ms = import_report()
+    print(f"{'pacote':<28} {'próprio (ms)':>13}")
+    for name, ms in sorted(self_ms.items(), key=lambda kv: -kv[1])[:TOP_MODULES]:
+        print(f"{name:<28} {ms:>13.1f}")
+    print()
+    print(f"{'módulo do projeto':<34} {'cumulativo (ms)':>16}")
+    for name, ms in sorted(cumulative_ms.items(), key=lambda kv: -kv[1])[:TOP_MODULES]:
+        print(f"{name:<34} {ms:>16.1f}")
+    print()
+
+    median = statistics.median(timings)
+    print(f"import src.main: mediana {median:.0f}ms, min {min(timings):.0f}ms, "
+          f"max {max(timings):.0f}ms ({runs} processos, orçamento {budget_ms:.0f}ms)")
+    print(f"módulos pesados no boot: {', '.join(heavy) or 'nenhum'}")
+
+    failed = median > budget_ms or heavy
+    print("FALHOU" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    runs = int(args[0]) if args else 5
+    budget = float(args[1]) if len(args) > 1 else DEFAULT_BUDGET_MS
+    sys.exit(main(runs, budget))
@@ -0,0 +1,236 @@
+# benchmarks/fake_sheets.py
+"""
+Backend falso do Google Sheets para benchmarks e testes de carga: planilhas
+sintéticas determinísticas, com número de linhas, largura (colunas de
+métricas) e latência configuráveis. Implementa a mesma interface que o
+SheetCache e o SheetSync usam do GoogleSheetService (fetch_many,
+get_modified_time, get_mock_data), então todo o resto do caminho do
+dashboard (cache, single-flight, pool, processamento) roda de verdade.
+
+A latência é um sleep dentro da thread do pool, como a espera de rede do
+gspread: ocupa a thread sem gastar CPU.
+
+Para medir também o próprio GoogleSheetService (lotes de intervalos A1,
+_to_records, numericise, metadados em cache), `sheets_service(backend)`
+monta o serviço real com um cliente gspread de verdade, cuja sessão HTTP
+(FakeSheetsSession) responde as chamadas da API do Sheets/Drive a partir
+das mesmas planilhas sintéticas, sem rede.
+"""
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+
+import requests
+
+from src.services.admission import MemoryStore, UpstreamBackoff
+from src.services.data_processor import NON_NUMERIC_COLUMNS, normalize_col
+
+BASE_METRICS = ("Valor", "Taxa de Abertura", "Engajamento", "Leads", "Conversoes")
+CATEGORIES = ("email", "social", "ads")
+
+
+def sheet_url(index: int) -> str:
+    return f"https://docs.google.com/spreadsheets/d/fake-sheet-{index}/edit"
+
+
+def make_sheet(n_rows: int, width: int, seed: int) -> list:
+    """Registros no formato de get_all_records: data, categoria e `width` métricas."""
+    rng = random.Random(seed)
+    metrics = list(BASE_METRICS[:width]) + [f"Metrica {i}" for i in range(len(BASE_METRICS), width)]
+    rows = []
+    for i in range(n_rows):
+        row = {
+            "Date": f"{2000 + (i // 336) % 50}-{(i // 28) % 12 + 1:02d}-{i % 28 + 1:02d}",
+            "Categoria": CATEGORIES[i % len(CATEGORIES)],
+        }
+        for name in metrics:
+            row[name] = round(rng.uniform(0, 5000), 2)
+        rows.append(row)
+    return rows
+
+
+class FakeSheetsBackend:
+    def __init__(self, rows: int = 5000, width: int = 5, latency_ms: float = 150, version_latency_ms: float = 40):
+        self.rows = rows
+        self.width = width
+        self.latency = latency_ms / 1000
+        self.version_latency = version_latency_ms / 1000
+        self.fetches = 0
+        self.version_checks = 0
+        self._sheets = {}
+        self._lock = threading.Lock()
+        # Mesma interface de GoogleSheetService (usada por /cache-stats)
+        self.backoff = UpstreamBackoff(MemoryStore(), "google", 1, 1)
+
+    def _sheet(self, spreadsheet_url: str, worksheet: int) -> list:
+        key = (spreadsheet_url, worksheet)
+        with self._lock:
+            rows = self._sheets.get(key)
+            if rows is None:
+                rows = self._sheets[key] = make_sheet(self.rows, self.width, seed=zlib.crc32(f"{spreadsheet_url}#{worksheet}".encode()))
+        return rows
+
+    def fetch_many(self, spreadsheet_url: str, worksheets: list, columns=None, rows=None) -> dict:
+        time.sleep(self.latency)
+        self.fetches += 1
+        wanted = {normalize_col(c) for c in columns} | set(NON_NUMERIC_COLUMNS) if columns else None
+        result = {}
+        for worksheet in worksheets:
+            records = self._sheet(spreadsheet_url, worksheet)
+            if rows:
+                records = records[rows[0] - 1:rows[1]]
+            if wanted is not None:
+                records = [{k: v for k, v in record.items() if normalize_col(k) in wanted} for record in records]
+            # Cópias, como uma resposta nova da API
+            result[worksheet] = [dict(record) for record in records]
+        return result
+
+    def fetch_records(self, spreadsheet_url: str, worksheet: int = 0, columns=None, rows=None):
+        return self.fetch_many(spreadsheet_url, [worksheet], columns, rows)[worksheet]
+
+    def get_modified_time(self, spreadsheet_url: str):
+        # Planilhas nunca mudam: depois do TTL, a revalidação evita o download
+        time.sleep(self.version_latency)
+        self.version_checks += 1
+        return "2024-01-01T00:00:00.000Z"
+
+    def get_mock_data(self):
+        return make_sheet(6, 3, seed=0)
+
+
+def install(backend):
+    """Troca o GoogleSheetService dos serviços do dashboard pelo backend falso (ou por sheets_service)."""
+    from src.routers import dashboard_router
+
+    dashboard_router.google_service = backend
+    dashboard_router.sheet_cache.backend = backend
+    dashboard_router.sheet_sync.backend = backend
+
+
+_SHEETS_PREFIX = "https://sheets.googleapis.com/v4/spreadsheets/"
+_DRIVE_PREFIX = "https://www.googleapis.com/drive/v3/files/"
+_RANGE = re.compile(r"^'((?:[^']|'')*)'(?:!(.*))?$")
+_ROWS = re.compile(r"^(\d+):(\d+)$")
+_CELLS = re.compile(r"^([A-Z]+)(\d+):([A-Z]+)(\d*)$")
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index
+
+
+class FakeSheetsSession(requests.Session):
+    """
+    Sessão HTTP do gspread que responde, sem rede, as chamadas que o
+    GoogleSheetService faz: metadados da planilha, values:batchGet (com os
+    valores formatados como texto, como a API devolve) e modifiedTime do
+    Drive (via get_modified_time do backend). Cada chamada ao Sheets espera
+    a latência do backend. `calls` conta as chamadas por endpoint.
+    """
+
+    def __init__(self, backend: FakeSheetsBackend, worksheets: int = 1):
+        super().__init__()
+        self.backend = backend
+        self.titles = [f"Página {i + 1}" for i in range(worksheets)]
+        self.calls = Counter()
+        self._grids = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, params=None, json=None, data=None, files=None, headers=None, timeout=None, **kwargs):
+        if url.startswith(_DRIVE_PREFIX):
+            self._count("drive.files")
+            return self._response(url, 200, {"modifiedTime": self.backend.get_modified_time(url)})
+        if method.lower() != "get" or not url.startswith(_SHEETS_PREFIX):
+            return self._error(url, 404, f"Sem rota no Sheets falso: {method} {url}")
+
+        time.sleep(self.backend.latency)
+        key, _, action = url[len(_SHEETS_PREFIX):].partition("/")
+        if not action:
+            self._count("spreadsheets.get")
+            return self._response(url, 200, self._metadata(key))
+        if action == "values:batchGet":
+            self._count("values.batchGet")
+            try:
+                value_ranges = [self._values(key, a1) for a1 in (params or {}).get("ranges", [])]
+            except LookupError as e:
+                return self._error(url, 400, str(e))
+            return self._response(url, 200, {"spreadsheetId": key, "valueRanges": value_ranges})
+        return self._error(url, 404, f"Sem rota no Sheets falso: {method} {url}")
+
+    def _count(self, endpoint: str):
+        with self._lock:
+            self.calls[endpoint] += 1
+
+    def _metadata(self, key: str) -> dict:
+        return {
+            "spreadsheetId": key,
+            "properties": {"title": key},
+            "sheets": [
+                {"properties": {"sheetId": i, "title": title, "index": i, "sheetType": "GRID",
+                                "gridProperties": {"rowCount": self.backend.rows + 1, "columnCount": self.backend.width + 2}}}
+                for i, title in enumerate(self.titles)
+            ],
+        }
+
+    def _grid(self, key: str, worksheet: int) -> list:
+        # Mesmo URL de sheet_url: a planilha é a mesma que FakeSheetsBackend.fetch_many devolve
+        url = f"https://docs.google.com/spreadsheets/d/{key}/edit"
+        with self._lock:
+            grid = self._grids.get((key, worksheet))
+        if grid is None:
+            records = self.backend._sheet(url, worksheet)
+            header = list(records[0]) if records else []
+            grid = [header] + [[str(record[name]) for name in header] for record in records]
+            with self._lock:
+                self._grids[(key, worksheet)] = grid
+        return grid
+
+    def _values(self, key: str, a1: str) -> dict:
+        match = _RANGE.match(a1)
+        title = match and match.group(1).replace("''", "'")
+        if not match or title not in self.titles:
+            raise LookupError(f"Unable to parse range: {a1}")
+        grid = self._grid(key, self.titles.index(title))
+        cells = match.group(2)
+        if cells is None:
+            values = grid
+        elif _ROWS.match(cells):
+            first, last = map(int, _ROWS.match(cells).groups())
+            values = grid[first - 1:last]
+        elif _CELLS.match(cells):
+            first_col, first_row, last_col, last_row = _CELLS.match(cells).groups()
+            rows = grid[int(first_row) - 1:int(last_row) if last_row else None]
+            values = [row[_column_index(first_col) - 1:_column_index(last_col)] for row in rows]
+        else:
+            raise LookupError(f"Unable to parse range: {a1}")
+        return {"range": a1, "majorDimension": "ROWS", "values": values}
+
+    @staticmethod
+    def _response(url: str, status: int, body: dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.url = url
+        response.encoding = "utf-8"
+        response.headers["Content-Type"] = "application/json; charset=UTF-8"
+        response._content = json.dumps(body).encode()
+        return response
+
+    def _error(self, url: str, status: int, message: str) -> requests.Response:
+        return self._response(url, status, {"error": {"code": status, "message": message, "status": "INVALID_ARGUMENT"}})
+
+
+def sheets_service(backend: FakeSheetsBackend, worksheets: int = 1):
+    """GoogleSheetService real, com um cliente gspread sobre FakeSheetsSession."""
+    from src.services.google_service import GoogleSheetService
+    from src.services.lazy import gspread
+
+    service = GoogleSheetService()
+    service.client = gspread.Client(None, session=FakeSheetsSession(backend, worksheets))
+    service._configure_client()
+    return service
@@ -93,6 +93,86 @@ class DataManager {
         }
     }
 
+    /**
+     * Lê uma resposta NDJSON linha a linha, à medida que os blocos chegam
+     * @param {Response} response - Resposta do fetch
+     * @param {Function} handleLine - Chamada com cada linha (texto)
+     */
+    async readNDJSON(response, handleLine) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.forEach(handleLine);
+        }
+        handleLine(buffer + decoder.decode());
+    }
+
+    /**
+     * Visão geral de vários projetos numa única requisição (NDJSON): cada
+     * projeto chega assim que fica pronto; os que passam do prazo do
+     * servidor vêm com status "timeout".
+     * @param {number[]} projectIds - IDs dos projetos
+     * @param {Function} [onProject] - Chamada com cada projeto { project_id, status, name, kpis, trend }
+     * @returns {Promise<Object[]>} Todos os projetos recebidos
+     */
+    async loadProjectsOverview(projectIds, onProject) {
+        this.updateConfig();
+
+        const response = await fetch(this.buildApiUrl('/projects/overview'), {
+            method: 'POST',
+            headers: { ...this.getRequestHeaders(), 'Accept': 'application/x-ndjson' },
+            body: JSON.stringify({ project_ids: projectIds })
+        });
+
+        if (!response.ok) {
+            await this.handleResponseError(response);
+        }
+
+        const projects = [];
+        await this.readNDJSON(response, (line) => {
+            if (!line.trim()) return;
+            const message = JSON.parse(line);
+            if (message.type !== 'project') return;
+            projects.push(message);
+            if (onProject) onProject(message);
+        });
+        return projects;
+    }
+
+    /**
+     * Busca o dashboard de um projeto salvo via GET. A resposta tem ETag e
+     * Cache-Control: o navegador revalida sozinho (304) e reaproveita o corpo.
+     * @param {number} projectId - ID do projeto
+     * @param {Object} [options] - Parâmetros da visão (layout, granularity, max_points...)
+     * @returns {Promise<Object>} Dados processados (mesmo formato de loadData)
+     */
+    async loadProjectDashboard(projectId, options = {}) {
+        this.updateConfig();
+
+        const query = new URLSearchParams(options).toString();
+        const endpoint = `/projects/${projectId}/dashboard${query ? `?${query}` : ''}`;
+        const response = await fetch(this.buildApiUrl(endpoint), {
+            headers: this.getRequestHeaders(),
+            cache: 'no-cache'
+        });
+
+        if (!response.ok) {
+            await this.handleResponseError(response);
+        }
+
+        const result = await response.json();
+        this.processAIInsights(result.ai_insights);
+        return result.data;
+    }
+
     /**
      * Constrói URL da API corretamente
      * @param {string} endpoint - Endpoint da API
@@ -200,6 +280,9 @@ class DataManager {
                 errorMessage = 'Acesso negado. Permissões insuficientes.';
             } else if (response.status === 404) {
                 errorMessage = 'Endpoint não encontrado. Verifique a configuração da API.';
+            } else if (response.status === 429) {
+                const retryAfter = response.headers.get('Retry-After');
+                errorMessage = `Muitas requisições no momento. Tente novamente em ${retryAfter || 'alguns'} segundos.`;
             } else if (response.status === 500) {
                 errorMessage = 'Erro interno do servidor. Tente novamente mais tarde.';
             }
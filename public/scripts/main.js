@@ -281,10 +281,12 @@ async function refreshData() {
     try {
         showLoading();
 
-        const newData = await dataManager.loadData(
-            AppState.currentProject.spreadsheet_url || AppState.currentProject.spreadsheetUrl,
-            AppState.currentProject.categories
-        );
+        // Projeto salvo: GET cacheável (o navegador revalida com ETag e
+        // reaproveita o corpo num 304); sem id, o POST com a URL da planilha
+        const project = AppState.currentProject;
+        const newData = project.id != null
+            ? await dataManager.loadProjectDashboard(project.id)
+            : await dataManager.loadData(project.spreadsheet_url || project.spreadsheetUrl, project.categories);
 
         AppState.sheetData = newData.data || {};
         AppState.aiInsights = newData.ai_insights || {};
@@ -1,10 +1,14 @@
 // ===== PROJECT MANAGER =====
 
+// Projetos por requisição da visão geral (mesmo limite do servidor: OVERVIEW_MAX_PROJECTS)
+const OVERVIEW_MAX_PROJECTS = 50;
+
 class ProjectManager {
     constructor() {
         this.currentProject = null;
         this.projects = [];
         this.filteredProjects = [];
+        this.overview = new Map(); // project_id -> linha da visão geral
         this.currentFilter = 'all';
         this.searchTerm = '';
         this.init();
@@ -37,29 +41,84 @@ class ProjectManager {
                 return;
             }
 
-            const response = await fetch(`${window.AppConfig.API.BASE_URL}/projects`, {
-                headers
-            });
+            // A API pagina por cursor (X-Next-Cursor); busca todas as páginas
+            const projects = [];
+            let cursor = null;
+            do {
+                const params = new URLSearchParams({ limit: '500' });
+                if (cursor) params.set('cursor', cursor);
+
+                const response = await fetch(`${window.AppConfig.API.BASE_URL}/projects?${params}`, {
+                    headers
+                });
+
+                if (response.status === 401) {
+                    console.warn('⚠️ Sessão expirada (401). Redirecionando para login...');
+                    if (window.authManager) window.authManager.logout();
+                    return;
+                }
 
-            if (response.status === 401) {
-                console.warn('⚠️ Sessão expirada (401). Redirecionando para login...');
-                if (window.authManager) window.authManager.logout();
-                return;
-            }
+                if (!response.ok) {
+                    console.error('❌ Erro ao carregar projetos da API:', response.status);
+                    this.projects = [];
+                    return;
+                }
 
-            if (response.ok) {
-                this.projects = await response.json();
-                console.log(`✅ ${this.projects.length} projetos carregados`);
-            } else {
-                console.error('❌ Erro ao carregar projetos da API:', response.status);
-                this.projects = [];
-            }
+                projects.push(...await response.json());
+                cursor = response.headers.get('X-Next-Cursor');
+            } while (cursor);
+
+            this.projects = projects;
+            this.overview.clear();
+            console.log(`✅ ${this.projects.length} projetos carregados`);
         } catch (error) {
             console.error('❌ Erro ao carregar projetos:', error);
             this.projects = [];
         } finally {
             this.applyFilters();
         }
+        this.loadOverview();
+    }
+
+    /**
+     * KPIs e tendência dos projetos ativos numa única requisição (NDJSON):
+     * cada card é preenchido assim que o seu projeto fica pronto
+     */
+    async loadOverview() {
+        const ids = this.projects
+            .filter(p => p.is_active && !p.is_archived)
+            .slice(0, OVERVIEW_MAX_PROJECTS)
+            .map(p => p.id);
+        if (ids.length === 0 || !window.dataManager) return;
+
+        try {
+            await window.dataManager.loadProjectsOverview(ids, (item) => {
+                this.overview.set(String(item.project_id), item);
+                const el = document.querySelector(`[data-overview-for="${item.project_id}"]`);
+                if (el) el.innerHTML = this.formatOverview(item);
+            });
+        } catch (error) {
+            console.warn('⚠️ Visão geral dos projetos indisponível:', error.message);
+        }
+    }
+
+    formatOverview(item) {
+        if (!item) return '';
+        if (item.status !== 'ok') {
+            const labels = {
+                timeout: 'Planilha demorou a responder',
+                throttled: 'Limite de requisições atingido',
+                error: 'Erro ao carregar dados',
+                not_found: 'Projeto não encontrado'
+            };
+            return `<span class="overview-status">${labels[item.status] || item.status}</span>`;
+        }
+        if (!item.trend) {
+            return '<span class="overview-status">Sem dados suficientes para previsão</span>';
+        }
+        const icon = item.trend.trend === 'up' ? 'fa-arrow-up' : 'fa-arrow-down';
+        const value = Number(item.trend.next_month_value).toLocaleString('pt-BR');
+        return `<i class="fas ${icon}"></i> ${item.trend.metric}: ${value} (previsão)`;
     }
 
     /**
@@ -530,6 +589,10 @@ class ProjectManager {
                     <p>${this.generateProjectDescription(project)}</p>
                 </div>
                 
+                <div class="project-card-kpis" data-overview-for="${project.id}">
+                    ${this.formatOverview(this.overview.get(String(project.id)))}
+                </div>
+                
                 <div class="project-card-footer">
                     <div class="project-card-dates">
                         <span class="date-item">
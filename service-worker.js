@@ -41,6 +41,12 @@ self.addEventListener('activate', event => {
 
 // Fetch
 self.addEventListener('fetch', event => {
+  // API: sempre pela rede. O GET de dashboard usa ETag + Cache-Control:
+  // o cache HTTP do navegador revalida (304) sem baixar o corpo de novo
+  if (new URL(event.request.url).pathname.startsWith('/api/')) {
+    return;
+  }
+
   event.respondWith(
     caches.match(event.request)
       .then(response => {
@@ -1,9 +1,12 @@
 # src/auth.py
+import asyncio
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 import os
 from dotenv import load_dotenv
+from src.config import settings
 
 load_dotenv()
 
@@ -22,7 +25,15 @@ def verify_password(plain_password, hashed_password):
 
 def get_password_hash(password):
     # Returns string
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+def password_needs_rehash(hashed_password):
+    # Formato: $2b$<custo>$<salt+hash>
+    try:
+        return int(hashed_password.split('$')[2]) != settings.BCRYPT_ROUNDS
+    except (AttributeError, IndexError, ValueError):
+        return False
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -41,28 +52,98 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from src.database import get_db
 from src.models import User
+from src.services.cache import LRUCache
+from src.services.metrics import timed
 
 # Define o scheme para pegar o token bearer
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+# Usuários já carregados, por email. Guarda só os campos que as rotas leem
+# (TokenUser), nunca o objeto ORM: ele ficaria preso à sessão que o carregou
+# e seria compartilhado, mutável, entre requisições
+_user_cache = LRUCache(max_items=settings.USER_CACHE_MAX_ENTRIES, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+class TokenUser:
+    """Usuário montado só a partir das claims do token ou do cache (sem consulta ao banco)."""
+    __slots__ = ("id", "email", "username", "created_at")
+
+    def __init__(self, id: int, email: str, username: str = None, created_at=None):
+        self.id = id
+        self.email = email
+        self.username = username
+        self.created_at = created_at
+
+# === Bcrypt fora do event loop ===
+# Pool próprio para o bcrypt (~100-300 ms de CPU por chamada), com fila limitada:
+# numa rajada de logins recusamos com 429 em vez de atrasar todas as rotas.
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_pending = 0
+
+async def _run_hash_job(func, *args):
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Servidor ocupado, tente novamente em instantes",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+        future = asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    except BaseException:
+        _hash_pending -= 1
+        raise
+    # O slot só é liberado quando a thread termina, mesmo que quem aguardava
+    # tenha sido cancelado (cliente desconectou): a fila nunca passa do limite
+    future.add_done_callback(_release_hash_slot)
+    return await asyncio.shield(future)
+
+def _release_hash_slot(_):
+    global _hash_pending
+    _hash_pending -= 1
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_hash_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await _run_hash_job(get_password_hash, password)
+
+def invalidate_cached_user(email: str = None):
+    # Chamar após todo commit que cria, altera ou remove um usuário; sem email limpa tudo
+    if email is None:
+        _user_cache.clear()
+    else:
+        _user_cache.delete(email)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    # Etapa "auth" no Server-Timing (inclui a consulta ao banco, se houver)
+    with timed("auth"):
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            email: str = payload.get("sub")
+            if email is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-        
-    # Busca usuário no DB de forma async
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalars().first()
+
+        if settings.AUTH_TRUST_TOKEN_CLAIMS and payload.get("uid") is not None:
+            return TokenUser(payload["uid"], email, payload.get("username"))
+
+        user = _user_cache.get(email)
+        if user is not None:
+            return user
+
+        # Busca usuário no DB de forma async
+        result = await db.execute(select(User).where(User.email == email))
+        user = result.scalars().first()
     
-    if user is None:
-        raise credentials_exception
-    return user
+        if user is None:
+            raise credentials_exception
+        cached = TokenUser(user.id, user.email, user.username, user.created_at)
+        _user_cache.set(email, cached)
+        return cached
@@ -1,25 +1,88 @@
 # src/database.py
-import os
+import logging
+import random
+import time
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.sql.functions import FunctionElement
 from sqlalchemy.ext.declarative import declarative_base
+from src.config import settings
+from src.services.metrics import record
 
-# Obtém a URL do banco (com fallback para SQLite local async)
-# Nota: SQLite async requer o driver 'aiosqlite'
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./dashmaster.db")
+sql_logger = logging.getLogger("dashmaster.sql")
 
-# Para asyncpg (Postgres), substitua "postgresql" por "postgresql+asyncpg"
-if "postgresql://" in DATABASE_URL:
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
-elif "postgres://" in DATABASE_URL: # Render fornece postgres://
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+asyncpg://")
+def normalize_database_url(database_url: str) -> str:
+    # Para asyncpg (Postgres), substitua "postgresql" por "postgresql+asyncpg"
+    if database_url.startswith("postgresql://"):
+        return database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if database_url.startswith("postgres://"): # Render fornece postgres://
+        return database_url.replace("postgres://", "postgresql+asyncpg://", 1)
+    return database_url
 
-# Configuração do Engine Async
-connect_args = {}
-if "sqlite" in DATABASE_URL:
-    connect_args = {"check_same_thread": False}
+def build_engine(database_url: str = None, **overrides):
+    """
+    Cria o engine async a partir das configurações (pool, pre-ping, recycle,
+    statement timeout e cache de prepared statements do asyncpg).
+    `overrides` vai direto para create_async_engine.
+    """
+    url = make_url(normalize_database_url(database_url or settings.DATABASE_URL))
+    options = {
+        "echo": settings.DB_ECHO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    connect_args = {}
 
-engine = create_async_engine(DATABASE_URL, echo=True, connect_args=connect_args)
+    if url.get_backend_name() == "sqlite":
+        # Nota: SQLite async requer o driver 'aiosqlite'
+        connect_args["check_same_thread"] = False
+        in_memory = url.database in (None, "", ":memory:")
+    else:
+        in_memory = False
+
+    if not in_memory and "poolclass" not in overrides:
+        # SQLite em memória usa StaticPool (e NullPool etc., via overrides),
+        # que não aceita dimensionamento
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+
+    if url.drivername == "postgresql+asyncpg":
+        cache_size = settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+        url = url.update_query_dict({"prepared_statement_cache_size": str(cache_size)})
+        connect_args["statement_cache_size"] = cache_size
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+
+    options.update(overrides)
+    async_engine = create_async_engine(url, connect_args=connect_args, **options)
+    install_query_timing(async_engine)
+    return async_engine
+
+def install_query_timing(async_engine):
+    """Loga queries lentas sempre e as demais por amostragem (logger dashmaster.sql)."""
+    sync_engine = async_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        record("db", elapsed)
+        elapsed_ms = elapsed * 1000
+        if elapsed_ms >= settings.DB_SLOW_QUERY_MS:
+            sql_logger.warning("Query lenta (%.1f ms): %s", elapsed_ms, statement)
+        elif random.random() < settings.DB_QUERY_LOG_SAMPLE_RATE:
+            sql_logger.info("Query (%.1f ms): %s", elapsed_ms, statement)
+
+engine = build_engine()
 
 # Sessão Async
 SessionLocal = sessionmaker(
@@ -34,3 +97,53 @@ Base = declarative_base()
 async def get_db():
     async with SessionLocal() as session:
         yield session
+
+def _column_ddl(column, dialect) -> str:
+    # SQLite não aceita DEFAULT não constante (ex: now()) em ADD COLUMN:
+    # a coluna entra sem default e as linhas antigas ficam NULL
+    if dialect.name == "sqlite" and isinstance(getattr(column.server_default, "arg", None), FunctionElement):
+        return f"{dialect.identifier_preparer.format_column(column)} {column.type.compile(dialect=dialect)}"
+    # Inclui DEFAULT/NOT NULL do modelo; o DEFAULT preenche as linhas antigas
+    return str(CreateColumn(column).compile(dialect=dialect))
+
+def upgrade_schema(sync_conn):
+    """
+    create_all só cria tabelas novas: em tabelas que já existem, adiciona as
+    colunas e índices que o modelo ganhou depois. Só acrescenta (nunca
+    altera ou remove); rodar com conn.run_sync após o create_all, ou usar
+    migrate_schema, que faz os dois sob lock.
+    """
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                table_name = sync_conn.dialect.identifier_preparer.format_table(table)
+                sync_conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {_column_ddl(column, sync_conn.dialect)}")
+
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(sync_conn)
+
+# Chave do advisory lock do Postgres que serializa as migrações na subida
+_SCHEMA_LOCK_KEY = 7_301_455
+
+def migrate_schema(sync_conn):
+    """
+    create_all + upgrade_schema sob um lock do banco: vários workers subindo
+    juntos rodam um de cada vez, e quem chega depois já encontra o esquema
+    pronto (sem ALTER TABLE/CREATE INDEX duplicado). Rodar com conn.run_sync
+    dentro de engine.begin(); o lock é liberado no commit.
+    """
+    if sync_conn.dialect.name == "postgresql":
+        sync_conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({_SCHEMA_LOCK_KEY})")
+    elif sync_conn.dialect.name == "sqlite":
+        # O driver só abre transação antes de DML: sem isso, cada DDL corre
+        # solto. IMMEDIATE pega o lock de escrita já aqui; os outros workers
+        # esperam (busy timeout) e só depois inspecionam o esquema
+        sync_conn.exec_driver_sql("BEGIN IMMEDIATE")
+    Base.metadata.create_all(sync_conn)
+    upgrade_schema(sync_conn)
@@ -1,15 +1,25 @@
 # src/main.py
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import asyncio
 
-from src.database import engine
+from src.config import settings
+from src.database import engine, SessionLocal, migrate_schema
 from src.routers.auth_router import router as auth_router
 from src.routers.projects_router import router as projects_router
-from src.routers.dashboard_router import router as dashboard_router
+from src.routers.dashboard_router import router as dashboard_router, project_router as project_dashboard_router, refresh_project_dashboard
+from src.routers.metrics_router import router as metrics_router
+from src.services.admission import AdmissionRejected
+from src.services.google_service import WorksheetNotFound
 from src.models import Base
+from src.services.executor import run_blocking, shutdown_executor
+from src.services.lazy import preload_modules
+from src.services.metrics import MetricsMiddleware
+from src.services.profiler import SlowRequestProfiler
+from src.services.scheduler import REFRESH_MODES, ProjectRefresher
 
 app = FastAPI(title="DashMaster API")
 
@@ -20,24 +30,72 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cursor da próxima página da listagem de projetos e espera após um 429
+    expose_headers=["X-Next-Cursor", "X-Has-More", "Retry-After"],
 )
 
+# Server-Timing + histogramas (/metrics); desligado, não há custo por requisição
+if settings.METRICS_ENABLED:
+    profiler = None
+    if settings.PROFILE_SLOW_REQUEST_MS > 0:
+        profiler = SlowRequestProfiler(settings.PROFILE_SLOW_REQUEST_MS, settings.PROFILE_SAMPLE_INTERVAL_MS)
+    app.add_middleware(MetricsMiddleware, profiler=profiler)
+
+# Limites de taxa, fila cheia e cota do Google esgotada: 429 com Retry-After
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": exc.retry_after_header},
+    )
+
+# Aba inexistente na planilha: erro do pedido, não dados simulados
+@app.exception_handler(WorksheetNotFound)
+async def worksheet_not_found_handler(request: Request, exc: WorksheetNotFound):
+    return JSONResponse(status_code=404, content={"detail": str(exc)})
+
 # Rotas
 # Rotas
 # Rotas
 app.include_router(auth_router, prefix="/api/auth")
 app.include_router(projects_router, prefix="/api")
 app.include_router(dashboard_router, prefix="/api")
+app.include_router(project_dashboard_router, prefix="/api")
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 
 # Frontend estático
 app.mount("/", StaticFiles(directory="public", html=True), name="public")
 
+# Pré-aquecimento periódico dos dashboards dos projetos ativos; em "leader",
+# só um worker por vez atualiza (lease no banco)
+refresher = ProjectRefresher(SessionLocal, refresh_project_dashboard, lease=settings.REFRESH_MODE == "leader")
+
 # Cria tabelas se não existirem (Async)
 @app.on_event("startup")
 async def startup_event():
     # Isso permite que as tabelas sejam criadas mesmo com o motor async
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        # create_all + colunas/índices novos, um worker por vez
+        await conn.run_sync(migrate_schema)
+
+    if settings.REFRESH_MODE not in REFRESH_MODES:
+        # Erro de digitação não pode desligar o pré-aquecimento em silêncio
+        raise ValueError(f"REFRESH_MODE inválido: {settings.REFRESH_MODE!r} (use {', '.join(REFRESH_MODES)})")
+    if settings.REFRESH_MODE == "leader" and not settings.SNAPSHOT_STORE_DIR:
+        print("REFRESH_MODE=leader sem SNAPSHOT_STORE_DIR: só o worker líder terá dashboards pré-aquecidos")
+    if settings.REFRESH_MODE != "disabled":
+        refresher.start()
+
+    if settings.PRELOAD_MODULES:
+        # Não aguarda: o primeiro dashboard encontra numpy/gspread já carregados
+        app.state.preload_task = asyncio.create_task(run_blocking(preload_modules))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await refresher.stop()
+    shutdown_executor()
 
 # Para execução local
 if __name__ == "__main__":
@@ -46,7 +104,7 @@ if __name__ == "__main__":
     # Wrapper para criar tabelas antes de iniciar (caso não use o evento de startup do FastAPI no uvicorn puro)
     async def main():
         async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(migrate_schema)
         uvicorn.run("src.main:app", host="0.0.0.0", port=8000, reload=True)
     
     # Se já existir loop rodando (ex: notebooks), use-o, senão crie novo
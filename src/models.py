@@ -1,6 +1,6 @@
 # src/models.py
-from sqlalchemy import Column, Integer, String, DateTime
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy.sql import expression, func
 from src.database import Base
 
 class User(Base):
@@ -12,7 +12,7 @@ class User(Base):
     hashed_password = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-from sqlalchemy import ForeignKey, JSON
+from sqlalchemy import ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 
 class Project(Base):
@@ -22,9 +22,52 @@ class Project(Base):
     name = Column(String)
     spreadsheet_url = Column(String)
     categories = Column(JSON) # Armazena lista de categorias
+    settings = Column(JSON, default=dict) # Preferências (ex: refresh_interval em segundos)
+    is_active = Column(Boolean, nullable=False, default=True, server_default=expression.true())
+    is_archived = Column(Boolean, nullable=False, default=False, server_default=expression.false())
     owner_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     owner = relationship("User", back_populates="projects")
 
+    __table_args__ = (
+        # Listagem do usuário filtrada por arquivamento, paginada por id (mais novos primeiro)
+        Index("ix_projects_owner_archived_id", "owner_id", "is_archived", "id"),
+    )
+
 User.projects = relationship("Project", back_populates="owner")
+
+
+class SheetSyncState(Base):
+    """Marca d'água da sincronização incremental de uma aba de um projeto."""
+    __tablename__ = "sheet_sync_state"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    worksheet = Column(Integer, primary_key=True, default=0)
+    row_count = Column(Integer, default=0)
+    tail_checksum = Column(String) # Hash do cabeçalho + últimas linhas sincronizadas
+    source_version = Column(String) # modifiedTime do Drive na última sincronização
+    last_full_sync_at = Column(DateTime(timezone=True))
+    synced_at = Column(DateTime(timezone=True))
+
+class SchedulerLease(Base):
+    """Lease do agendador (REFRESH_MODE=leader): um só worker atualiza por vez."""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False) # host:pid:aleatório do worker líder
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+class SheetRow(Base):
+    """Linhas da planilha materializadas localmente (projetos com sync incremental)."""
+    __tablename__ = "sheet_rows"
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    worksheet = Column(Integer, nullable=False, default=0)
+    row_number = Column(Integer, nullable=False) # 1-based, sem contar o cabeçalho
+    data = Column(JSON)
+
+    __table_args__ = (
+        Index("ix_sheet_rows_project_worksheet_row", "project_id", "worksheet", "row_number", unique=True),
+    )
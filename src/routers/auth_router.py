@@ -8,7 +8,10 @@ from datetime import timedelta
 
 from src.database import get_db
 from src.models import User
-from src.auth import verify_password, get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_user
+from src.auth import (
+    verify_password_async, get_password_hash_async, password_needs_rehash,
+    invalidate_cached_user, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_user
+)
 
 router = APIRouter(tags=["Authentication"])
 
@@ -34,7 +37,7 @@ async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email ou Username já registrado")
     
     # Cria novo usuário
-    hashed_pwd = get_password_hash(user.password)
+    hashed_pwd = await get_password_hash_async(user.password)
     new_user = User(
         email=user.email,
         username=user.username,
@@ -44,6 +47,7 @@ async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     
     db.add(new_user)
     await db.commit()
+    invalidate_cached_user(new_user.email)
     await db.refresh(new_user)
     
     return {"message": "Usuário criado com sucesso", "user_id": new_user.id}
@@ -72,16 +76,25 @@ async def login(
          result = await db.execute(select(User).where(User.username == form_data.username))
          user = result.scalars().first()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email/Username ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Custo do bcrypt mudou: aproveita a senha em mãos para refazer o hash
+    if password_needs_rehash(user.hashed_password):
+        try:
+            user.hashed_password = await get_password_hash_async(form_data.password)
+            await db.commit()
+            invalidate_cached_user(user.email)
+        except HTTPException:
+            pass  # Pool cheio: tenta de novo no próximo login
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, 
+        data={"sub": user.email, "uid": user.id, "username": user.username}, 
         expires_delta=access_token_expires
     )
     
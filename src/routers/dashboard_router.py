@@ -1,37 +1,531 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import List
-from src.services.google_service import GoogleSheetService
+import asyncio
+import hashlib
+import json
+import re
+import time
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Literal, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from src.config import settings
+from src.database import SessionLocal, get_db
+from src.models import Project
+from src.services.google_service import GoogleSheetService, WorksheetNotFound
 from src.services.data_processor import DataProcessor
 from src.services.ai_forecasting import predict_trends
+from src.services.admission import (
+    BACKGROUND, BATCH, INTERACTIVE, AdmissionQueue, AdmissionRejected, RateLimiter, store as admission_store,
+)
+from src.services.cache import LRUCache, SingleFlight
+from src.services.compression import choose_encoding, compress
+from src.services.executor import run_blocking
+from src.services.metrics import timed
+from src.services.serialization import FastJSONResponse, dumps as _dumps
+from src.services.sheet_cache import SheetCache
+from src.services.sheet_sync import SheetSync
+from src.services.snapshot_store import build_store as build_snapshot_store
 from src.auth import get_current_user # Protege a rota
 
-router = APIRouter(prefix="/process-data", tags=["Dashboard"])
+router = APIRouter(prefix="/process-data", tags=["Dashboard"], default_response_class=FastJSONResponse)
+# GET cacheável por projeto (ETag/304 + compressão)
+project_router = APIRouter(prefix="/projects", tags=["Dashboard"], default_response_class=FastJSONResponse)
 
 class DataRequest(BaseModel):
     spreadsheet_url: str
     categories: List[str]
+    # Projeto com settings["sync"] == "incremental": lê da cópia local da planilha
+    project_id: Optional[int] = None
+    worksheet: int = 0
+    # Leitura seletiva: só estas colunas (além de data/categoria) e este intervalo
+    # de linhas de dados (1-based, inclusivo); None = aba inteira
+    columns: Optional[List[str]] = None
+    start_row: Optional[int] = Field(None, ge=1)
+    end_row: Optional[int] = Field(None, ge=1)
+    # Formato da timeline: "records" (lista de linhas) ou "columns" ({coluna: [valores]})
+    layout: Literal["records", "columns"] = "records"
+    # Resposta em NDJSON para clientes da API: KPIs e insights primeiro,
+    # timeline em blocos depois. Limita o texto serializado de cada vez; as
+    # colunas processadas ficam em memória como no modo normal, e a resposta
+    # não passa pelo cache de resultados
+    stream: bool = False
+    # Agregação da timeline por período e limite de pontos por série (LTTB)
+    granularity: Optional[Literal["day", "week", "month"]] = None
+    aggregation: Literal["sum", "mean", "count", "min", "max"] = "sum"
+    max_points: Optional[int] = Field(None, ge=3)
+    # Previsão: passos à frente, período sazonal (em linhas) e nível do intervalo
+    forecast_horizon: int = Field(1, ge=1, le=365)
+    seasonality: Optional[int] = Field(None, ge=2)
+    confidence: Literal[0.8, 0.9, 0.95, 0.99] = 0.95
 
 # Serviços instanciados
 google_service = GoogleSheetService()
 processor = DataProcessor()
+# Com SNAPSHOT_STORE_DIR, as planilhas baixadas viram snapshots colunares em
+# disco, abertos com mmap por todos os workers
+sheet_cache = SheetCache(google_service, store=build_snapshot_store())
+sheet_sync = SheetSync(google_service, SessionLocal)
 
-@router.post("")
-async def process_dashboard_data(request: DataRequest, current_user = Depends(get_current_user)):
-    try:
-        # 1. Obter dados brutos
-        raw_data = google_service.get_sheet_data(request.spreadsheet_url)
-        
-        # 2. Processar com Pandas
-        processed_data = processor.process(raw_data, request.categories)
-        
-        # 3. Gerar Insights de IA
-        ai_data = predict_trends(processed_data.get('timeline', []))
-        
-        return {
+# Respostas já serializadas, chaveadas pelo conteúdo da planilha + parâmetros
+result_cache = LRUCache(max_bytes=settings.RESULT_CACHE_MAX_BYTES)
+result_flight = SingleFlight()
+
+# Controle de admissão: token bucket por usuário e por planilha (estado no
+# store, compartilhável via Redis) e fila por prioridade do trabalho pesado
+user_limiter = RateLimiter(admission_store, "usuário", settings.RATE_LIMIT_USER_PER_SECOND, settings.RATE_LIMIT_USER_BURST)
+sheet_limiter = RateLimiter(admission_store, "planilha", settings.RATE_LIMIT_SHEET_PER_SECOND, settings.RATE_LIMIT_SHEET_BURST)
+heavy_queue = AdmissionQueue(settings.ADMISSION_MAX_ACTIVE, settings.ADMISSION_MAX_QUEUED)
+
+_SHEET_ID = re.compile(r"/spreadsheets/d/([a-zA-Z0-9-_]+)")
+
+def _sheet_key(spreadsheet_url: str) -> str:
+    # Mesma planilha por URLs diferentes (#gid, /edit...) conta no mesmo bucket
+    match = _SHEET_ID.search(spreadsheet_url or "")
+    return match.group(1) if match else spreadsheet_url
+
+async def _admit(current_user, spreadsheet_url: str):
+    """Levanta AdmissionRejected (429) se o usuário ou a planilha passaram do limite."""
+    await user_limiter.acquire(current_user.id)
+    await sheet_limiter.acquire(_sheet_key(spreadsheet_url))
+
+async def _admitted(fn, *args, priority: int = INTERACTIVE):
+    # Processamento só roda com um slot da fila de admissão
+    async with heavy_queue.slot(priority):
+        return await fn(*args)
+
+def _result_key(digest: str, request: DataRequest):
+    params = request.dict(exclude={"spreadsheet_url", "project_id", "worksheet", "columns", "start_row", "end_row"})
+    params["categories"] = sorted(params["categories"])
+    return (digest, json.dumps(params, sort_keys=True))
+
+def _sheet_rows(request: DataRequest):
+    if request.start_row is None and request.end_row is None:
+        return None
+    return (request.start_row or 1, request.end_row)
+
+def _uses_local_store(project) -> bool:
+    return project is not None and (project.settings or {}).get("sync") == "incremental"
+
+def _peek_snapshot(request: DataRequest, project=None):
+    """Snapshot já em memória e dentro do TTL, ou None (sem E/S)."""
+    if _uses_local_store(project):
+        return sheet_sync.peek(project, request.worksheet)
+    return sheet_cache.peek(request.spreadsheet_url, request.worksheet, request.columns, _sheet_rows(request))
+
+async def _get_snapshot(request: DataRequest, project=None, force: bool = False):
+    with timed("fetch"):
+        if _uses_local_store(project):
+            return await sheet_sync.get_snapshot(project, request.worksheet, force=force)
+        return await sheet_cache.get_snapshot(
+            request.spreadsheet_url, request.worksheet, request.columns, _sheet_rows(request)
+        )
+
+def _forecast_fits(snapshot, request: DataRequest):
+    """
+    Ajustes reaproveitáveis do snapshot (cópia local append-only), se a
+    timeline da visão for linha a linha: agregação e LTTB mudam pontos antigos.
+    """
+    if snapshot.forecasts is None or request.granularity or request.max_points:
+        return None
+    return snapshot.forecasts
+
+def _predict(timeline, request: DataRequest, include_history: bool = True, fits: dict = None):
+    with timed("forecast"):
+        return predict_trends(
+            timeline,
+            horizon=request.forecast_horizon,
+            seasonality=request.seasonality,
+            level=request.confidence,
+            include_history=include_history,
+            fits=fits,
+            fit_key=tuple(sorted(request.categories)),
+        )
+
+def _render_dashboard(raw_data, request: DataRequest, fits: dict = None) -> bytes:
+    # 2. Processar (motor colunar em NumPy)
+    with timed("process"):
+        processed_data = processor.process(
+            raw_data,
+            request.categories,
+            request.layout,
+            granularity=request.granularity,
+            aggregation=request.aggregation,
+            max_points=request.max_points,
+        )
+
+    # 3. Gerar Insights de IA
+    ai_data = _predict(processed_data.get('timeline', []), request, fits=fits)
+
+    with timed("serialize"):
+        return _dumps({
             "status": "success",
             "data": processed_data,
             "ai_insights": ai_data
-        }
+        })
+
+async def _build_dashboard(request: DataRequest, project=None, force: bool = False) -> bytes:
+    # 1. Obter dados brutos (cache por planilha/aba ou cópia local)
+    snapshot = await _get_snapshot(request, project, force)
+    return await _dashboard_body(_result_key(snapshot.digest, request), snapshot, request)
+
+async def _dashboard_body(key, snapshot, request: DataRequest) -> bytes:
+    body = result_cache.get(key)
+    if body is not None:
+        return body
+
+    async def compute():
+        # Processamento e previsão são bloqueantes e rodam no pool dedicado
+        body = await run_blocking(_render_dashboard, snapshot.data, request, _forecast_fits(snapshot, request))
+        result_cache.set(key, body, len(body))
+        return body
+
+    return await result_flight.do(key, compute)
+
+async def _compressed_body(key, body: bytes, encoding: str) -> bytes:
+    # Versões comprimidas ficam no mesmo cache, ao lado da original
+    compressed_key = key + (encoding,)
+    compressed = result_cache.get(compressed_key)
+    if compressed is not None:
+        return compressed
+
+    async def compute():
+        with timed("compress"):
+            compressed = await run_blocking(compress, body, encoding)
+        result_cache.set(compressed_key, compressed, len(compressed))
+        return compressed
+
+    return await result_flight.do(compressed_key, compute)
+
+def _etag(key) -> str:
+    # Forte: muda junto com a versão dos dados (digest) ou os parâmetros da visão
+    return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).hexdigest()
+
+def _matching_etag(if_none_match: str, etag: str):
+    """Entre as ETags de If-None-Match, a que corresponde a `etag` (ou None)."""
+    for candidate in (if_none_match or "").split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return f'"{etag}"'
+        # If-None-Match usa comparação fraca; o sufixo é a codificação (-gzip, -br)
+        opaque = candidate.removeprefix("W/").strip('"')
+        if opaque.split("-", 1)[0] == etag:
+            return f'"{opaque}"'
+    return None
+
+def _render_stream_head(raw_data, request: DataRequest):
+    columns, summary = {}, {}
+    if raw_data:
+        with timed("process"):
+            columns, summary = processor.build(
+                raw_data,
+                request.categories,
+                granularity=request.granularity,
+                aggregation=request.aggregation,
+                max_points=request.max_points,
+            )
+    # O histórico da previsão (uma entrada por linha) vai em blocos depois
+    # da timeline, como linhas "history"; a primeira linha não cresce com a planilha
+    ai_data = _predict(columns, request, include_history=False)
+    with timed("serialize"):
+        head = _dumps({
+            "type": "summary",
+            "status": "success",
+            "total_rows": processor.row_count(columns),
+            "data": summary,
+            "ai_insights": ai_data,
+        }) + b"\n"
+    return columns, head, _history_columns(columns, ai_data)
+
+def _history_columns(columns: dict, ai_data):
+    """Colunas do histórico da previsão (data + métrica principal), ou None."""
+    if not ai_data or "date" not in columns:
+        return None
+    return {"date": columns["date"], "valor": columns[ai_data["metric"]]}
+
+def _next_line(kind: str, chunks):
+    rows = next(chunks, None)
+    if rows is None:
+        return None
+    return _dumps({"type": kind, kind: rows}) + b"\n"
+
+async def _prepare_stream(request: DataRequest, project=None):
+    snapshot = await _get_snapshot(request, project)
+    return await run_blocking(_render_stream_head, snapshot.data, request)
+
+async def _stream_body(head: bytes, columns: dict, history: dict = None):
+    yield head
+    try:
+        # Cada bloco é serializado no pool dedicado, sob demanda do cliente
+        for kind, source in (("rows", columns), ("history", history)):
+            if not source:
+                continue
+            chunks = processor.iter_timeline(source, settings.STREAM_CHUNK_ROWS)
+            while True:
+                line = await run_blocking(_next_line, kind, chunks)
+                if line is None:
+                    break
+                yield line
+        yield _dumps({"type": "end"}) + b"\n"
+    except Exception as e:
+        # O status HTTP já foi enviado: o erro vai como última linha
+        yield _dumps({"type": "error", "detail": str(e)}) + b"\n"
+
+def _project_request(project, **options) -> DataRequest:
+    """
+    Visão do dashboard de um projeto: planilha, categorias e colunas
+    (settings["columns"]) vêm do projeto; `options` são os demais campos
+    de DataRequest (worksheet, layout, granularity...).
+    """
+    return DataRequest(
+        spreadsheet_url=project.spreadsheet_url,
+        categories=project.categories or [],
+        project_id=project.id,
+        columns=(project.settings or {}).get("columns"),
+        **options,
+    )
+
+async def refresh_project_dashboard(project):
+    """
+    Pré-aquece o dashboard padrão de um projeto (usado pelo ProjectRefresher):
+    revalida a planilha e deixa a resposta pronta no cache de resultados.
+    `settings["worksheets"]` e `settings["columns"]` do projeto limitam o
+    que é lido da planilha.
+    """
+    project_settings = project.settings or {}
+    worksheets = project_settings.get("worksheets") or [0]
+    columns = project_settings.get("columns")
+
+    # Prioridade mais baixa: cede a vez aos dashboards abertos por usuários
+    async with heavy_queue.slot(BACKGROUND):
+        if not _uses_local_store(project):
+            # Todas as abas do projeto numa única ida ao Google
+            await sheet_cache.refresh(project.spreadsheet_url, worksheets, columns)
+        for worksheet in worksheets:
+            # Cópia local: sincroniza as linhas novas antes de montar o dashboard
+            await _build_dashboard(_project_request(project, worksheet=worksheet), project, force=_uses_local_store(project))
+
+class OverviewRequest(BaseModel):
+    project_ids: List[int]
+    worksheet: int = 0
+
+def _render_overview(raw_data, request: DataRequest) -> dict:
+    columns, summary = {}, {}
+    if raw_data:
+        with timed("process"):
+            columns, summary = processor.build(raw_data, request.categories)
+    ai_data = _predict(columns, request, include_history=False)
+    # Só o destaque da previsão: a visão geral não desenha gráficos
+    trend = {name: ai_data[name] for name in ("metric", "next_month_value", "trend")} if ai_data else None
+    return {"kpis": summary, "trend": trend}
+
+async def _project_overview(project, worksheet: int, slots: asyncio.Semaphore) -> dict:
+    request = _project_request(project, worksheet=worksheet)
+    await sheet_limiter.acquire(_sheet_key(project.spreadsheet_url))
+    async with slots, heavy_queue.slot(BATCH):
+        snapshot = await _get_snapshot(request, project)
+        key = (snapshot.digest, json.dumps({"overview": sorted(request.categories)}))
+        overview = result_cache.get(key)
+        if overview is not None:
+            return overview
+
+        async def compute():
+            overview = await run_blocking(_render_overview, snapshot.data, request)
+            result_cache.set(key, overview, len(_dumps(overview)))
+            return overview
+
+        return await result_flight.do(key, compute)
+
+def _overview_line(project_id: int, status: str, **fields) -> bytes:
+    return _dumps({"type": "project", "project_id": project_id, "status": status, **fields}) + b"\n"
+
+async def _overview_stream(projects: list, missing_ids: list, worksheet: int):
+    """
+    Uma linha NDJSON por projeto, na ordem em que terminam. No prazo
+    OVERVIEW_DEADLINE_SECONDS, os que faltam saem como "timeout". As buscas
+    e o processamento passam por SingleFlight (shield), então continuam
+    depois do cancelamento e deixam o cache pronto para a próxima abertura.
+    """
+    start = time.monotonic()
+    counts = {"ok": 0, "error": 0, "throttled": 0, "timeout": 0, "not_found": len(missing_ids)}
+    for project_id in missing_ids:
+        yield _overview_line(project_id, "not_found")
+
+    slots = asyncio.Semaphore(settings.OVERVIEW_CONCURRENCY)
+    tasks = {asyncio.ensure_future(_project_overview(project, worksheet, slots)): project for project in projects}
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = start + settings.OVERVIEW_DEADLINE_SECONDS - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                project = tasks[task]
+                if isinstance(task.exception(), AdmissionRejected):
+                    counts["throttled"] += 1
+                    yield _overview_line(project.id, "throttled", name=project.name, retry_after=task.exception().retry_after)
+                elif task.exception() is not None:
+                    counts["error"] += 1
+                    yield _overview_line(project.id, "error", name=project.name, detail=str(task.exception()))
+                else:
+                    counts["ok"] += 1
+                    yield _overview_line(project.id, "ok", name=project.name, **task.result())
+
+        for task in pending:
+            project = tasks[task]
+            counts["timeout"] += 1
+            yield _overview_line(project.id, "timeout", name=project.name)
+        yield _dumps({"type": "end", **counts, "elapsed_ms": round((time.monotonic() - start) * 1000)}) + b"\n"
+    finally:
+        # Prazo estourado ou cliente desconectado
+        for task in pending:
+            task.cancel()
+
+async def _load_project(db: AsyncSession, project_id: int, current_user):
+    result = await db.execute(select(Project).where(Project.id == project_id, Project.owner_id == current_user.id))
+    project = result.scalars().first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado.")
+    return project
+
+@router.post("")
+async def process_dashboard_data(request: DataRequest, current_user = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    project = None
+    if request.project_id is not None:
+        project = await _load_project(db, request.project_id, current_user)
+
+    await _admit(current_user, request.spreadsheet_url)
+    try:
+        if request.stream:
+            columns, head, history = await asyncio.wait_for(_admitted(_prepare_stream, request, project), settings.DASHBOARD_TIMEOUT_SECONDS)
+            return StreamingResponse(_stream_body(head, columns, history), media_type="application/x-ndjson")
+
+        body = await asyncio.wait_for(_admitted(_build_dashboard, request, project), settings.DASHBOARD_TIMEOUT_SECONDS)
+        return Response(content=body, media_type="application/json")
+    except (AdmissionRejected, WorksheetNotFound):
+        raise
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Tempo limite excedido ao processar a planilha")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+_DASHBOARD_CACHE_HEADERS = {
+    # private: a resposta depende do usuário; no-cache: sempre revalidar
+    "Cache-Control": "private, no-cache",
+    "Vary": "Accept-Encoding, Authorization",
+}
+
+@project_router.get("/{project_id}/dashboard")
+async def get_project_dashboard(
+    project_id: int,
+    http_request: Request,
+    worksheet: int = 0,
+    layout: Literal["records", "columns"] = "records",
+    granularity: Optional[Literal["day", "week", "month"]] = None,
+    aggregation: Literal["sum", "mean", "count", "min", "max"] = "sum",
+    max_points: Optional[int] = None,
+    forecast_horizon: int = 1,
+    seasonality: Optional[int] = None,
+    confidence: float = 0.95,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Dashboard de um projeto salvo, via GET: navegador e proxies podem
+    guardar a resposta e revalidá-la com If-None-Match (304 sem corpo,
+    sem recalcular). Corpos grandes saem com gzip/brotli.
+    """
+    project = await _load_project(db, project_id, current_user)
+    try:
+        request = _project_request(
+            project, worksheet=worksheet, layout=layout, granularity=granularity,
+            aggregation=aggregation, max_points=max_points, forecast_horizon=forecast_horizon,
+            seasonality=seasonality, confidence=confidence,
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+
+    def not_modified(key):
+        matched = _matching_etag(http_request.headers.get("if-none-match"), _etag(key))
+        if matched:
+            return Response(status_code=304, headers={**_DASHBOARD_CACHE_HEADERS, "ETag": matched})
+        return None
+
+    # Revalidação com a planilha em memória: 304 sem gastar a cota de admissão
+    cached = _peek_snapshot(request, project)
+    if cached is not None:
+        response = not_modified(_result_key(cached.digest, request))
+        if response is not None:
+            return response
+
+    await _admit(current_user, project.spreadsheet_url)
+
+    async def respond():
+        snapshot = await _get_snapshot(request, project)
+        key = _result_key(snapshot.digest, request)
+        response = not_modified(key)
+        if response is not None:
+            return response
+
+        etag = _etag(key)
+        headers = dict(_DASHBOARD_CACHE_HEADERS)
+
+        body = await _dashboard_body(key, snapshot, request)
+        encoding = choose_encoding(http_request.headers.get("accept-encoding"), len(body))
+        if encoding:
+            body = await _compressed_body(key, body, encoding)
+            headers["Content-Encoding"] = encoding
+            # Cada codificação é uma representação diferente: ETag própria
+            etag = f"{etag}-{encoding}"
+        headers["ETag"] = f'"{etag}"'
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    try:
+        return await asyncio.wait_for(_admitted(respond), settings.DASHBOARD_TIMEOUT_SECONDS)
+    except (AdmissionRejected, WorksheetNotFound):
+        raise
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Tempo limite excedido ao processar a planilha")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@project_router.post("/overview")
+async def get_projects_overview(request: OverviewRequest, current_user = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """
+    KPIs (médias) e destaque da previsão de vários projetos numa só
+    requisição, em NDJSON: cada projeto chega assim que fica pronto, com
+    busca e processamento em paralelo (até OVERVIEW_CONCURRENCY) e um prazo
+    total para que uma planilha lenta não segure a página.
+    """
+    project_ids = list(dict.fromkeys(request.project_ids))
+    if not project_ids or len(project_ids) > settings.OVERVIEW_MAX_PROJECTS:
+        raise HTTPException(status_code=422, detail=f"Informe de 1 a {settings.OVERVIEW_MAX_PROJECTS} projetos.")
+    # Limite por planilha vale para cada projeto (status "throttled" na linha)
+    await user_limiter.acquire(current_user.id)
+    if heavy_queue.full():
+        raise AdmissionRejected("Servidor ocupado; tente novamente em instantes.", heavy_queue.retry_after())
+
+    # Todos os projetos (e a verificação de posse) numa única query
+    result = await db.execute(select(Project).where(Project.id.in_(project_ids), Project.owner_id == current_user.id))
+    found = {project.id: project for project in result.scalars().all()}
+    projects = [found[project_id] for project_id in project_ids if project_id in found]
+    missing_ids = [project_id for project_id in project_ids if project_id not in found]
+
+    return StreamingResponse(
+        _overview_stream(projects, missing_ids, request.worksheet),
+        media_type="application/x-ndjson",
+    )
+
+@router.get("/cache-stats")
+async def get_cache_stats(current_user = Depends(get_current_user)):
+    results = result_cache.stats()
+    results["coalesced"] = result_flight.coalesced
+    admission = heavy_queue.stats()
+    admission.update({
+        "rejected_user": user_limiter.rejected,
+        "rejected_sheet": sheet_limiter.rejected,
+        "google_throttles": google_service.backoff.throttles,
+        "google_blocked_seconds": round(await google_service.backoff.remaining_async(), 1),
+    })
+    return {"sheets": sheet_cache.stats(), "local_sheets": sheet_sync.stats(), "results": results, "admission": admission}
@@ -0,0 +1,9 @@
+from fastapi import APIRouter, Response
+from src.services.metrics import render_metrics
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    # Formato texto do Prometheus (histogramas de latência por rota e por etapa)
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
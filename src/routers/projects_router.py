@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, insert, update
 from sqlalchemy.future import select
 from typing import List, Optional
 from pydantic import BaseModel
 from src.database import get_db
-from src.models import Project, User
+from src.models import Project, User, SheetRow, SheetSyncState
 from src.auth import get_current_user
+from src.config import settings
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
@@ -28,15 +31,78 @@ class ProjectOut(ProjectBase):
     owner_id: int
     is_archived: bool
     is_active: bool
+    created_at: Optional[datetime] = None
     class Config:
         orm_mode = True
 
+class ProjectBulkUpdate(ProjectUpdate):
+    id: int
+
+class ProjectBulkRequest(BaseModel):
+    create: List[ProjectBase] = []
+    update: List[ProjectBulkUpdate] = []
+    delete: List[int] = []
+
+class BulkItemResult(BaseModel):
+    # Posição do item na lista enviada
+    index: int
+    id: Optional[int] = None
+    status: str  # "created", "updated", "deleted" ou "not_found"
+    project: Optional[ProjectOut] = None
+
+class ProjectBulkResponse(BaseModel):
+    created: List[BulkItemResult] = []
+    updated: List[BulkItemResult] = []
+    deleted: List[BulkItemResult] = []
+
+# Colunas da listagem: projeção direta, sem hidratar objetos no ORM
+_LIST_COLUMNS = (
+    Project.id, Project.name, Project.spreadsheet_url, Project.categories, Project.settings,
+    Project.owner_id, Project.is_archived, Project.is_active, Project.created_at,
+)
+
 @router.get("", response_model=List[ProjectOut])
-async def get_my_projects(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_my_projects(
+    request: Request,
+    response: Response,
+    # Padrão = máximo: clientes antigos, que não paginam, recebem até 500
+    # projetos; se houver mais, X-Has-More/X-Next-Cursor avisam (nunca corta calado)
+    limit: int = Query(500, ge=1, le=500),
+    cursor: Optional[int] = Query(None, description="id do último projeto da página anterior"),
+    archived: Optional[bool] = None,
+    active: Optional[bool] = None,
+    q: Optional[str] = Query(None, max_length=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
     # Em async, não podemos confiar no lazy loading de current_user.projects
     # É mais seguro buscar diretamente na tabela de projetos
-    result = await db.execute(select(Project).where(Project.owner_id == current_user.id))
-    return result.scalars().all()
+    # Paginação por keyset: mais recentes primeiro (id cresce com a criação),
+    # coberta pelo índice (owner_id, is_archived, id), sem OFFSET
+    query = select(*_LIST_COLUMNS).where(Project.owner_id == current_user.id)
+    if archived is not None:
+        query = query.where(Project.is_archived == archived)
+    if active is not None:
+        query = query.where(Project.is_active == active)
+    if q:
+        # % e _ digitados pelo usuário são literais, não curingas
+        escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.where(Project.name.ilike(f"%{escaped}%", escape="\\"))
+    if cursor is not None:
+        query = query.where(Project.id < cursor)
+    # Uma linha a mais só para saber se há próxima página
+    result = await db.execute(query.order_by(Project.id.desc()).limit(limit + 1))
+    rows = result.mappings().all()
+
+    has_more = len(rows) > limit
+    response.headers["X-Has-More"] = "true" if has_more else "false"
+    if has_more:
+        rows = rows[:limit]
+        next_cursor = str(rows[-1]["id"])
+        # Corpo continua sendo a lista (compatível); a próxima página vai nos cabeçalhos
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    return [dict(row) for row in rows]
 
 @router.post("", response_model=ProjectOut)
 async def create_project(project: ProjectBase, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -44,6 +110,7 @@ async def create_project(project: ProjectBase, db: AsyncSession = Depends(get_db
         name=project.name,
         spreadsheet_url=project.spreadsheet_url,
         categories=project.categories,
+        settings=project.settings or {},
         owner_id=current_user.id
     )
     db.add(db_project)
@@ -60,6 +127,9 @@ async def delete_project(project_id: int, db: AsyncSession = Depends(get_db), cu
     if not project:
         raise HTTPException(status_code=404, detail="Projeto não encontrado ou você não tem permissão para excluí-lo.")
     
+    # Cópia local da planilha (sync incremental), sem carregar as linhas no ORM
+    await db.execute(delete(SheetRow).where(SheetRow.project_id == project_id))
+    await db.execute(delete(SheetSyncState).where(SheetSyncState.project_id == project_id))
     await db.delete(project)
     await db.commit()
     return None
@@ -73,11 +143,96 @@ async def update_project(project_id: int, project_update: ProjectUpdate, db: Asy
     if not project:
         raise HTTPException(status_code=404, detail="Projeto não encontrado.")
     
-    # Atualizar campos
-    update_data = project_update.dict(exclude_unset=True)
+    # Atualizar campos (null = manter, como no /bulk; is_active/is_archived são NOT NULL)
+    update_data = project_update.dict(exclude_unset=True, exclude_none=True)
     for key, value in update_data.items():
         setattr(project, key, value)
     
     await db.commit()
     await db.refresh(project)
     return project
+
+@router.post("/bulk", response_model=ProjectBulkResponse)
+async def bulk_projects(payload: ProjectBulkRequest, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Cria, atualiza e exclui vários projetos numa única transação (nessa
+    ordem), com resultado por item. Ids que não existem ou não pertencem ao
+    usuário voltam como "not_found" sem abortar o lote.
+    """
+    total = len(payload.create) + len(payload.update) + len(payload.delete)
+    if total > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Máximo de {settings.BULK_MAX_ITEMS} itens por requisição.")
+
+    # Verificação de posse de todos os ids numa única query
+    requested_ids = {item.id for item in payload.update} | set(payload.delete)
+    owned_ids = set()
+    if requested_ids:
+        result = await db.execute(
+            select(Project.id).where(Project.id.in_(requested_ids), Project.owner_id == current_user.id)
+        )
+        owned_ids = set(result.scalars().all())
+
+    response = ProjectBulkResponse()
+
+    if payload.create:
+        # INSERT em lote com RETURNING. No SQLite, sort_by_parameter_order vira
+        # um INSERT por linha; lá um único INSERT ... VALUES numera os ids na
+        # ordem dos itens, então basta ordenar o retorno pelo id
+        sqlite = db.get_bind().dialect.name == "sqlite"
+        result = await db.execute(
+            insert(Project).returning(*_LIST_COLUMNS, sort_by_parameter_order=not sqlite),
+            [
+                {
+                    "name": item.name,
+                    "spreadsheet_url": item.spreadsheet_url,
+                    "categories": item.categories,
+                    "settings": item.settings or {},
+                    "owner_id": current_user.id,
+                }
+                for item in payload.create
+            ],
+        )
+        rows = result.mappings().all()
+        if sqlite:
+            rows = sorted(rows, key=lambda row: row["id"])
+        response.created = [
+            BulkItemResult(index=index, id=row["id"], status="created", project=ProjectOut(**row))
+            for index, row in enumerate(rows)
+        ]
+
+    updates = []
+    for index, item in enumerate(payload.update):
+        if item.id not in owned_ids:
+            response.updated.append(BulkItemResult(index=index, id=item.id, status="not_found"))
+            continue
+        # null num campo = manter o valor atual (colunas como is_active não aceitam NULL)
+        values = item.dict(exclude_unset=True, exclude_none=True)
+        if len(values) > 1:
+            updates.append(values)
+        response.updated.append(BulkItemResult(index=index, id=item.id, status="updated"))
+    if updates:
+        # UPDATE em lote pela chave primária (executemany)
+        await db.execute(update(Project), updates)
+
+    delete_ids = [project_id for project_id in dict.fromkeys(payload.delete) if project_id in owned_ids]
+    if delete_ids:
+        # Cópia local da planilha (sync incremental) sai junto, sem carregar linhas no ORM
+        await db.execute(delete(SheetRow).where(SheetRow.project_id.in_(delete_ids)))
+        await db.execute(delete(SheetSyncState).where(SheetSyncState.project_id.in_(delete_ids)))
+        await db.execute(delete(Project).where(Project.id.in_(delete_ids)))
+    response.deleted = [
+        BulkItemResult(index=index, id=project_id, status="deleted" if project_id in owned_ids else "not_found")
+        for index, project_id in enumerate(payload.delete)
+    ]
+
+    # Estado final dos atualizados (que não foram excluídos no mesmo lote)
+    updated_ids = {item.id for item in response.updated if item.status == "updated"} - set(delete_ids)
+    if updated_ids:
+        result = await db.execute(select(*_LIST_COLUMNS).where(Project.id.in_(updated_ids)))
+        projects = {row["id"]: dict(row) for row in result.mappings().all()}
+        for item in response.updated:
+            if item.id in projects:
+                item.project = ProjectOut(**projects[item.id])
+
+    await db.commit()
+    return response
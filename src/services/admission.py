@@ -0,0 +1,268 @@
+# src/services/admission.py
+import asyncio
+import heapq
+import itertools
+import math
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from src.config import settings
+from src.services.cache import LRUCache
+
+# Prioridades da fila de trabalho pesado (menor = atendido antes)
+INTERACTIVE = 0   # dashboard aberto por um usuário
+BATCH = 1         # visão geral de vários projetos
+BACKGROUND = 2    # pré-aquecimento do agendador
+
+
+class AdmissionRejected(Exception):
+    """Requisição recusada por limite de taxa ou fila cheia (HTTP 429)."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        # Retry-After só aceita segundos inteiros
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class UpstreamThrottled(AdmissionRejected):
+    """A API de origem (Google) recusou por cota; não chamar antes de `retry_after`."""
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: int, cost: float):
+    """Token bucket: (tokens restantes, espera em s; 0 = admitido)."""
+    tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate
+
+
+class MemoryStore:
+    """
+    Estado de admissão no próprio processo. `take`/`blocked_for_async`
+    rodam no event loop; `block`/`blocked_for` nas threads do pool
+    (chamadas ao Google).
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self._buckets = LRUCache(max_items=max_keys)
+        self._blocks = {}
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, rate: float, burst: int, cost: float = 1) -> float:
+        now = time.monotonic()
+        state = self._buckets.get(key)
+        if state is None:
+            state = [float(burst), now]
+            self._buckets.set(key, state)
+        state[0], wait = _refill(state[0], state[1], now, rate, burst, cost)
+        state[1] = now
+        return wait
+
+    def block(self, key: str, seconds: float):
+        with self._lock:
+            self._blocks[key] = max(self._blocks.get(key, 0.0), time.time() + seconds)
+
+    def blocked_for(self, key: str) -> float:
+        with self._lock:
+            return max(0.0, self._blocks.get(key, 0.0) - time.time())
+
+    async def blocked_for_async(self, key: str) -> float:
+        return self.blocked_for(key)
+
+
+# Mesmo cálculo de _refill, atômico no Redis (relógio do servidor Redis)
+_TAKE_SCRIPT = """
+local rate, burst, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= cost then tokens = tokens - cost else wait = (cost - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisStore:
+    """
+    Estado compartilhado entre workers/instâncias. Cliente async para tudo
+    que roda no event loop (buckets, consulta de bloqueio) e síncrono só
+    para as threads do pool: uma chamada síncrona no loop pararia todas as
+    requisições enquanto o Redis responde.
+    """
+
+    def __init__(self, url: str, prefix: str = "dashmaster:admission:"):
+        import redis
+        import redis.asyncio
+
+        self.prefix = prefix
+        self._async = redis.asyncio.from_url(url)
+        self._sync = redis.from_url(url)
+        self._take = self._async.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, rate: float, burst: int, cost: float = 1) -> float:
+        return float(await self._take(keys=[self.prefix + key], args=[rate, burst, cost]))
+
+    def block(self, key: str, seconds: float):
+        # Só estende: um bloqueio mais longo já registrado continua valendo
+        key = self.prefix + "block:" + key
+        milliseconds = math.ceil(seconds * 1000)
+        if self._sync.pttl(key) < milliseconds:
+            self._sync.set(key, 1, px=milliseconds)
+
+    def blocked_for(self, key: str) -> float:
+        return max(0, self._sync.pttl(self.prefix + "block:" + key)) / 1000
+
+    async def blocked_for_async(self, key: str) -> float:
+        return max(0, await self._async.pttl(self.prefix + "block:" + key)) / 1000
+
+
+def build_store():
+    if settings.ADMISSION_REDIS_URL:
+        return RedisStore(settings.ADMISSION_REDIS_URL)
+    return MemoryStore()
+
+
+class RateLimiter:
+    """Token bucket por chave (usuário, planilha...); rate <= 0 desliga."""
+
+    def __init__(self, store, name: str, rate: float, burst: int):
+        self.store = store
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.rejected = 0
+
+    async def acquire(self, key, cost: float = 1):
+        if self.rate <= 0:
+            return
+        wait = await self.store.take(f"{self.name}:{key}", self.rate, self.burst, cost)
+        if wait > 0:
+            self.rejected += 1
+            raise AdmissionRejected(f"Limite de requisições por {self.name} excedido; tente novamente em instantes.", wait)
+
+
+class AdmissionQueue:
+    """
+    Limita o trabalho pesado simultâneo deste worker (CPU do processamento
+    e da previsão). Acima de `max_active`, as requisições esperam numa fila
+    por prioridade; com `max_queued` à espera, as novas são recusadas na
+    hora com um Retry-After estimado, em vez de acumular timeouts.
+    """
+
+    def __init__(self, max_active: int, max_queued: int):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.active = 0
+        self.rejected = 0
+        # heap de (prioridade, ordem de chegada, future)
+        self._waiters = []
+        self._order = itertools.count()
+        # Média móvel do tempo de ocupação de um slot (s), para o Retry-After
+        self._avg_seconds = 1.0
+
+    def full(self) -> bool:
+        return self.active >= self.max_active and len(self._waiters) >= self.max_queued
+
+    def retry_after(self) -> float:
+        return self._avg_seconds * (len(self._waiters) + 1) / self.max_active
+
+    async def acquire(self, priority: int = INTERACTIVE):
+        if self.active < self.max_active and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queued:
+            self.rejected += 1
+            raise AdmissionRejected("Servidor ocupado; tente novamente em instantes.", self.retry_after())
+
+        entry = (priority, next(self._order), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, entry)
+        try:
+            await entry[2]
+        except asyncio.CancelledError:
+            if entry[2].cancelled():
+                # release() pode já ter descartado a entrada cancelada
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+            else:
+                # O slot foi passado para nós junto com o cancelamento: devolve
+                self.release()
+            raise
+
+    def release(self):
+        # O slot passa direto para o próximo da fila (active não muda)
+        while self._waiters:
+            future = heapq.heappop(self._waiters)[2]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = INTERACTIVE):
+        await self.acquire(priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.monotonic() - start)
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": len(self._waiters),
+            "max_active": self.max_active,
+            "max_queued": self.max_queued,
+            "rejected": self.rejected,
+        }
+
+
+class UpstreamBackoff:
+    """
+    Backoff exponencial (com jitter) após 429 da API de origem. O bloqueio
+    fica no store, então com Redis vale para todos os workers.
+    """
+
+    def __init__(self, store, name: str, base: float, maximum: float):
+        self.store = store
+        self.name = name
+        self.base = base
+        self.maximum = maximum
+        self.failures = 0
+        self.throttles = 0
+
+    def remaining(self) -> float:
+        # Síncrono: só nas threads do pool (GoogleSheetService._guarded)
+        return self.store.blocked_for(self.name)
+
+    async def remaining_async(self) -> float:
+        return await self.store.blocked_for_async(self.name)
+
+    def throttled(self, retry_after: float = None) -> float:
+        """Registra um 429; devolve por quanto tempo (s) não chamar a API."""
+        self.throttles += 1
+        delay = min(self.base * 2 ** self.failures, self.maximum) * random.uniform(0.8, 1.2)
+        self.failures += 1
+        # O Retry-After enviado pela API prevalece se for maior
+        delay = max(delay, retry_after or 0)
+        self.store.block(self.name, delay)
+        return delay
+
+    def succeeded(self):
+        self.failures = 0
+
+
+# Estado compartilhado do processo (ou de todos os workers, com Redis)
+store = build_store()
@@ -1,48 +1,191 @@
-from sklearn.linear_model import LinearRegression
-import numpy as np
-import pandas as pd
+import copy
 
-def predict_trends(timeline_data: list):
+from src.services.lazy import numpy as np
+
+# Métricas candidatas a "principal", em ordem de preferência
+TARGET_COLUMNS = ['valor', 'receita', 'leads', 'conversoes', 'taxa_abertura']
+
+# Quantis da normal para os níveis de confiança mais usados
+_Z_SCORES = {0.8: 1.2816, 0.9: 1.6449, 0.95: 1.96, 0.99: 2.5758}
+
+class TrendModel:
     """
-    Prevê o próximo valor para a métrica principal (ex: 'valor' ou 'conversoes')
+    Regressão linear (tendência + sazonalidade opcional) ajustada para várias
+    séries de uma vez, por mínimos quadrados em forma fechada.
+
+    Guarda só as estatísticas suficientes (XᵀX, XᵀY, soma de Y², n), então
+    `update` incorpora linhas novas sem reprocessar o histórico; `fit`
+    recomeça do zero. `seasonality` é o período em linhas (ex: 12 para
+    meses, 7 para dias).
     """
-    if not timeline_data or len(timeline_data) < 3:
+
+    def __init__(self, seasonality: int = None, harmonics: int = 2):
+        self.seasonality = seasonality if seasonality and seasonality >= 2 else None
+        self.harmonics = min(harmonics, self.seasonality // 2) if self.seasonality else 0
+        self.xtx = self.xty = self.yty = None
+        self.n = 0
+
+    def design(self, t: "np.ndarray") -> "np.ndarray":
+        columns = [np.ones_like(t), t]
+        for k in range(1, self.harmonics + 1):
+            angle = 2 * np.pi * k * t / self.seasonality
+            columns += [np.sin(angle), np.cos(angle)]
+        return np.column_stack(columns)
+
+    def update(self, y: "np.ndarray"):
+        """Acrescenta linhas (matriz n_novas x n_series) depois das já vistas."""
+        y = np.asarray(y, dtype=np.float64).reshape(len(y), -1)
+        x = self.design(np.arange(self.n, self.n + len(y), dtype=np.float64))
+        xtx, xty, yty = x.T @ x, x.T @ y, (y * y).sum(axis=0)
+        if self.n:
+            # Arrays novos (sem +=): cópias rasas do modelo seguem independentes
+            xtx, xty, yty = self.xtx + xtx, self.xty + xty, self.yty + yty
+        self.xtx, self.xty, self.yty = xtx, xty, yty
+        self.n += len(y)
+        return self
+
+    def fit(self, y: "np.ndarray"):
+        """Ajusta só às linhas dadas, descartando as anteriores."""
+        self.xtx = self.xty = self.yty = None
+        self.n = 0
+        return self.update(y)
+
+    def coefficients(self) -> "np.ndarray":
+        # pinv: estável mesmo com poucas linhas ou termos colineares
+        return np.linalg.pinv(self.xtx) @ self.xty
+
+    def forecast(self, horizon: int = 1, level: float = 0.95):
+        """Retorna (previsões, inferior, superior), cada um horizon x n_series."""
+        beta = self.coefficients()
+        x_future = self.design(np.arange(self.n, self.n + horizon, dtype=np.float64))
+        prediction = x_future @ beta
+
+        # Variância residual a partir das estatísticas suficientes
+        rss = self.yty - 2 * (beta * self.xty).sum(axis=0) + (beta * (self.xtx @ beta)).sum(axis=0)
+        dof = max(self.n - self.xtx.shape[0], 1)
+        sigma = np.sqrt(np.maximum(rss, 0) / dof)
+        leverage = np.einsum('ij,jk,ik->i', x_future, np.linalg.pinv(self.xtx), x_future)
+        margin = _Z_SCORES.get(level, 1.96) * np.sqrt(1 + leverage)[:, None] * sigma[None, :]
+        return prediction, prediction - margin, prediction + margin
+
+    def slopes(self) -> "np.ndarray":
+        return self.coefficients()[1]
+
+def _numeric_series(timeline_data):
+    """Extrai {coluna: array} das séries numéricas (registros ou colunas)."""
+    if isinstance(timeline_data, dict):
+        columns = timeline_data
+    else:
+        names = list(timeline_data[0].keys())
+        try:
+            columns = {name: [row[name] for row in timeline_data] for name in names}
+        except KeyError:
+            columns = {name: [row.get(name) for row in timeline_data] for name in names}
+
+    series = {}
+    for name, values in columns.items():
+        # Descarta cedo colunas de texto (datas, categorias) sem convertê-las
+        if isinstance(values, np.ndarray):
+            if values.dtype.kind in 'iuf' and values.ndim == 1:
+                series[name] = values
+        elif len(values) and isinstance(values[0], (int, float)) and not isinstance(values[0], bool):
+            try:
+                series[name] = np.fromiter(values, dtype=np.float64, count=len(values))
+            except (TypeError, ValueError):
+                continue
+    return columns, series
+
+# Máximo de visões (categorias/sazonalidade) guardadas por dicionário `fits`
+_MAX_FITS = 16
+
+def _fitted_model(y, names: list, seasonality, fits: dict = None, fit_key=None) -> TrendModel:
+    """
+    TrendModel ajustado às linhas `y`. Com `fits`, reaproveita o ajuste
+    anterior da mesma visão (`fit_key`) e só acrescenta as linhas novas;
+    quem passa `fits` garante que cada timeline começa pelas linhas da
+    anterior (cópia local append-only, ver SheetSync).
+    """
+    if fits is None:
+        return TrendModel(seasonality).fit(y)
+    key = (fit_key, tuple(names), seasonality)
+    model = fits.get(key)
+    if model is None or model.n > len(y):
+        model = TrendModel(seasonality).fit(y)
+    elif model.n < len(y):
+        model = copy.copy(model).update(y[model.n:])
+    else:
+        return model
+    current = fits.get(key)
+    # Entradas nunca são alteradas (só trocadas): seguro entre threads do pool
+    if (current is None and len(fits) < _MAX_FITS) or (current is not None and current.n < model.n):
+        fits[key] = model
+    return model
+
+def predict_trends(timeline_data, horizon: int = 1, seasonality: int = None, level: float = 0.95,
+                   include_history: bool = True, fits: dict = None, fit_key=None):
+    """
+    Prevê os próximos `horizon` valores de todas as métricas numéricas num
+    único ajuste vetorizado. A métrica principal (ex: 'valor' ou
+    'conversoes') é destacada nos campos de topo, como antes.
+    Aceita a timeline em registros (lista) ou em colunas ({coluna: [valores]}).
+    Sem `include_history`, o histórico (uma entrada por linha) fica de fora.
+    `fits`/`fit_key`: ajuste incremental, ver _fitted_model.
+    """
+    if not timeline_data:
+        return None
+
+    columns, series = _numeric_series(timeline_data)
+    n_rows = len(next(iter(series.values()))) if series else 0
+    if n_rows < 3:
         return None
 
-    df = pd.DataFrame(timeline_data)
-    
     # Identificar métrica principal (ex: valor, receita, leads)
-    target_col = None
-    for col in ['valor', 'receita', 'leads', 'conversoes', 'taxa_abertura']:
-        if col in df.columns:
-            target_col = col
-            break
-    
+    target_col = next((col for col in TARGET_COLUMNS if col in series), None)
     if not target_col:
         return None
 
-    # Preparar dados
-    df['period_idx'] = range(len(df))
-    X = df[['period_idx']].values
-    y = df[target_col].values
+    # Sazonalidade só com pelo menos dois ciclos completos; senão, só tendência
+    if seasonality and n_rows < 2 * seasonality:
+        seasonality = None
+
+    names = list(series.keys())
+    model = _fitted_model(np.column_stack([series[name] for name in names]), names, seasonality, fits, fit_key)
+    prediction, lower, upper = model.forecast(horizon, level)
+    slopes = model.slopes()
+
+    metrics = {}
+    for i, name in enumerate(names):
+        metrics[name] = {
+            "slope": round(float(slopes[i]), 4),
+            "trend": "up" if slopes[i] > 0 else "down",
+            "forecast": [round(float(v), 2) for v in prediction[:, i]],
+            "lower": [round(float(v), 2) for v in lower[:, i]],
+            "upper": [round(float(v), 2) for v in upper[:, i]],
+        }
 
-    # Treinar modelo
-    model = LinearRegression()
-    model.fit(X, y)
+    target = metrics[target_col]
+    dates = columns.get('date')
+    history = []
+    if dates is not None and include_history:
+        values = columns[target_col]
+        values = values.tolist() if isinstance(values, np.ndarray) else values
+        history = [{"date": d, "valor": v} for d, v in zip(dates, values)]
 
-    # Previsão próximo mês
-    next_idx = [[len(df)]]
-    prediction = model.predict(next_idx)[0]
-    
-    # Tendência
-    slope = model.coef_[0]
-    trend = "up" if slope > 0 else "down"
+    forecast = [
+        {"date": "Previsão" if step == 0 else f"Previsão +{step + 1}", "valor": value,
+         "lower": target["lower"][step], "upper": target["upper"][step]}
+        for step, value in enumerate(target["forecast"])
+    ]
 
-    return {
+    result = {
         "metric": target_col,
-        "next_month_value": round(float(prediction), 2),
-        "trend": trend,
+        "next_month_value": target["forecast"][0],
+        "trend": target["trend"],
         # Dados para o gráfico de previsão (Histórico + Futuro)
-        "history": df[['date', target_col]].rename(columns={target_col: 'valor'}).to_dict(orient='records') if 'date' in df.columns else [],
-        "forecast": [{"date": "Previsão", "valor": round(float(prediction), 2)}]
-    }
\ No newline at end of file
+        "history": history,
+        "forecast": forecast,
+        "metrics": metrics,
+    }
+    if not include_history:
+        del result["history"]
+    return result
@@ -0,0 +1,122 @@
+# src/services/cache.py
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class CacheEntry:
+    __slots__ = ("value", "size", "stored_at")
+
+    def __init__(self, value, size: int, stored_at: float):
+        self.value = value
+        self.size = size
+        self.stored_at = stored_at
+
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+
+class LRUCache:
+    """
+    Cache LRU em memória limitado pelo tamanho total (bytes) das entradas
+    e/ou pelo número de entradas (`max_items`). Com `ttl`, `get` ignora entradas mais velhas que o TTL; `lookup` devolve
+    a entrada mesmo expirada, para quem quiser revalidá-la.
+    """
+
+    def __init__(self, max_bytes: int = None, ttl: float = None, max_items: int = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_items = max_items
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def lookup(self, key):
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return self.ttl is None or entry.age() < self.ttl
+
+    def get(self, key, default=None):
+        entry = self.lookup(key)
+        if entry is None or not self.is_fresh(entry):
+            self.misses += 1
+            return default
+        self.hits += 1
+        return entry.value
+
+    def set(self, key, value, size: int = 1, age: float = 0):
+        # `age`: idade (s) que o valor já tinha ao chegar, descontada do TTL
+        self.delete(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Maior que o cache inteiro: não vale a pena guardar
+            return
+        self._data[key] = CacheEntry(value, size, time.monotonic() - age)
+        self.current_bytes += size
+        self._evict()
+
+    def touch(self, key):
+        entry = self._data.get(key)
+        if entry is not None:
+            entry.stored_at = time.monotonic()
+            self._data.move_to_end(key)
+
+    def delete(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+        return entry
+
+    def clear(self):
+        self._data.clear()
+        self.current_bytes = 0
+
+    def _evict(self):
+        while self._data and (
+            (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+            or (self.max_items is not None and len(self._data) > self.max_items)
+        ):
+            _, entry = self._data.popitem(last=False)
+            self.current_bytes -= entry.size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "max_items": self.max_items,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes com a mesma chave: só a primeira executa
+    `fn`, as demais aguardam o mesmo resultado.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._inflight = {}
+
+    async def do(self, key, fn):
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: o cancelamento de um chamador não derruba os demais
+        return await asyncio.shield(task)
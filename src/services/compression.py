@@ -0,0 +1,53 @@
+# src/services/compression.py
+import gzip
+
+from src.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, só gzip
+    brotli = None
+
+# Preferência do servidor: só desempata codificações com o mesmo q
+_PREFERENCE = ("br", "gzip")
+
+
+def accepted_encodings(accept_encoding: str) -> dict:
+    """{codificação: q} a partir do cabeçalho Accept-Encoding."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: str, size: int):
+    """Codificação suportada com o maior q no Accept-Encoding ("br", "gzip") ou None."""
+    if size < settings.COMPRESSION_MIN_BYTES:
+        return None
+    accepted = accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0)
+    best, best_q = None, 0.0
+    for coding in _PREFERENCE:
+        if coding == "br" and brotli is None:
+            continue
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.BROTLI_QUALITY)
+    # mtime fixo: mesmo conteúdo, mesmos bytes (a ETag forte continua válida)
+    return gzip.compress(body, compresslevel=settings.GZIP_LEVEL, mtime=0)
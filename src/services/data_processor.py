@@ -1,43 +1,205 @@
-import pandas as pd
+import re
+import unicodedata
+from functools import lru_cache
+from src.services.timeseries import aggregate, bucket_dates, bucket_labels, lttb_indices, parse_dates
+from src.services.lazy import numpy as np
+
+# Colunas de data/período: mantidas como vieram da planilha
+DATE_COLUMNS = ('date', 'data', 'mes_ano', 'mes')
+# Colunas de categoria (texto) usadas no filtro por `categories`
+CATEGORY_COLUMNS = ('categoria', 'category', 'canal')
+NON_NUMERIC_COLUMNS = DATE_COLUMNS + CATEGORY_COLUMNS
+
+@lru_cache(maxsize=4096)
+def normalize_col(col):
+    # Normalização de nomes de colunas
+    # Remove acentos
+    nfkd_form = unicodedata.normalize('NFKD', str(col))
+    col_ascii = "".join([c for c in nfkd_form if not unicodedata.combining(c)])
+    # Lowercase
+    col_clean = col_ascii.lower()
+    # Remove preposições comuns para padronizar chaves
+    for ignore in [' de ', ' do ', ' da ', ' dos ', ' das ']:
+        col_clean = col_clean.replace(ignore, ' ')
+    # Substitui espaços por _
+    return col_clean.strip().replace(' ', '_')
+
+@lru_cache(maxsize=4096)
+def category_key(value):
+    # Hífen, _ e espaço não diferenciam categorias: o frontend manda
+    # "google-ads"/"email"; a planilha traz "Google Ads", "google_ads", "E-mail"
+    return re.sub(r'[-_]', '', normalize_col(value))
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+def coerce_numeric(values) -> "np.ndarray":
+    """
+    Equivalente vetorizado de pd.to_numeric(values, errors='coerce').fillna(0).
+    Colunas só com inteiros continuam inteiras.
+    """
+    arr = np.asarray(values)
+    kind = arr.dtype.kind
+    if kind in 'iub':
+        return arr.astype(np.int64)
+    if kind != 'f':
+        try:
+            # Strings numéricas convertem em uma única passada
+            arr = arr.astype(np.float64)
+        except (TypeError, ValueError):
+            # Células vazias ou texto: conversão elemento a elemento
+            arr = np.fromiter((_to_float(v) for v in values), dtype=np.float64, count=len(values))
+        missing = np.isnan(arr)
+        # Como no pandas: "12", "13" viram int64; basta uma célula vazia ou
+        # fracionária para a coluna ficar float64
+        if not missing.any() and np.all(np.abs(arr) < 2 ** 63) and np.all(arr == np.floor(arr)):
+            return arr.astype(np.int64)
+        arr[missing] = 0
+        return arr
+    arr = arr.copy()
+    arr[np.isnan(arr)] = 0
+    return arr
 
 class DataProcessor:
-    def process(self, raw_data: list, categories: list):
+    """
+    Processa os registros da planilha em formato colunar (NumPy), sem montar
+    um DataFrame. `layout` define o formato da timeline na resposta:
+    "records" (lista de linhas, padrão) ou "columns" ({coluna: [valores]}).
+
+    Opcionalmente a timeline é agregada por período (`granularity` =
+    day/week/month, com `aggregation` = sum/mean/count/min/max) e reduzida
+    a no máximo `max_points` pontos (LTTB). Os KPIs sempre usam as linhas
+    filtradas, antes da agregação.
+    """
+
+    def process(self, raw_data, categories: list, layout: str = "records",
+                granularity: str = None, aggregation: str = "sum", max_points: int = None):
         if not raw_data:
             return {}
 
-        df = pd.DataFrame(raw_data)
-        
-        # Normalização de nomes de colunas
-        def normalize_col(col):
-            import unicodedata
-            # Remove acentos
-            nfkd_form = unicodedata.normalize('NFKD', col)
-            col_ascii = "".join([c for c in nfkd_form if not unicodedata.combining(c)])
-            # Lowercase
-            col_clean = col_ascii.lower()
-            # Remove preposições comuns para padronizar chaves
-            for ignore in [' de ', ' do ', ' da ', ' dos ', ' das ']:
-                col_clean = col_clean.replace(ignore, ' ')
-            # Substitui espaços por _
-            return col_clean.strip().replace(' ', '_')
-
-        df.columns = [normalize_col(c) for c in df.columns]
-
-        # Garantir que colunas numéricas sejam números
-        for col in df.columns:
-            if col not in ['date', 'mes', 'data', 'mes_ano']:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        columns, summary = self.build(raw_data, categories, granularity, aggregation, max_points)
 
         # Preparar resposta
         result = {}
-        
-        # Adicionar timeline completa
-        result['timeline'] = df.to_dict(orient='records')
-        
-        # Calcular KPIs Totais (Médias/Somas)
-        # Aqui você poderia filtrar por categorias se a planilha tiver coluna 'categoria'
-        # Como exemplo, retornamos a média de tudo
-        summary = df.mean(numeric_only=True).to_dict()
+
+        # Adicionar timeline
+        result['timeline'] = self.timeline(columns, layout)
+
+        # KPIs Totais (médias das linhas filtradas)
         result.update(summary)
 
         return result
+
+    def build(self, raw_data, categories: list, granularity: str = None,
+              aggregation: str = "sum", max_points: int = None):
+        """
+        Retorna (colunas da timeline, KPIs) já filtrados/agregados. `raw_data`
+        são os registros da planilha ou as colunas já convertidas (to_columns),
+        como as abertas do store de snapshots.
+        """
+        columns = raw_data if isinstance(raw_data, dict) else self.to_columns(raw_data)
+        columns = self.filter_categories(columns, categories)
+        summary = self.summary(columns)
+        if granularity:
+            columns = self.aggregate(columns, granularity, aggregation)
+        if max_points:
+            columns = self.downsample(columns, max_points)
+        return columns, summary
+
+    def filter_categories(self, columns: dict, categories: list) -> dict:
+        category_col = next((c for c in CATEGORY_COLUMNS if c in columns), None)
+        if not category_col or not categories:
+            return columns
+
+        wanted = {category_key(c) for c in categories}
+        values = columns[category_col]
+        mask = np.fromiter((category_key(v) in wanted for v in values), dtype=bool, count=len(values))
+        return {name: self._take(values, mask) for name, values in columns.items()}
+
+    def aggregate(self, columns: dict, granularity: str, how: str) -> dict:
+        date_col = next((c for c in DATE_COLUMNS if c in columns), None)
+        if date_col is None:
+            return columns
+
+        buckets = bucket_dates(parse_dates(columns[date_col]), granularity)
+        valid = ~np.isnat(buckets)
+        series = {
+            name: values[valid] for name, values in columns.items()
+            if isinstance(values, np.ndarray)
+        }
+        keys, aggregated = aggregate(buckets[valid], series, how)
+
+        result = {date_col: bucket_labels(keys, granularity)}
+        result.update(aggregated)
+        return result
+
+    def downsample(self, columns: dict, max_points: int) -> dict:
+        series = [values for values in columns.values() if isinstance(values, np.ndarray)]
+        if not series or self.row_count(columns) <= max_points:
+            return columns
+
+        indices = lttb_indices(series, max_points)
+        return {name: self._take(values, indices) for name, values in columns.items()}
+
+    def _take(self, values, selector):
+        if isinstance(values, np.ndarray):
+            return values[selector]
+        if selector.dtype == bool:
+            return [v for v, keep in zip(values, selector) if keep]
+        return [values[i] for i in selector]
+
+    def to_columns(self, raw_data: list) -> dict:
+        # get_all_records devolve o mesmo cabeçalho em todas as linhas
+        headers = list(raw_data[0].keys())
+        columns = {}
+        for header in headers:
+            values = [row.get(header) for row in raw_data]
+            name = normalize_col(header)
+            if name in NON_NUMERIC_COLUMNS:
+                columns[name] = values
+            else:
+                # Garantir que colunas numéricas sejam números
+                columns[name] = coerce_numeric(values)
+        return columns
+
+    def summary(self, columns: dict) -> dict:
+        # Filtro sem correspondência: nenhum KPI (a média vazia seria NaN -> null)
+        if self.row_count(columns) == 0:
+            return {}
+        summary = {}
+        for name, values in columns.items():
+            if name in NON_NUMERIC_COLUMNS:
+                continue
+            if not isinstance(values, np.ndarray):
+                values = np.asarray(values)
+                if values.dtype.kind not in 'iuf':
+                    continue
+            summary[name] = float(values.mean())
+        return summary
+
+    def iter_timeline(self, columns: dict, chunk_size: int):
+        """
+        Gera a timeline em blocos de `chunk_size` registros, sem materializar
+        todas as linhas de uma vez (usado no modo streaming).
+        """
+        n_rows = self.row_count(columns)
+        for start in range(0, n_rows, chunk_size):
+            chunk = {name: values[start:start + chunk_size] for name, values in columns.items()}
+            yield self.timeline(chunk)
+
+    def row_count(self, columns: dict) -> int:
+        return len(next(iter(columns.values()))) if columns else 0
+
+    def timeline(self, columns: dict, layout: str = "records"):
+        if layout == "columns":
+            # Arrays vão direto para o serializador (orjson escreve numpy nativamente)
+            return dict(columns)
+        lists = {
+            name: values.tolist() if isinstance(values, np.ndarray) else values
+            for name, values in columns.items()
+        }
+        names = list(lists.keys())
+        return [dict(zip(names, row)) for row in zip(*lists.values())]
@@ -0,0 +1,42 @@
+# src/services/executor.py
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from src.config import settings
+
+# Pool dedicado ao trabalho bloqueante do dashboard (gspread, Pandas, previsão),
+# separado do pool padrão do asyncio usado pelo resto da aplicação.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.DASHBOARD_MAX_WORKERS,
+    thread_name_prefix="dashboard-worker",
+)
+
+# Limita quantas tarefas podem estar rodando ou enfileiradas no pool ao mesmo tempo
+_slots = asyncio.Semaphore(settings.DASHBOARD_MAX_CONCURRENCY)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Executa uma função síncrona no pool dedicado sem bloquear o event loop.
+
+    O slot só é liberado quando a thread termina de fato, mesmo que quem
+    aguardava tenha sido cancelado por timeout; assim o pool nunca acumula
+    mais trabalho do que DASHBOARD_MAX_CONCURRENCY.
+    """
+    await _slots.acquire()
+    try:
+        loop = asyncio.get_running_loop()
+        # Propaga os contextvars (ex: medições da requisição) para a thread
+        context = contextvars.copy_context()
+        future = loop.run_in_executor(_executor, partial(context.run, func, *args, **kwargs))
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return await asyncio.shield(future)
+
+
+def shutdown_executor():
+    _executor.shutdown(wait=False, cancel_futures=True)
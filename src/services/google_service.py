@@ -1,7 +1,31 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from src.config import settings
+from src.services.admission import UpstreamBackoff, UpstreamThrottled, store as admission_store
+from src.services.cache import LRUCache
+from src.services.lazy import gspread, service_account
+from src.services.metrics import timed
+from src.services.data_processor import NON_NUMERIC_COLUMNS, normalize_col
 import os
+import threading
+
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files/{}"
+
+def _column_letter(index: int) -> str:
+    # 1 -> A, 27 -> AA
+    return gspread.utils.rowcol_to_a1(1, index)[:-1]
+
+def _quote_title(title: str) -> str:
+    return "'" + title.replace("'", "''") + "'"
+
+class WorksheetNotFound(LookupError):
+    """A aba pedida não existe na planilha (erro do cliente, não cai nos dados simulados)."""
+
+
+def _retry_after(response):
+    # Retry-After em segundos; datas HTTP são ignoradas (fica o backoff)
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
 
 class GoogleSheetService:
     def __init__(self):
@@ -11,16 +35,35 @@ class GoogleSheetService:
         ]
         self.creds_path = settings.CREDENTIALS_PATH
         self.client = None
+        # Um único cliente autenticado, compartilhado pelas threads do pool
+        self._auth_lock = threading.Lock()
+        # Planilhas já abertas (metadados + títulos das abas), por id
+        self._spreadsheets = LRUCache(
+            max_items=settings.GOOGLE_METADATA_CACHE_MAX_ENTRIES,
+            ttl=settings.GOOGLE_METADATA_CACHE_TTL_SECONDS,
+        )
+        self._spreadsheets_lock = threading.Lock()
+        # Cota da API: após um 429, ninguém (nem outros workers, com Redis) chama o Google por um tempo
+        self.backoff = UpstreamBackoff(
+            admission_store, "google", settings.GOOGLE_BACKOFF_BASE_SECONDS, settings.GOOGLE_BACKOFF_MAX_SECONDS
+        )
 
     def _authenticate(self):
+        with self._auth_lock:
+            if self.client:
+                return self.client
+            return self._authorize()
+
+    def _authorize(self):
         # 1. Tenta carregar do ENV (Melhor para Render/Cloud)
         json_creds = os.getenv("GOOGLE_CREDENTIALS_JSON")
         if json_creds:
             import json
             try:
                 creds_dict = json.loads(json_creds)
-                creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, self.scope)
+                creds = service_account.ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, self.scope)
                 self.client = gspread.authorize(creds)
+                self._configure_client()
                 return self.client
             except Exception as e:
                 print(f"Erro ao carregar credenciais do ENV: {e}")
@@ -31,25 +74,208 @@ class GoogleSheetService:
             print(f"⚠️ Aviso: Arquivo {self.creds_path} não encontrado e GOOGLE_CREDENTIALS_JSON não definido.")
             return None
             
-        creds = ServiceAccountCredentials.from_json_keyfile_name(self.creds_path, self.scope)
+        creds = service_account.ServiceAccountCredentials.from_json_keyfile_name(self.creds_path, self.scope)
         self.client = gspread.authorize(creds)
+        self._configure_client()
         return self.client
 
-    def get_sheet_data(self, spreadsheet_url: str):
-        if not self.client:
-            if not self._authenticate():
-                # Retorna dados simulados se falhar auth
-                return self._get_mock_data()
+    def _configure_client(self):
+        # Evita que uma planilha lenta prenda uma thread do pool indefinidamente
+        if hasattr(self.client, "set_timeout"):
+            self.client.set_timeout(settings.GOOGLE_HTTP_TIMEOUT)
 
+        # Conexões keep-alive suficientes para todas as threads do pool
+        # (gspread >= 6 guarda a sessão em client.http_client)
+        session = getattr(getattr(self.client, "http_client", self.client), "session", None)
+        if session is not None:
+            from requests.adapters import HTTPAdapter
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings.DASHBOARD_MAX_WORKERS)
+            session.mount("https://", adapter)
+
+    def get_sheet_data(self, spreadsheet_url: str, worksheet: int = 0):
         try:
-            sheet = self.client.open_by_url(spreadsheet_url)
-            worksheet = sheet.get_worksheet(0) # Pega a primeira aba
-            records = worksheet.get_all_records()
-            return records
+            return self.fetch_records(spreadsheet_url, worksheet)
         except Exception as e:
             print(f"Erro ao acessar Google Sheets: {e}")
             return self._get_mock_data()
 
+    def fetch_records(self, spreadsheet_url: str, worksheet: int = 0, columns=None, rows=None):
+        """
+        Igual a get_sheet_data, mas propaga o erro em vez de cair nos dados simulados.
+        Com `columns` (nomes normalizados) e/ou `rows` ((primeira, última) linha
+        de dados, 1-based), busca só esse recorte da aba.
+        """
+        return self.fetch_many(spreadsheet_url, [worksheet], columns, rows)[worksheet]
+
+    def fetch_many(self, spreadsheet_url: str, worksheets: list, columns=None, rows=None) -> dict:
+        """
+        Lê várias abas da mesma planilha em lote: uma chamada para os
+        cabeçalhos e uma para os dados de todas as abas. Retorna
+        {aba: registros}, no mesmo formato de get_all_records.
+        """
+        with timed("google"):
+            try:
+                return self._guarded(self._fetch_many, spreadsheet_url, worksheets, columns, rows)
+            except gspread.exceptions.APIError:
+                # Abas podem ter sido renomeadas: relê os metadados uma vez
+                with self._spreadsheets_lock:
+                    self._spreadsheets.delete(gspread.utils.extract_id_from_url(spreadsheet_url))
+                return self._guarded(self._fetch_many, spreadsheet_url, worksheets, columns, rows)
+
+    def _guarded(self, fn, *args):
+        """
+        Chama a API respeitando o backoff de cota: durante o bloqueio (ou
+        ao receber 429) levanta UpstreamThrottled sem tocar no Google.
+        """
+        remaining = self.backoff.remaining()
+        if remaining > 0:
+            raise UpstreamThrottled("Cota da API do Google esgotada; tente novamente em instantes.", remaining)
+        try:
+            result = fn(*args)
+        except gspread.exceptions.APIError as e:
+            if self._is_throttled(e):
+                delay = self.backoff.throttled(_retry_after(e.response))
+                raise UpstreamThrottled("Cota da API do Google esgotada; tente novamente em instantes.", delay) from e
+            raise
+        self.backoff.succeeded()
+        return result
+
+    @staticmethod
+    def _is_throttled(error) -> bool:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        return status == 429 or getattr(error, "code", None) == 429
+
+    def _fetch_many(self, spreadsheet_url, worksheets, columns, rows):
+        sheet, titles = self._titles(spreadsheet_url, worksheets)
+
+        if not columns and not rows:
+            # Abas inteiras: cabeçalho e dados na mesma chamada
+            value_ranges = sheet.values_batch_get([_quote_title(titles[ws]) for ws in worksheets])["valueRanges"]
+            result = {}
+            for ws, vr in zip(worksheets, value_ranges):
+                grid = vr.get("values") or [[]]
+                header_row = grid[0]
+                column_values = {
+                    i: [row[i - 1] if i - 1 < len(row) else "" for row in grid[1:]]
+                    for i, header in enumerate(header_row, start=1) if header
+                }
+                result[ws] = self._to_records(header_row, column_values)
+            return result
+
+        header_ranges = [f"{_quote_title(titles[ws])}!1:1" for ws in worksheets]
+        header_values = sheet.values_batch_get(header_ranges)["valueRanges"]
+        headers = {ws: (vr.get("values") or [[]])[0] for ws, vr in zip(worksheets, header_values)}
+
+        first_row = (rows[0] if rows else 1) + 1  # +1: a linha 1 é o cabeçalho
+        last_row = rows[1] + 1 if rows and rows[1] else ""
+        wanted = {normalize_col(c) for c in columns} | set(NON_NUMERIC_COLUMNS) if columns else None
+
+        plan, data_ranges = {}, []
+        for ws in worksheets:
+            indices = [
+                i for i, header in enumerate(headers[ws], start=1)
+                if header and (wanted is None or normalize_col(header) in wanted)
+            ]
+            plan[ws] = []
+            for run in self._contiguous_runs(indices):
+                plan[ws].append(run)
+                data_ranges.append(
+                    f"{_quote_title(titles[ws])}!{_column_letter(run[0])}{first_row}:{_column_letter(run[-1])}{last_row}"
+                )
+
+        values = sheet.values_batch_get(data_ranges)["valueRanges"] if data_ranges else []
+        value_iter = iter(values)
+
+        result = {}
+        for ws in worksheets:
+            column_values = {}
+            for run in plan[ws]:
+                block = next(value_iter).get("values", [])
+                for offset, index in enumerate(run):
+                    column_values[index] = [row[offset] if offset < len(row) else "" for row in block]
+            result[ws] = self._to_records(headers[ws], column_values)
+        return result
+
+    def _to_records(self, header_row, column_values):
+        # A API omite linhas/células vazias no fim: completa com ""
+        n_rows = max((len(v) for v in column_values.values()), default=0)
+        names = [(header_row[index - 1], values) for index, values in column_values.items()]
+        numericise = gspread.utils.numericise
+        records = []
+        for r in range(n_rows):
+            records.append({
+                name: numericise(values[r]) if r < len(values) else ""
+                for name, values in names
+            })
+        return records
+
+    def _contiguous_runs(self, indices):
+        runs = []
+        for index in indices:
+            if runs and runs[-1][-1] == index - 1:
+                runs[-1].append(index)
+            else:
+                runs.append([index])
+        return runs
+
+    def _open(self, spreadsheet_url: str, refresh: bool = False):
+        """(planilha, títulos das abas), dos metadados em cache ou da API."""
+        if not self.client:
+            if not self._authenticate():
+                raise RuntimeError("Credenciais do Google indisponíveis")
+
+        key = gspread.utils.extract_id_from_url(spreadsheet_url)
+        with self._spreadsheets_lock:
+            cached = None if refresh else self._spreadsheets.get(key)
+        if cached is None:
+            sheet = self.client.open_by_key(key)
+            cached = (sheet, [ws.title for ws in sheet.worksheets()])
+            with self._spreadsheets_lock:
+                self._spreadsheets.set(key, cached)
+        return cached
+
+    def _titles(self, spreadsheet_url: str, worksheets: list):
+        """(planilha, {aba: título}); levanta WorksheetNotFound para índices inexistentes."""
+        sheet, titles = self._open(spreadsheet_url)
+        if any(not 0 <= ws < len(titles) for ws in worksheets):
+            # Aba criada depois da última leitura dos metadados: relê uma vez
+            sheet, titles = self._open(spreadsheet_url, refresh=True)
+        missing = [ws for ws in worksheets if not 0 <= ws < len(titles)]
+        if missing:
+            raise WorksheetNotFound(f"A planilha tem {len(titles)} aba(s); aba {missing[0]} não encontrada.")
+        return sheet, {ws: titles[ws] for ws in worksheets}
+
+    def get_modified_time(self, spreadsheet_url: str):
+        """
+        Retorna o `modifiedTime` do arquivo no Drive (usado como versão da
+        planilha) ou None se não for possível consultá-lo.
+        """
+        if not self.client:
+            if not self._authenticate():
+                return None
+
+        try:
+            file_id = gspread.utils.extract_id_from_url(spreadsheet_url)
+            # gspread >= 6 expõe as requisições em client.http_client
+            http = getattr(self.client, "http_client", self.client)
+            with timed("google_version"):
+                response = self._guarded(
+                    http.request,
+                    "get",
+                    DRIVE_FILES_URL.format(file_id),
+                    {"fields": "modifiedTime", "supportsAllDrives": True},
+                )
+            return response.json().get("modifiedTime")
+        except UpstreamThrottled:
+            # Sem versão: quem chamou tenta baixar e recebe o mesmo bloqueio
+            return None
+        except Exception as e:
+            print(f"Erro ao consultar versão da planilha: {e}")
+            return None
+
+    def get_mock_data(self):
+        return self._get_mock_data()
+
     def _get_mock_data(self):
         # Dados de fallback para teste
         return [
@@ -0,0 +1,45 @@
+# src/services/lazy.py
+import importlib
+
+# Módulos pesados registrados para pré-carregamento (numpy, gspread, ...)
+_registry = []
+
+
+class LazyModule:
+    """
+    Módulo importado só no primeiro acesso a um atributo.
+
+    Mantém numpy, gspread e oauth2client fora do boot da API: o processo
+    atende /api/auth logo ao subir e paga o import no primeiro dashboard
+    (ou antes, se `preload_modules` rodar em segundo plano).
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        _registry.append(self)
+
+    def load(self):
+        if self._module is None:
+            # import_module já é protegido pelo lock de import do Python
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def preload_modules():
+    """Importa todos os módulos adiados (para rodar fora do event loop)."""
+    for module in _registry:
+        module.load()
+
+
+# Dependências pesadas da camada de análise/planilhas
+numpy = LazyModule("numpy")
+gspread = LazyModule("gspread")
+service_account = LazyModule("oauth2client.service_account")
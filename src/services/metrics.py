@@ -0,0 +1,193 @@
+# src/services/metrics.py
+import bisect
+import contextvars
+import time
+from contextlib import nullcontext
+
+# Limites (s) dos buckets, no estilo Prometheus
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """
+    Histograma com rótulos, exposto no formato texto do Prometheus.
+
+    Só é atualizado e lido no event loop (middleware e /metrics), então não
+    precisa de lock.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: tuple, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # rótulos -> [contagem por bucket (+Inf no fim), soma, total]
+        self._series = {}
+
+    def observe(self, seconds: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, seconds)] += 1
+        series[1] += seconds
+        series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            base = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels))
+            prefix = base + "," if base else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_SECONDS = Histogram(
+    "dashmaster_request_duration_seconds",
+    "Latência das requisições HTTP.",
+    ("method", "route", "status"),
+)
+STAGE_SECONDS = Histogram(
+    "dashmaster_stage_duration_seconds",
+    "Tempo por etapa dentro de uma requisição (soma das ocorrências).",
+    ("route", "stage"),
+)
+
+
+def render_metrics() -> str:
+    return "\n".join(REQUEST_SECONDS.render() + STAGE_SECONDS.render()) + "\n"
+
+
+class RequestTimings:
+    """Etapas medidas durante uma requisição (inclusive em threads do pool)."""
+
+    __slots__ = ("entries",)
+
+    def __init__(self):
+        # list.append é atômico: threads do pool e o event loop registram sem lock
+        self.entries = []
+
+    def add(self, stage: str, seconds: float):
+        self.entries.append((stage, seconds))
+
+    def totals(self) -> dict:
+        """{etapa: (segundos somados, ocorrências)}, na ordem da primeira ocorrência."""
+        totals = {}
+        for stage, seconds in list(self.entries):
+            total, count = totals.get(stage, (0.0, 0))
+            totals[stage] = (total + seconds, count + 1)
+        return totals
+
+    def header(self, total_seconds: float) -> str:
+        parts = []
+        for stage, (seconds, count) in self.totals().items():
+            part = f"{stage};dur={seconds * 1000:.1f}"
+            if count > 1:
+                part += f';desc="{count}x"'
+            parts.append(part)
+        parts.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(parts)
+
+
+# Timings da requisição em andamento; None fora do middleware (ou desligado)
+_current = contextvars.ContextVar("request_timings", default=None)
+_NULL_TIMER = nullcontext()
+
+
+class _Timer:
+    __slots__ = ("timings", "stage", "start")
+
+    def __init__(self, timings, stage):
+        self.timings = timings
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.add(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def timed(stage: str):
+    """
+    `with timed("process"): ...` mede a etapa na requisição atual.
+    Sem middleware ativo é um no-op (só uma leitura de ContextVar).
+    """
+    timings = _current.get()
+    if timings is None:
+        return _NULL_TIMER
+    return _Timer(timings, stage)
+
+
+def record(stage: str, seconds: float):
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+def _route_label(scope, status: int) -> str:
+    """
+    Caminho com os parâmetros no lugar dos valores (/api/projects/{project_id}),
+    para não criar uma série por id.
+    """
+    if scope.get("route") is None:
+        # Sem rota da API: arquivos estáticos do frontend ou 404
+        return "unmatched" if status == 404 else "static"
+    values = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    segments = scope["path"].split("/")
+    return "/".join("{%s}" % values[segment] if segment in values else segment for segment in segments)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: mede cada requisição, devolve as etapas no cabeçalho
+    Server-Timing e alimenta os histogramas de /metrics. Com `profiler`,
+    amostra as pilhas e registra as requisições acima do limite.
+    """
+
+    def __init__(self, app, profiler=None):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        samples = self.profiler.begin() if self.profiler else None
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Em respostas em streaming, só entram as etapas concluídas até aqui
+                header = timings.header(time.perf_counter() - start).encode("latin-1")
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - start
+            route = _route_label(scope, status)
+            REQUEST_SECONDS.observe(elapsed, scope["method"], route, str(status))
+            for stage, (seconds, _) in timings.totals().items():
+                STAGE_SECONDS.observe(seconds, route, stage)
+            if samples is not None:
+                self.profiler.end(samples, elapsed, f"{scope['method']} {scope['path']}")
@@ -0,0 +1,94 @@
+# src/services/profiler.py
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+profile_logger = logging.getLogger("dashmaster.profile")
+
+# Pilhas de threads ociosas (pool esperando trabalho, event loop no select)
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+    # thread de conexão do aiosqlite esperando a próxima query
+    ("core.py", "_connection_worker_thread"),
+}
+MAX_DEPTH = 40
+
+
+def _collapse(frame) -> str:
+    """Pilha no formato "collapsed" (raiz;...;folha) usado por flamegraphs."""
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SlowRequestProfiler:
+    """
+    Profiler por amostragem para requisições lentas.
+
+    Enquanto houver requisições em andamento, uma thread amostra as pilhas
+    de todas as threads a cada `interval_ms`. Cada requisição acumula as
+    amostras do seu período; ao terminar acima de `threshold_ms`, as pilhas
+    mais frequentes vão para o logger dashmaster.profile. Sem requisições
+    em andamento a thread fica parada.
+    """
+
+    def __init__(self, threshold_ms: float, interval_ms: float = 5, top: int = 15):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.top = top
+        # id(amostras) -> Counter de cada requisição em andamento
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def begin(self) -> Counter:
+        samples = Counter()
+        with self._lock:
+            self._buffers[id(samples)] = samples
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return samples
+
+    def end(self, samples: Counter, elapsed: float, label: str):
+        with self._lock:
+            self._buffers.pop(id(samples), None)
+            if not self._buffers:
+                self._wakeup.clear()
+
+        if elapsed < self.threshold or not samples:
+            return
+        lines = [f"{count} {stack}" for stack, count in samples.most_common(self.top)]
+        profile_logger.warning(
+            "Requisição lenta %s (%.0f ms, %d amostras):\n%s",
+            label, elapsed * 1000, sum(samples.values()), "\n".join(lines),
+        )
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            self._wakeup.wait()
+            time.sleep(self.interval)
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+                    continue
+                stacks.append(_collapse(frame))
+            with self._lock:
+                buffers = list(self._buffers.values())
+            for samples in buffers:
+                samples.update(stacks)
@@ -0,0 +1,198 @@
+# src/services/scheduler.py
+import asyncio
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.future import select
+
+from src.config import settings
+from src.models import Project, SchedulerLease
+
+# Valores aceitos em REFRESH_MODE
+REFRESH_MODES = ("leader", "inprocess", "disabled")
+_LEASE_NAME = "project_refresher"
+
+
+class ProjectRefresher:
+    """
+    Atualiza periodicamente os dashboards dos projetos ativos e não
+    arquivados, para que o primeiro usuário não pague o custo completo
+    (Google + processamento + previsão).
+
+    `refresh` é a corrotina que faz o trabalho de um projeto (recebe a linha
+    com id, spreadsheet_url, categories e settings); o agendador só cuida de
+    quando e quantos rodam: intervalo por projeto com jitter, concorrência
+    limitada e backoff exponencial em caso de erro.
+
+    Com `lease`, todos os workers rodam o laço mas só o que detém o lease
+    na tabela scheduler_leases atualiza; os demais assumem quando ele
+    expira (worker morto) ou é liberado (shutdown). O líder renova o lease
+    durante a rodada; se mesmo assim o perder, a rodada é cancelada.
+    """
+
+    def __init__(self, session_factory, refresh, interval: float = None,
+                 concurrency: int = None, jitter: float = None,
+                 max_backoff: float = None, tick: float = None,
+                 lease: bool = False, lease_seconds: float = None):
+        self.session_factory = session_factory
+        self.refresh = refresh
+        self.interval = interval if interval is not None else settings.REFRESH_INTERVAL_SECONDS
+        self.jitter = jitter if jitter is not None else settings.REFRESH_JITTER
+        self.max_backoff = max_backoff if max_backoff is not None else settings.REFRESH_MAX_BACKOFF_SECONDS
+        self.tick = tick if tick is not None else settings.REFRESH_TICK_SECONDS
+        self._slots = asyncio.Semaphore(concurrency or settings.REFRESH_CONCURRENCY)
+        self._schedule = {}  # project_id -> (próxima execução, falhas consecutivas)
+        self._task = None
+        self.lease = lease
+        self.lease_seconds = lease_seconds if lease_seconds is not None else settings.REFRESH_LEASE_SECONDS
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            if self.lease:
+                await self.release_lease()
+
+    async def _loop(self):
+        while True:
+            try:
+                if await self.hold_lease():
+                    await self._run_leading()
+            except Exception as e:
+                print(f"Erro no agendador de dashboards: {e}")
+            await asyncio.sleep(self.tick)
+
+    async def hold_lease(self) -> bool:
+        """Renova o lease (ou o toma, se expirou); True se este worker é o líder."""
+        if not self.lease:
+            return True
+        now = datetime.now(timezone.utc)
+        values = {"holder": self.holder, "expires_at": now + timedelta(seconds=self.lease_seconds)}
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == _LEASE_NAME,
+                    or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now),
+                )
+                .values(**values)
+            )
+            leader = result.rowcount == 1
+            if not leader:
+                existing = await session.execute(select(SchedulerLease.name).where(SchedulerLease.name == _LEASE_NAME))
+                if existing.first() is None:
+                    session.add(SchedulerLease(name=_LEASE_NAME, **values))
+                    leader = True
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Outro worker criou o lease ao mesmo tempo
+                await session.rollback()
+                leader = False
+        if not leader:
+            # Quem assumir monta a própria agenda; ao voltar, recomeça do zero
+            self._schedule.clear()
+        return leader
+
+    async def _run_leading(self):
+        """run_once renovando o lease enquanto ela durar (rodadas maiores que o lease)."""
+        if not self.lease:
+            return await self.run_once()
+        run = asyncio.create_task(self.run_once())
+        try:
+            while True:
+                done, _ = await asyncio.wait({run}, timeout=self.lease_seconds / 3)
+                if done:
+                    return run.result()
+                if not await self.hold_lease():
+                    print("Lease do agendador perdido durante a rodada; interrompendo")
+                    return
+        finally:
+            if not run.done():
+                run.cancel()
+                try:
+                    await run
+                except asyncio.CancelledError:
+                    pass
+
+    async def release_lease(self):
+        """Libera o lease no shutdown, para outro worker assumir no próximo tick."""
+        try:
+            async with self.session_factory() as session:
+                await session.execute(
+                    update(SchedulerLease)
+                    .where(SchedulerLease.name == _LEASE_NAME, SchedulerLease.holder == self.holder)
+                    .values(expires_at=datetime.now(timezone.utc))
+                )
+                await session.commit()
+        except Exception as e:
+            print(f"Erro ao liberar o lease do agendador: {e}")
+
+    async def run_once(self):
+        projects = await self._load_projects()
+        now = time.monotonic()
+
+        # Projetos novos entram com atraso aleatório para não atualizar todos juntos
+        for project in projects:
+            if project.id not in self._schedule:
+                delay = random.uniform(0, self._interval_for(project) * self.jitter)
+                self._schedule[project.id] = (now + delay, 0)
+
+        # Esquece projetos removidos, arquivados ou desativados
+        active_ids = {project.id for project in projects}
+        for project_id in list(self._schedule):
+            if project_id not in active_ids:
+                del self._schedule[project_id]
+
+        due = [project for project in projects if self._schedule[project.id][0] <= now]
+        await asyncio.gather(*(self._refresh_one(project) for project in due))
+
+    async def _load_projects(self):
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(Project.id, Project.spreadsheet_url, Project.categories, Project.settings)
+                .where(
+                    Project.is_active.isnot(False),
+                    Project.is_archived.isnot(True),
+                    Project.spreadsheet_url.isnot(None),
+                )
+            )
+            return result.all()
+
+    async def _refresh_one(self, project):
+        interval = self._interval_for(project)
+        async with self._slots:
+            try:
+                await asyncio.wait_for(self.refresh(project), settings.DASHBOARD_TIMEOUT_SECONDS)
+            except Exception as e:
+                failures = self._schedule.get(project.id, (0, 0))[1] + 1
+                delay = min(interval * 2 ** failures, self.max_backoff)
+                print(f"Falha ao atualizar projeto {project.id} ({failures}x): {e!r}")
+            else:
+                failures, delay = 0, interval
+        self._schedule[project.id] = (time.monotonic() + self._jittered(delay), failures)
+
+    def _interval_for(self, project) -> float:
+        project_settings = project.settings or {}
+        try:
+            return float(project_settings.get("refresh_interval") or self.interval)
+        except (TypeError, ValueError):
+            return self.interval
+
+    def _jittered(self, delay: float) -> float:
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
@@ -0,0 +1,42 @@
+# src/services/serialization.py
+import datetime
+import decimal
+
+import orjson
+from fastapi.responses import JSONResponse
+
+# numpy (escalares e arrays contíguos), datetime e NaN/Infinity (-> null) são
+# serializados nativamente pelo orjson; chaves não-str viram texto
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    # Arrays não contíguos, datetime64 e afins: numpy sabe se converter
+    # (verificado por atributo, sem importar numpy aqui)
+    tolist = getattr(obj, "tolist", None)
+    if tolist is not None:
+        return tolist()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, datetime.timedelta):
+        return obj.total_seconds()
+    # Modelos Pydantic (v2 e v1)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    if hasattr(obj, "dict"):
+        return obj.dict()
+    raise TypeError(f"Tipo não serializável em JSON: {type(obj).__name__}")
+
+
+def dumps(payload) -> bytes:
+    """Serializa direto para bytes UTF-8, sem passar pelo jsonable_encoder."""
+    return orjson.dumps(payload, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que serializa com `dumps` (orjson + tipos numpy)."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,278 @@
+# src/services/sheet_cache.py
+import hashlib
+import json
+
+from src.config import settings
+from src.services.admission import UpstreamThrottled
+from src.services.cache import LRUCache, SingleFlight
+from src.services.data_processor import DataProcessor
+from src.services.executor import run_blocking
+from src.services.google_service import WorksheetNotFound
+
+_processor = DataProcessor()
+
+
+class SheetSnapshot:
+    __slots__ = ("rows", "columns", "version", "digest", "size", "forecasts")
+
+    def __init__(self, rows: list, version: str = None):
+        self.rows = rows
+        self.columns = None
+        self.version = version  # modifiedTime do Drive (None se indisponível)
+        # Ajustes de previsão reaproveitáveis (só na cópia local; ver SheetSync)
+        self.forecasts = None
+        # Hash do conteúdo: identifica os dados para o cache de resultados
+        payload = json.dumps(rows, default=str, ensure_ascii=False).encode("utf-8")
+        self.digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+        self.size = len(payload)
+
+    @classmethod
+    def columnar(cls, columns: dict, version: str, digest: str, size: int) -> "SheetSnapshot":
+        # Aberto do store em disco: só as colunas (mmap), sem as linhas
+        snapshot = cls.__new__(cls)
+        snapshot.rows = None
+        snapshot.columns = columns
+        snapshot.version = version
+        snapshot.digest = digest
+        snapshot.size = size
+        snapshot.forecasts = None
+        return snapshot
+
+    @property
+    def data(self):
+        """Entrada do DataProcessor: as colunas do store ou as linhas."""
+        return self.columns if self.columns is not None else self.rows
+
+
+class SheetCache:
+    """
+    Cache dos dados brutos das planilhas, chaveado por (URL, aba, colunas,
+    intervalo de linhas).
+
+    - Entradas dentro do TTL são servidas direto da memória.
+    - Entradas expiradas são revalidadas pelo `modifiedTime` do Drive: se a
+      planilha não mudou, o download completo é evitado.
+    - Misses concorrentes para a mesma planilha geram um único download, e
+      várias abas da mesma planilha são baixadas numa única chamada.
+    - Com a cota do Google esgotada (UpstreamThrottled), entradas expiradas
+      continuam sendo servidas até o fim do backoff.
+    - Com `store` (ColumnarSnapshotStore), cada download vira um snapshot
+      colunar em disco, aberto com mmap por todos os workers: quem não tem a
+      planilha em memória usa o snapshot do disco dentro do TTL, ou depois
+      de revalidar a versão, sem baixar de novo.
+
+    `backend` precisa expor `fetch_many(url, worksheets, columns, rows)`,
+    `get_modified_time(url)` e `get_mock_data()` (ver GoogleSheetService).
+    """
+
+    def __init__(self, backend, ttl: float = None, max_bytes: int = None, store=None):
+        self.backend = backend
+        self.store = store
+        self._lru = LRUCache(
+            max_bytes=max_bytes if max_bytes is not None else settings.SHEET_CACHE_MAX_BYTES,
+            ttl=ttl if ttl is not None else settings.SHEET_CACHE_TTL_SECONDS,
+        )
+        self._flight = SingleFlight()
+        self.revalidations = 0
+        self.upstream_fetches = 0
+        self.stale_served = 0
+        self.shared_hits = 0
+
+    @staticmethod
+    def _key(spreadsheet_url, worksheet, columns=None, rows=None):
+        return (spreadsheet_url, worksheet, tuple(sorted(columns)) if columns else None, tuple(rows) if rows else None)
+
+    async def get_snapshot(self, spreadsheet_url: str, worksheet: int = 0, columns=None, rows=None) -> SheetSnapshot:
+        snapshots = await self.get_snapshots(spreadsheet_url, [worksheet], columns, rows)
+        return snapshots[worksheet]
+
+    def peek(self, spreadsheet_url: str, worksheet: int = 0, columns=None, rows=None):
+        """Snapshot em memória dentro do TTL, sem E/S (None se precisar buscar)."""
+        entry = self._lru.lookup(self._key(spreadsheet_url, worksheet, columns, rows))
+        if entry is not None and self._lru.is_fresh(entry):
+            return entry.value
+        return None
+
+    async def get_snapshots(self, spreadsheet_url: str, worksheets: list, columns=None, rows=None,
+                            force: bool = False) -> dict:
+        """Retorna {aba: snapshot}; abas ausentes/expiradas são buscadas juntas."""
+        result, pending = {}, []
+        for worksheet in worksheets:
+            entry = self._lru.lookup(self._key(spreadsheet_url, worksheet, columns, rows))
+            if entry is not None and not force and self._lru.is_fresh(entry):
+                self._lru.hits += 1
+                result[worksheet] = entry.value
+            else:
+                pending.append(worksheet)
+
+        if pending:
+            flight_key = (spreadsheet_url, tuple(pending), self._key(None, None, columns, rows))
+            fetched = await self._flight.do(
+                flight_key, lambda: self._refresh(spreadsheet_url, pending, columns, rows)
+            )
+            result.update(fetched)
+        return result
+
+    async def refresh(self, spreadsheet_url: str, worksheets=(0,), columns=None, rows=None) -> dict:
+        """Ignora o TTL e revalida/baixa as abas agora (usado no pré-aquecimento)."""
+        return await self.get_snapshots(spreadsheet_url, list(worksheets), columns, rows, force=True)
+
+    async def _refresh(self, spreadsheet_url, worksheets, columns, rows):
+        result = {}
+        if self.store is not None:
+            # Outro worker baixou a planilha há menos de um TTL: lê do disco
+            for worksheet in worksheets:
+                snapshot = await self._from_store(self._key(spreadsheet_url, worksheet, columns, rows))
+                if snapshot is not None:
+                    result[worksheet] = snapshot
+            worksheets = [worksheet for worksheet in worksheets if worksheet not in result]
+            if not worksheets:
+                return result
+
+        # Uma consulta de versão vale para todas as abas da planilha
+        version = await run_blocking(self.backend.get_modified_time, spreadsheet_url)
+
+        missing = []
+        for worksheet in worksheets:
+            key = self._key(spreadsheet_url, worksheet, columns, rows)
+            entry = self._lru.lookup(key)
+            if entry is not None and version is not None and version == entry.value.version:
+                # Aba inalterada desde o último download
+                self.revalidations += 1
+                self._lru.hits += 1
+                self._lru.touch(key)
+                if self.store is not None and entry.value.columns is not None:
+                    await run_blocking(self._revalidate_stored, key, version)
+                result[worksheet] = entry.value
+                continue
+            snapshot = None
+            if self.store is not None and version is not None:
+                snapshot = await self._from_store(key, version)
+            if snapshot is not None:
+                # Inalterada desde o download de outro worker
+                self.revalidations += 1
+                result[worksheet] = snapshot
+            else:
+                self._lru.misses += 1
+                missing.append(worksheet)
+
+        if not missing:
+            return result
+
+        try:
+            fetched = await run_blocking(
+                self.backend.fetch_many, spreadsheet_url, missing, columns=columns, rows=rows
+            )
+        except UpstreamThrottled:
+            # Cota do Google esgotada: serve a versão expirada, se houver, em vez
+            # de dados simulados; sem ela, o 429 chega ao cliente
+            stale = {}
+            for ws in missing:
+                key = self._key(spreadsheet_url, ws, columns, rows)
+                entry = self._lru.lookup(key)
+                stale[ws] = entry.value if entry is not None else await self._stale_from_store(key)
+            if any(snapshot is None for snapshot in stale.values()):
+                raise
+            self.stale_served += len(stale)
+            result.update(stale)
+            return result
+        except WorksheetNotFound:
+            # Erro do pedido: dados simulados esconderiam o problema
+            raise
+        except Exception as e:
+            # Mantém o comportamento antigo (dados simulados), mas sem cachear
+            print(f"Erro ao acessar Google Sheets: {e}")
+            mock = SheetSnapshot(self.backend.get_mock_data())
+            result.update({worksheet: mock for worksheet in missing})
+            return result
+
+        self.upstream_fetches += 1
+        for worksheet in missing:
+            key = self._key(spreadsheet_url, worksheet, columns, rows)
+            snapshot = await run_blocking(SheetSnapshot, fetched[worksheet], version)
+            if self.store is not None and snapshot.rows:
+                snapshot = await run_blocking(self._store_snapshot, key, snapshot)
+            self._lru.set(key, snapshot, snapshot.size)
+            result[worksheet] = snapshot
+        return result
+
+    async def _from_store(self, key, version: str = None):
+        """
+        Snapshot da chave no store: sem `version`, só se estiver dentro do TTL;
+        com `version`, só se for da mesma versão (e então vale por mais um TTL).
+        """
+        entry = self._lru.lookup(key)
+        found = await run_blocking(self._open_stored, key, version, entry.value if entry is not None else None)
+        if found is None:
+            return None
+        snapshot, age = found
+        self.shared_hits += 1
+        self._lru.set(key, snapshot, snapshot.size, age=age)
+        return snapshot
+
+    async def _stale_from_store(self, key):
+        if self.store is None:
+            return None
+        found = await run_blocking(self._open_stored, key, None, None, False)
+        return found[0] if found is not None else None
+
+    # As funções abaixo fazem E/S de disco e rodam no pool (run_blocking)
+
+    def _open_stored(self, key, version, cached, check_ttl: bool = True):
+        source = self.store.source_key(key)
+        pointer = self.store.current(source)
+        if pointer is None:
+            return None
+        if version is not None:
+            if pointer["version"] != version:
+                return None
+            pointer, age = self.store.touch(source, pointer), 0.0
+        else:
+            age = self.store.age(pointer)
+            if check_ttl and self._lru.ttl is not None and age >= self._lru.ttl:
+                return None
+
+        if cached is not None and cached.digest == pointer["digest"]:
+            # Já aberto neste worker
+            return cached, age
+        opened = self.store.open(pointer)
+        if opened is None:
+            return None
+        columns, resident = opened
+        return SheetSnapshot.columnar(columns, pointer["version"], pointer["digest"], resident), age
+
+    def _revalidate_stored(self, key, version: str):
+        # Revalidado aqui: os outros workers também ganham mais um TTL
+        source = self.store.source_key(key)
+        pointer = self.store.current(source)
+        if pointer is not None and pointer["version"] == version:
+            self.store.touch(source, pointer)
+
+    def _store_snapshot(self, key, snapshot: SheetSnapshot) -> SheetSnapshot:
+        """Grava no store e devolve a versão em mmap (as linhas são liberadas)."""
+        try:
+            pointer = self.store.write(
+                self.store.source_key(key), snapshot.digest, snapshot.version, _processor.to_columns(snapshot.rows)
+            )
+            opened = self.store.open(pointer)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Erro ao gravar snapshot em disco: {e}")
+            return snapshot
+        if opened is None:
+            return snapshot
+        columns, resident = opened
+        return SheetSnapshot.columnar(columns, snapshot.version, snapshot.digest, resident)
+
+    def stats(self) -> dict:
+        stats = self._lru.stats()
+        stats.update({
+            "ttl_seconds": self._lru.ttl,
+            "revalidations": self.revalidations,
+            "coalesced": self._flight.coalesced,
+            "upstream_fetches": self.upstream_fetches,
+            "stale_served": self.stale_served,
+            "shared_hits": self.shared_hits,
+        })
+        if self.store is not None:
+            stats["store"] = self.store.stats()
+        return stats
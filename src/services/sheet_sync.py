@@ -0,0 +1,235 @@
+# src/services/sheet_sync.py
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert
+from sqlalchemy.future import select
+
+from src.config import settings
+from src.models import SheetRow, SheetSyncState
+from src.services.admission import UpstreamThrottled
+from src.services.cache import LRUCache, SingleFlight
+from src.services.executor import run_blocking
+from src.services.google_service import WorksheetNotFound
+from src.services.sheet_cache import SheetSnapshot
+
+
+def _checksum(header: list, rows: list) -> str:
+    payload = json.dumps([header, rows], default=str, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def _header(rows: list) -> list:
+    return list(rows[0].keys()) if rows else []
+
+
+class SyncResult:
+    __slots__ = ("mode", "rows", "new_rows", "previous_row_count")
+
+    def __init__(self, mode: str, rows: list = None, new_rows: list = None, previous_row_count: int = 0):
+        self.mode = mode  # "full", "append" ou "noop"
+        self.rows = rows
+        self.new_rows = new_rows or []
+        self.previous_row_count = previous_row_count
+
+
+class SheetSync:
+    """
+    Sincronização incremental de planilhas append-only para a tabela local
+    `sheet_rows`.
+
+    A cada sincronização:
+    - se o `modifiedTime` do Drive não mudou, nada é baixado;
+    - senão, só a cauda (últimas SYNC_TAIL_ROWS linhas já conhecidas) e as
+      linhas novas são lidas; se o checksum da cauda bater, as novas linhas
+      são acrescentadas;
+    - se a cauda mudou (edição, remoção, cabeçalho diferente) ou passou
+      SYNC_FULL_RESYNC_SECONDS desde a última carga completa, a aba inteira
+      é recarregada.
+
+    Edições acima das últimas SYNC_TAIL_ROWS linhas não mudam a cauda: só
+    aparecem na próxima carga completa, ou seja, ficam até
+    SYNC_FULL_RESYNC_SECONDS defasadas. Planilhas editadas no meio devem
+    usar o modo padrão (sem "sync") ou uma ressincronização mais curta.
+
+    O Google é consultado fora de qualquer sessão do banco; a diferença é
+    aplicada depois, numa transação curta.
+
+    Os dashboards leem o snapshot local (`get_snapshot`), mantido em memória
+    e atualizado com as linhas novas sem reler o banco. Os ajustes de
+    previsão (`SheetSnapshot.forecasts`) passam para o snapshot seguinte
+    quando só houve linhas novas, e são atualizados só com elas.
+    """
+
+    def __init__(self, backend, session_factory, ttl: float = None):
+        self.backend = backend
+        self.session_factory = session_factory
+        # (project_id, aba) -> SheetSnapshot; o TTL define quando sincronizar de novo
+        self._snapshots = LRUCache(
+            max_bytes=settings.SHEET_CACHE_MAX_BYTES,
+            ttl=ttl if ttl is not None else settings.SHEET_CACHE_TTL_SECONDS,
+        )
+        self._flight = SingleFlight()
+
+    async def get_snapshot(self, project, worksheet: int = 0, force: bool = False) -> SheetSnapshot:
+        key = (project.id, worksheet)
+        entry = self._snapshots.lookup(key)
+        if entry is not None and not force and self._snapshots.is_fresh(entry):
+            self._snapshots.hits += 1
+            return entry.value
+        self._snapshots.misses += 1
+        return await self._flight.do(key, lambda: self._sync_snapshot(project, worksheet))
+
+    def peek(self, project, worksheet: int = 0):
+        """Snapshot local em memória dentro do TTL, sem E/S (None se precisar sincronizar)."""
+        entry = self._snapshots.lookup((project.id, worksheet))
+        if entry is not None and self._snapshots.is_fresh(entry):
+            return entry.value
+        return None
+
+    async def _sync_snapshot(self, project, worksheet):
+        key = (project.id, worksheet)
+        entry = self._snapshots.lookup(key)
+        cached = entry.value if entry is not None else None
+
+        throttled = None
+        try:
+            result = await self.sync(project.id, project.spreadsheet_url, worksheet)
+        except UpstreamThrottled as e:
+            # Cota do Google esgotada: os dados locais continuam servindo
+            throttled = e
+            result = SyncResult("noop")
+        except WorksheetNotFound:
+            raise
+        except Exception as e:
+            # Google indisponível: os dados locais continuam servindo
+            print(f"Erro ao sincronizar projeto {project.id}: {e}")
+            result = SyncResult("noop")
+
+        appended = False
+        if result.mode == "full":
+            rows = result.rows
+        elif cached is not None and len(cached.rows) == result.previous_row_count:
+            rows = cached.rows + result.new_rows if result.new_rows else cached.rows
+            appended = True
+        else:
+            rows = await self.load_rows(project.id, worksheet)
+
+        if not rows and cached is None and result.mode == "noop":
+            if throttled is not None:
+                raise throttled
+            # Nada local e nada do Google: mesmo fallback do cache de planilhas
+            return SheetSnapshot(self.backend.get_mock_data())
+
+        snapshot = cached if cached is not None and rows is cached.rows else await run_blocking(SheetSnapshot, rows)
+        if snapshot.forecasts is None:
+            # Só linhas acrescentadas: os ajustes de previsão do snapshot
+            # anterior continuam valendo e recebem apenas as linhas novas
+            snapshot.forecasts = cached.forecasts if appended and cached.forecasts is not None else {}
+        self._snapshots.set(key, snapshot, snapshot.size)
+        return snapshot
+
+    async def sync(self, project_id: int, spreadsheet_url: str, worksheet: int = 0) -> SyncResult:
+        now = datetime.now(timezone.utc)
+        version = await run_blocking(self.backend.get_modified_time, spreadsheet_url)
+
+        # Sessões curtas: nenhuma conexão (nem o lock de escrita do SQLite)
+        # fica presa enquanto o Google responde
+        async with self.session_factory() as session:
+            state = await session.get(SheetSyncState, (project_id, worksheet))
+            full_due = state is None or state.last_full_sync_at is None or (
+                now - self._aware(state.last_full_sync_at) > timedelta(seconds=settings.SYNC_FULL_RESYNC_SECONDS)
+            )
+            if not full_due and version is not None and version == state.source_version:
+                state.synced_at = now
+                await session.commit()
+                return SyncResult("noop", previous_row_count=state.row_count)
+            known_rows = state.row_count if state is not None else 0
+            tail_checksum = state.tail_checksum if state is not None else None
+
+        # 1. Google: cauda + linhas novas ou a aba inteira
+        rows = fetched = None
+        if not full_due:
+            fetched = await self._fetch_tail(spreadsheet_url, worksheet, known_rows, tail_checksum)
+        if fetched is None:
+            rows = (await run_blocking(self.backend.fetch_many, spreadsheet_url, [worksheet]))[worksheet]
+
+        # 2. Banco: aplica a diferença numa transação curta
+        async with self.session_factory() as session:
+            state = await session.get(SheetSyncState, (project_id, worksheet))
+            if rows is None:
+                if state is None or state.row_count != known_rows:
+                    # Outro worker sincronizou no meio-tempo: quem chamou relê do banco
+                    return SyncResult("noop", previous_row_count=state.row_count if state is not None else 0)
+                tail_size = min(settings.SYNC_TAIL_ROWS, known_rows)
+                new_rows = fetched[tail_size:]
+                if new_rows:
+                    await self._insert_rows(session, project_id, worksheet, new_rows, start=known_rows + 1)
+                    state.row_count = known_rows + len(new_rows)
+                    state.tail_checksum = self._tail_checksum(fetched)
+                result = SyncResult("append", new_rows=new_rows, previous_row_count=known_rows)
+            else:
+                await session.execute(
+                    delete(SheetRow).where(SheetRow.project_id == project_id, SheetRow.worksheet == worksheet)
+                )
+                await self._insert_rows(session, project_id, worksheet, rows, start=1)
+                if state is None:
+                    state = SheetSyncState(project_id=project_id, worksheet=worksheet)
+                    session.add(state)
+                previous = state.row_count or 0
+                state.row_count = len(rows)
+                state.tail_checksum = self._tail_checksum(rows)
+                state.last_full_sync_at = now
+                result = SyncResult("full", rows=rows, previous_row_count=previous)
+
+            state.source_version = version
+            state.synced_at = now
+            await session.commit()
+            return result
+
+    async def _fetch_tail(self, spreadsheet_url, worksheet, known_rows: int, tail_checksum: str):
+        """
+        Relê a cauda conhecida + tudo que veio depois dela. None se a cauda
+        mudou (edição, remoção, cabeçalho diferente): ressincronização completa.
+        """
+        tail_size = min(settings.SYNC_TAIL_ROWS, known_rows)
+        start = known_rows - tail_size + 1
+        fetched = (await run_blocking(
+            self.backend.fetch_many, spreadsheet_url, [worksheet], rows=(start, None)
+        ))[worksheet]
+
+        if len(fetched) < tail_size or self._tail_checksum(fetched[:tail_size], _header(fetched)) != tail_checksum:
+            return None
+        return fetched
+
+    async def _insert_rows(self, session, project_id, worksheet, rows, start):
+        batch = settings.SYNC_INSERT_BATCH
+        for offset in range(0, len(rows), batch):
+            await session.execute(insert(SheetRow), [
+                {"project_id": project_id, "worksheet": worksheet, "row_number": start + offset + i, "data": row}
+                for i, row in enumerate(rows[offset:offset + batch])
+            ])
+
+    async def load_rows(self, project_id: int, worksheet: int = 0) -> list:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(SheetRow.data)
+                .where(SheetRow.project_id == project_id, SheetRow.worksheet == worksheet)
+                .order_by(SheetRow.row_number)
+            )
+            return list(result.scalars())
+
+    def _tail_checksum(self, rows: list, header: list = None) -> str:
+        tail = rows[-settings.SYNC_TAIL_ROWS:] if settings.SYNC_TAIL_ROWS else []
+        return _checksum(header if header is not None else _header(rows), tail)
+
+    @staticmethod
+    def _aware(value: datetime) -> datetime:
+        # SQLite devolve datetimes sem fuso
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+    def stats(self) -> dict:
+        stats = self._snapshots.stats()
+        stats["coalesced"] = self._flight.coalesced
+        return stats
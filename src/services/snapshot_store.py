@@ -0,0 +1,202 @@
+# src/services/snapshot_store.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from src.config import settings
+from src.services.lazy import numpy as np
+
+_POINTER = ".json"
+_TEMP_PREFIX = ".tmp-"
+# Diretórios temporários mais velhos que isso (s) sobraram de um worker que caiu
+_TEMP_MAX_AGE = 3600
+
+
+def _dir_size(path: str) -> int:
+    try:
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+    except OSError:
+        return 0
+
+
+class ColumnarSnapshotStore:
+    """
+    Snapshots colunares das planilhas em disco local, compartilhados entre os
+    workers do uvicorn. Cada snapshot é um diretório `<fonte>-<digest>` com um
+    `.npy` por coluna (o formato de DataProcessor.to_columns) e um meta.json.
+
+    - Colunas numéricas são abertas com mmap, sem cópia: as páginas ficam no
+      page cache do sistema, uma vez só para todos os processos.
+    - Colunas de texto (data/categoria) usam codificação por dicionário:
+      códigos int32 no `.npy` e os valores distintos no meta.json.
+    - A versão atual de cada fonte é apontada por `<fonte>.json`, trocado com
+      os.replace (atômico); o diretório do snapshot também nasce com um
+      rename, então nenhum worker lê um snapshot pela metade.
+    - Acima de `max_bytes` em disco, os snapshots mais antigos são removidos.
+      Quem já abriu um snapshot removido continua lendo (o mmap segura o arquivo).
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.writes = 0
+        self.opens = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def source_key(key) -> str:
+        """Nome estável (igual em todos os workers) para uma chave de cache."""
+        return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=12).hexdigest()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def current(self, source: str):
+        """Ponteiro da versão atual da fonte ({digest, version, stored_at}) ou None."""
+        try:
+            with open(self._path(source + _POINTER), "rb") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def age(self, pointer: dict) -> float:
+        return max(0.0, time.time() - pointer["stored_at"])
+
+    def _publish(self, source: str, pointer: dict):
+        fd, temp = tempfile.mkstemp(dir=self.directory, prefix=_TEMP_PREFIX)
+        with os.fdopen(fd, "w") as f:
+            json.dump(pointer, f)
+        os.replace(temp, self._path(source + _POINTER))
+
+    def touch(self, source: str, pointer: dict, version: str = None) -> dict:
+        """Revalidado na origem: o snapshot atual vale por mais um TTL."""
+        pointer = dict(pointer, version=version or pointer["version"], stored_at=time.time())
+        self._publish(source, pointer)
+        try:
+            # Snapshots em uso ficam por último na fila de remoção
+            os.utime(self._path(pointer["name"]))
+        except OSError:
+            pass
+        return pointer
+
+    def write(self, source: str, digest: str, version: str, columns: dict) -> dict:
+        """Grava as colunas como a nova versão da fonte; devolve o ponteiro."""
+        name = f"{source}-{digest}"
+        target = self._path(name)
+        if not os.path.isdir(target):
+            temp = tempfile.mkdtemp(dir=self.directory, prefix=_TEMP_PREFIX)
+            try:
+                meta = {"rows": 0, "columns": []}
+                for i, (column, values) in enumerate(columns.items()):
+                    spec = {"name": column, "file": f"{i}.npy"}
+                    if not isinstance(values, np.ndarray):
+                        index = {}
+                        values = np.fromiter(
+                            (index.setdefault(value, len(index)) for value in values),
+                            dtype=np.int32, count=len(values),
+                        )
+                        spec["dictionary"] = list(index)
+                    np.save(os.path.join(temp, spec["file"]), values)
+                    meta["rows"] = len(values)
+                    meta["columns"].append(spec)
+                with open(os.path.join(temp, "meta.json"), "w", encoding="utf-8") as f:
+                    json.dump(meta, f, default=str, ensure_ascii=False)
+                os.rename(temp, target)
+                self.writes += 1
+            except OSError:
+                # Outro worker publicou o mesmo conteúdo antes (ou o disco falhou)
+                shutil.rmtree(temp, ignore_errors=True)
+                if not os.path.isdir(target):
+                    raise
+
+        previous = self.current(source)
+        pointer = {"digest": digest, "version": version, "stored_at": time.time(), "name": name}
+        self._publish(source, pointer)
+        if previous is not None and previous.get("name") != name:
+            # Versão substituída: quem ainda a tem aberta segue pelo mmap
+            shutil.rmtree(self._path(previous["name"]), ignore_errors=True)
+        self._evict(keep=name)
+        return pointer
+
+    def open(self, pointer: dict):
+        """
+        (colunas, bytes residentes no processo) do snapshot, ou None se ele
+        foi removido nesse meio-tempo. Numéricas ficam no mmap; as de texto
+        viram listas que apontam para os valores do dicionário.
+        """
+        path = self._path(pointer["name"])
+        try:
+            with open(os.path.join(path, "meta.json"), "rb") as f:
+                meta = json.load(f)
+            columns, resident = {}, 0
+            for spec in meta["columns"]:
+                values = np.lib.format.open_memmap(os.path.join(path, spec["file"]), mode="r").view(np.ndarray)
+                dictionary = spec.get("dictionary")
+                if dictionary is not None:
+                    values = list(map(dictionary.__getitem__, values.tolist()))
+                    resident += 8 * len(values) + 64 * len(dictionary)
+                columns[spec["name"]] = values
+        except (OSError, ValueError, KeyError):
+            return None
+        self.opens += 1
+        return columns, resident
+
+    def _evict(self, keep: str):
+        now = time.time()
+        snapshots, total = [], 0
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.startswith(_TEMP_PREFIX):
+                    if now - entry.stat().st_mtime > _TEMP_MAX_AGE:
+                        self._remove(entry)
+                    continue
+                if not entry.is_dir():
+                    continue
+                size = _dir_size(entry.path)
+                total += size
+                if entry.name != keep:
+                    snapshots.append((entry.stat().st_mtime, size, entry.path))
+            except OSError:
+                # Removido por outro worker durante a varredura
+                continue
+
+        # Mais antigos primeiro; ponteiros órfãos viram miss em quem os ler
+        for _, size, path in sorted(snapshots):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.evictions += 1
+
+    @staticmethod
+    def _remove(entry):
+        if entry.is_dir():
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        snapshots = [entry for entry in os.scandir(self.directory)
+                     if entry.is_dir() and not entry.name.startswith(_TEMP_PREFIX)]
+        return {
+            "directory": self.directory,
+            "snapshots": len(snapshots),
+            "disk_bytes": sum(_dir_size(entry.path) for entry in snapshots),
+            "max_bytes": self.max_bytes,
+            "writes": self.writes,
+            "opens": self.opens,
+            "evictions": self.evictions,
+        }
+
+
+def build_store():
+    if not settings.SNAPSHOT_STORE_DIR:
+        return None
+    return ColumnarSnapshotStore(settings.SNAPSHOT_STORE_DIR, settings.SNAPSHOT_STORE_MAX_BYTES)
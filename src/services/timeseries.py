@@ -0,0 +1,130 @@
+# src/services/timeseries.py
+import re
+from src.services.lazy import numpy as np
+
+_DMY = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})")
+_MY = re.compile(r"^(\d{1,2})/(\d{4})$")
+_ISO = re.compile(r"^(\d{4})-(\d{1,2})(?:-(\d{1,2}))?")
+
+AGGREGATIONS = ("sum", "mean", "count", "min", "max")
+GRANULARITIES = ("day", "week", "month")
+
+
+def _parse_date(value):
+    # Formatos comuns nas planilhas: 2023-01, 2023-01-15, 15/01/2023, 01/2023
+    text = str(value).strip() if value is not None else ""
+    match = _ISO.match(text)
+    if match:
+        year, month, day = match.group(1), match.group(2), match.group(3) or 1
+    else:
+        match = _DMY.match(text)
+        if match:
+            day, month, year = match.groups()
+        else:
+            match = _MY.match(text)
+            if not match:
+                return np.datetime64("NaT", "D")
+            (month, year), day = match.groups(), 1
+    try:
+        return np.datetime64(f"{int(year):04d}-{int(month):02d}-{int(day):02d}", "D")
+    except ValueError:
+        return np.datetime64("NaT", "D")
+
+
+def parse_dates(values) -> "np.ndarray":
+    """Converte os valores para datetime64[D]; o que não for data vira NaT."""
+    # Datas se repetem muito: cada texto distinto é interpretado uma única vez
+    unique, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    parsed = np.array([_parse_date(v) for v in unique], dtype="datetime64[D]")
+    return parsed[inverse.reshape(-1)]
+
+
+def bucket_dates(dates: "np.ndarray", granularity: str):
+    """Trunca as datas para o início do dia, semana (segunda-feira) ou mês."""
+    if granularity == "month":
+        return dates.astype("datetime64[M]").astype("datetime64[D]")
+    if granularity == "week":
+        days = dates.astype(np.int64)
+        # 1970-01-01 foi uma quinta-feira; NaT (INT64_MIN) fica fora da conta,
+        # senão a subtração dá a volta e vira uma data válida
+        valid = ~np.isnat(dates)
+        weeks = np.full(dates.shape, np.datetime64("NaT"), dtype="datetime64[D]")
+        weeks[valid] = (days[valid] - (days[valid] + 3) % 7).astype("datetime64[D]")
+        return weeks
+    return dates
+
+
+def bucket_labels(buckets: "np.ndarray", granularity: str) -> list:
+    unit = "M" if granularity == "month" else "D"
+    return np.datetime_as_string(buckets.astype(f"datetime64[{unit}]")).tolist()
+
+
+def aggregate(keys: "np.ndarray", series: dict, how: str):
+    """
+    Agrupa as séries numéricas por chave com sum/mean/count/min/max.
+    Retorna as chaves distintas (ordenadas) e as séries agregadas.
+    """
+    unique, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    counts = np.bincount(inverse, minlength=len(unique))
+
+    if how in ("min", "max"):
+        order = np.argsort(inverse, kind="stable")
+        starts = np.searchsorted(inverse[order], np.arange(len(unique)))
+        reducer = np.minimum if how == "min" else np.maximum
+
+    result = {}
+    for name, values in series.items():
+        if how == "count":
+            result[name] = counts
+        elif how in ("min", "max"):
+            result[name] = reducer.reduceat(values[order], starts)
+        else:
+            totals = np.bincount(inverse, weights=values, minlength=len(unique))
+            if how == "mean":
+                result[name] = totals / counts
+            else:
+                # bincount sempre soma em float; séries inteiras continuam inteiras
+                result[name] = totals.astype(values.dtype) if values.dtype.kind in "iu" else totals
+    return unique, result
+
+
+def lttb_indices(series: list, n_out: int) -> "np.ndarray":
+    """
+    Largest-Triangle-Three-Buckets para várias séries ao mesmo tempo.
+
+    Cada série é normalizada para [0, 1] e a área do triângulo é somada entre
+    as séries, de modo que os mesmos `n_out` pontos preservam a forma de
+    todas elas. Retorna os índices escolhidos, em ordem.
+    """
+    n = len(series[0]) if series else 0
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    y = np.vstack([np.asarray(s, dtype=np.float64) for s in series])
+    span = y.max(axis=1, keepdims=True) - y.min(axis=1, keepdims=True)
+    y = (y - y.min(axis=1, keepdims=True)) / np.where(span == 0, 1, span)
+    x = np.arange(n, dtype=np.float64)
+
+    # Primeiro e último pontos são sempre mantidos; o meio vira n_out - 2 baldes
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], max(edges[i + 1], edges[i] + 1)
+        # Média do balde seguinte (ou o último ponto, no último balde)
+        if i + 2 < len(edges):
+            next_start, next_stop = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+        else:
+            next_start, next_stop = n - 1, n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[:, next_start:next_stop].mean(axis=1, keepdims=True)
+
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[:, start:stop] - y[:, [previous]])
+            - (x[previous] - x[start:stop]) * (avg_y - y[:, [previous]])
+        ).sum(axis=0)
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
@@ -0,0 +1,56 @@
+# tests/conftest.py
+import itertools
+import os
+import tempfile
+
+# Antes de importar src: banco SQLite temporário, bcrypt barato e nada
+# rodando em segundo plano
+_DB_DIR = tempfile.mkdtemp(prefix="dashmaster-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_DB_DIR}/test.db")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("REFRESH_MODE", "disabled")
+os.environ.setdefault("PRELOAD_MODULES", "false")
+# Desligado por padrão; ligado aqui para testar Server-Timing e /metrics
+os.environ.setdefault("METRICS_ENABLED", "true")
+
+import pytest
+
+_users = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def backend():
+    from benchmarks.fake_sheets import FakeSheetsBackend, install
+
+    fake = FakeSheetsBackend(rows=300, width=3, latency_ms=0, version_latency_ms=0)
+    install(fake)
+    return fake
+
+
+@pytest.fixture(scope="session")
+def client(backend):
+    from fastapi.testclient import TestClient
+    from src.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Usuário novo a cada teste (limites de taxa não vazam entre testes)."""
+    return _new_user(client)
+
+
+@pytest.fixture
+def other_auth_headers(client):
+    """Segundo usuário, para testes de posse."""
+    return _new_user(client)
+
+
+def _new_user(client) -> dict:
+    n = next(_users)
+    email = f"user{n}@example.com"
+    client.post("/api/auth/register", json={"email": email, "username": f"user{n}", "password": "senha"})
+    token = client.post("/api/auth/token", data={"username": email, "password": "senha"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,172 @@
+# tests/test_admission.py
+import asyncio
+
+import pytest
+
+from src.services.admission import (
+    BACKGROUND, BATCH, INTERACTIVE, AdmissionQueue, AdmissionRejected, MemoryStore, RateLimiter, RedisStore,
+    UpstreamBackoff, _TAKE_SCRIPT,
+)
+
+
+def test_queue_serves_by_priority_then_arrival():
+    async def main():
+        queue = AdmissionQueue(max_active=1, max_queued=10)
+        await queue.acquire()
+        served = []
+
+        async def wait(name, priority):
+            await queue.acquire(priority)
+            served.append(name)
+            queue.release()
+
+        tasks = [
+            asyncio.create_task(wait("prewarm", BACKGROUND)),
+            asyncio.create_task(wait("overview", BATCH)),
+            asyncio.create_task(wait("dashboard-1", INTERACTIVE)),
+            asyncio.create_task(wait("dashboard-2", INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        assert queue.stats()["queued"] == 4
+        queue.release()
+        await asyncio.gather(*tasks)
+        assert served == ["dashboard-1", "dashboard-2", "overview", "prewarm"]
+        assert queue.active == 0
+
+    asyncio.run(main())
+
+
+def test_full_queue_rejects_with_retry_after():
+    async def main():
+        queue = AdmissionQueue(max_active=1, max_queued=1)
+        await queue.acquire()
+        waiter = asyncio.create_task(queue.acquire())
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await queue.acquire()
+        assert rejected.value.retry_after > 0
+        assert rejected.value.retry_after_header == "2"
+        assert queue.rejected == 1
+
+        queue.release()
+        await waiter
+        queue.release()
+        assert queue.active == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def main():
+        queue = AdmissionQueue(max_active=1, max_queued=5)
+        await queue.acquire()
+        cancelled = asyncio.create_task(queue.acquire())
+        waiting = asyncio.create_task(queue.acquire())
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert queue.stats()["queued"] == 1
+
+        queue.release()
+        await waiting
+        queue.release()
+        assert queue.active == 0 and queue.stats()["queued"] == 0
+
+    asyncio.run(main())
+
+
+def test_slot_handed_over_with_cancellation_is_returned():
+    async def main():
+        queue = AdmissionQueue(max_active=1, max_queued=5)
+        await queue.acquire()
+        waiter = asyncio.create_task(queue.acquire())
+        await asyncio.sleep(0)
+
+        # O slot é passado e o cancelamento chega antes de o waiter acordar
+        queue.release()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert queue.active == 0
+
+    asyncio.run(main())
+
+
+def test_rate_limiter_allows_burst_then_rejects():
+    async def main():
+        limiter = RateLimiter(MemoryStore(), "usuário", rate=1, burst=3)
+        for _ in range(3):
+            await limiter.acquire(42)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire(42)
+        assert 0 < rejected.value.retry_after <= 1
+        # Outra chave tem o próprio bucket
+        await limiter.acquire(7)
+        assert limiter.rejected == 1
+
+    asyncio.run(main())
+
+
+def test_memory_store_keeps_at_most_max_keys_buckets():
+    async def main():
+        store = MemoryStore(max_keys=2)
+        limiter = RateLimiter(store, "usuário", rate=1, burst=1)
+        for key in ("a", "b", "c"):
+            await limiter.acquire(key)
+        assert len(store._buckets) == 2
+        # O bucket mais antigo saiu: "a" recomeça cheio
+        await limiter.acquire("a")
+        assert store._buckets.stats()["evictions"] == 2
+
+    asyncio.run(main())
+
+
+def test_backoff_blocks_until_delay_passes():
+    async def main():
+        backoff = UpstreamBackoff(MemoryStore(), "google", base=10, maximum=60)
+        delay = backoff.throttled(retry_after=30)
+        assert delay >= 30
+        assert 0 < await backoff.remaining_async() <= delay
+        assert backoff.remaining() > 0
+
+    asyncio.run(main())
+
+
+class _NoSyncCalls:
+    def __getattr__(self, name):
+        raise AssertionError(f"chamada síncrona ao Redis no event loop: {name}")
+
+
+def _redis_store():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    server = fakeredis.FakeServer()
+    store = RedisStore.__new__(RedisStore)
+    store.prefix = "test:"
+    store._async = fakeredis.FakeAsyncRedis(server=server)
+    store._sync = fakeredis.FakeRedis(server=server)
+    store._take = store._async.register_script(_TAKE_SCRIPT)
+    return store
+
+
+def test_redis_store_event_loop_paths_are_async():
+    store = _redis_store()
+    backoff = UpstreamBackoff(store, "google", base=10, maximum=60)
+    # Threads do pool: cliente síncrono
+    backoff.throttled(retry_after=30)
+    sync_client, store._sync = store._sync, _NoSyncCalls()
+
+    async def main():
+        assert 25 < await backoff.remaining_async() <= 36
+        limiter = RateLimiter(store, "planilha", rate=1, burst=2)
+        await limiter.acquire("a")
+        await limiter.acquire("a")
+        with pytest.raises(AdmissionRejected):
+            await limiter.acquire("a")
+
+    asyncio.run(main())
+    store._sync = sync_client
+    assert backoff.remaining() > 25
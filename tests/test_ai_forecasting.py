@@ -0,0 +1,56 @@
+# tests/test_ai_forecasting.py
+from src.services.ai_forecasting import TrendModel, predict_trends
+from src.services.lazy import numpy as np
+
+
+def test_fit_matches_least_squares():
+    rng = np.random.default_rng(0)
+    t = np.arange(60, dtype=np.float64)
+    y = np.column_stack([3 * t + 10 + rng.normal(0, 1, 60), -t + 5 * np.sin(2 * np.pi * t / 12)])
+
+    model = TrendModel(seasonality=12).fit(y)
+    expected, *_ = np.linalg.lstsq(model.design(t), y, rcond=None)
+    assert np.allclose(model.coefficients(), expected)
+
+
+def test_refit_replaces_previous_data():
+    model = TrendModel().fit(np.arange(10.0))
+    model.fit(-np.arange(5.0))
+    assert model.n == 5
+    assert model.slopes()[0] < 0
+
+
+def test_update_equals_fit_on_concatenated_rows():
+    rng = np.random.default_rng(1)
+    y = rng.normal(0, 1, (50, 3)).cumsum(axis=0)
+
+    incremental = TrendModel(seasonality=7).fit(y[:30]).update(y[30:45]).update(y[45:])
+    full = TrendModel(seasonality=7).fit(y)
+    assert incremental.n == full.n == 50
+    assert np.allclose(incremental.coefficients(), full.coefficients())
+    for got, expected in zip(incremental.forecast(3, 0.9), full.forecast(3, 0.9)):
+        assert np.allclose(got, expected)
+
+
+def test_predict_trends_reuses_fits_for_appended_rows():
+    timeline = [{"date": f"d{i}", "valor": 100 + 3 * i + (i % 5), "leads": i % 7} for i in range(40)]
+    fits = {}
+    predict_trends(timeline[:30], horizon=2, fits=fits, fit_key=("email",))
+    (model,) = fits.values()
+    assert model.n == 30
+
+    result = predict_trends(timeline, horizon=2, fits=fits, fit_key=("email",))
+    (updated,) = fits.values()
+    assert updated.n == 40 and updated is not model
+    # O ajuste antigo segue intacto (outros snapshots podem estar usando)
+    assert model.n == 30
+    assert result == predict_trends(timeline, horizon=2)
+
+
+def test_predict_trends_linear_series():
+    timeline = [{"date": f"2024-{m:02d}", "valor": 100 + 10 * m} for m in range(1, 13)]
+    result = predict_trends(timeline, horizon=2)
+    assert result["metric"] == "valor"
+    assert result["trend"] == "up"
+    assert [point["valor"] for point in result["forecast"]] == [230.0, 240.0]
+    assert len(result["history"]) == 12
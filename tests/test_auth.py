@@ -0,0 +1,102 @@
+# tests/test_auth.py
+import asyncio
+import itertools
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from src import auth
+from src.config import settings
+from src.models import User
+
+_emails = (f"cache{n}@example.com" for n in itertools.count())
+
+
+def test_cancelled_hash_keeps_its_slot_until_the_thread_finishes(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 1)
+    release = threading.Event()
+
+    async def main():
+        waiter = asyncio.create_task(auth._run_hash_job(release.wait, 5))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        # A thread ainda está rodando o bcrypt: o slot continua ocupado
+        assert auth._hash_pending == 1
+        with pytest.raises(HTTPException) as rejected:
+            await auth._run_hash_job(len, "x")
+        assert rejected.value.status_code == 429
+
+        release.set()
+        for _ in range(100):
+            if auth._hash_pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert auth._hash_pending == 0
+        assert await auth._run_hash_job(len, "x") == 1
+
+    asyncio.run(main())
+
+
+class _DB:
+    """Sessão falsa que conta as consultas e devolve sempre o mesmo usuário."""
+
+    def __init__(self, user):
+        self.user = user
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(first=lambda: self.user))
+
+
+def _user_and_token():
+    email = next(_emails)
+    user = User(id=7, email=email, username="cache", created_at=datetime(2024, 1, 1))
+    return user, auth.create_access_token(data={"sub": email})
+
+
+def test_cached_user_is_served_without_a_query_and_detached_from_the_orm():
+    user, token = _user_and_token()
+    db = _DB(user)
+
+    first = asyncio.run(auth.get_current_user(token, db))
+    second = asyncio.run(auth.get_current_user(token, db))
+    assert db.queries == 1
+    assert second is first
+    assert not isinstance(first, User)
+    assert (first.id, first.email, first.username, first.created_at) == (
+        7, user.email, "cache", datetime(2024, 1, 1),
+    )
+
+
+def test_cached_user_expires_after_ttl(monkeypatch):
+    user, token = _user_and_token()
+    db = _DB(user)
+    asyncio.run(auth.get_current_user(token, db))
+
+    monkeypatch.setattr(auth._user_cache, "ttl", 0)
+    asyncio.run(auth.get_current_user(token, db))
+    assert db.queries == 2
+
+
+def test_invalidated_user_is_loaded_again():
+    user, token = _user_and_token()
+    db = _DB(user)
+    asyncio.run(auth.get_current_user(token, db))
+
+    user.username = "renomeado"
+    auth.invalidate_cached_user(user.email)
+    reloaded = asyncio.run(auth.get_current_user(token, db))
+    assert db.queries == 2
+    assert reloaded.username == "renomeado"
+
+    # Sem email: limpa o cache inteiro
+    auth.invalidate_cached_user()
+    asyncio.run(auth.get_current_user(token, db))
+    assert db.queries == 3
@@ -0,0 +1,32 @@
+# tests/test_compression.py
+import pytest
+
+from src.services import compression
+from src.services.compression import choose_encoding
+
+BIG = 10_000
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "br"),
+    ("br;q=0.1, gzip;q=1.0", "gzip"),
+    ("gzip;q=0.5, br;q=0.8", "br"),
+    ("gzip, br;q=0", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("*", "br"),
+    ("*;q=0.5, gzip;q=0.9", "gzip"),
+    ("identity", None),
+    ("", None),
+])
+def test_highest_q_wins(header, expected):
+    assert choose_encoding(header, BIG) == expected
+
+
+def test_small_bodies_stay_uncompressed():
+    assert choose_encoding("gzip, br", 10) is None
+
+
+def test_without_brotli_falls_back_to_gzip(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("br, gzip;q=0.5", BIG) == "gzip"
+    assert choose_encoding("br", BIG) is None
@@ -0,0 +1,52 @@
+# tests/test_dashboard_etag.py
+import pytest
+
+from benchmarks.fake_sheets import sheet_url
+from src.routers import dashboard_router
+
+
+@pytest.fixture
+def project_id(client, auth_headers):
+    response = client.post(
+        "/api/projects",
+        json={"name": "etag", "spreadsheet_url": sheet_url(900), "categories": ["email"]},
+        headers=auth_headers,
+    )
+    return response.json()["id"]
+
+
+def test_revalidation_returns_304(client, auth_headers, project_id):
+    url = f"/api/projects/{project_id}/dashboard"
+    first = client.get(url, headers={**auth_headers, "Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = client.get(url, headers={**auth_headers, "If-None-Match": etag, "Accept-Encoding": "identity"})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.content == b""
+
+    # Outra visão do mesmo projeto: ETag diferente, corpo completo
+    other = client.get(url + "?layout=columns", headers={**auth_headers, "If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["ETag"] != etag
+
+
+def test_compressed_representation_has_its_own_etag(client, auth_headers, project_id):
+    url = f"/api/projects/{project_id}/dashboard"
+    response = client.get(url, headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"].endswith('-gzip"')
+    again = client.get(url, headers={**auth_headers, "Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_304_does_not_spend_admission_tokens(client, auth_headers, project_id, monkeypatch):
+    url = f"/api/projects/{project_id}/dashboard"
+    etag = client.get(url, headers=auth_headers).headers["ETag"]
+
+    # Uma única requisição por minuto: só revalidações cabem no limite
+    monkeypatch.setattr(dashboard_router.user_limiter, "rate", 1 / 60)
+    monkeypatch.setattr(dashboard_router.user_limiter, "burst", 1)
+    for _ in range(5):
+        assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 304
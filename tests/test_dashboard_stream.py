@@ -0,0 +1,34 @@
+# tests/test_dashboard_stream.py
+import asyncio
+import json
+
+from benchmarks.fake_sheets import make_sheet
+from src.config import settings
+from src.routers.dashboard_router import DataRequest, _render_stream_head, _stream_body
+from src.services.ai_forecasting import predict_trends
+from src.services.data_processor import DataProcessor
+
+
+async def _collect(body) -> list:
+    return [json.loads(line) async for line in body]
+
+
+def test_stream_head_leaves_history_for_chunked_lines(monkeypatch):
+    monkeypatch.setattr(settings, "STREAM_CHUNK_ROWS", 100)
+    rows = [{"date": row["Date"], **row} for row in make_sheet(450, 3, seed=1)]
+    for row in rows:
+        del row["Date"]
+    request = DataRequest(spreadsheet_url="x", categories=[], stream=True)
+
+    columns, head, history = _render_stream_head(rows, request)
+    summary = json.loads(head)
+    assert summary["type"] == "summary"
+    assert "history" not in summary["ai_insights"]
+
+    lines = asyncio.run(_collect(_stream_body(head, columns, history)))
+    kinds = [line["type"] for line in lines]
+    assert kinds == ["summary"] + ["rows"] * 5 + ["history"] * 5 + ["end"]
+
+    streamed = [item for line in lines if line["type"] == "history" for item in line["history"]]
+    expected = predict_trends(DataProcessor().build(rows, [])[0])["history"]
+    assert streamed == expected
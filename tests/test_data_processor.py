@@ -0,0 +1,54 @@
+# tests/test_data_processor.py
+from src.services.data_processor import DataProcessor, coerce_numeric
+
+
+def test_integral_strings_stay_integers():
+    values = coerce_numeric(["12", "13", "0"])
+    assert values.dtype.kind == "i"
+    assert values.tolist() == [12, 13, 0]
+
+
+def test_fractional_or_missing_cells_make_the_column_float():
+    assert coerce_numeric(["12", "1.5"]).tolist() == [12.0, 1.5]
+    blank = coerce_numeric(["12", "", "texto"])
+    assert blank.dtype.kind == "f"
+    assert blank.tolist() == [12.0, 0.0, 0.0]
+    assert coerce_numeric([1.0, 2.0]).dtype.kind == "f"
+
+
+def test_timeline_keeps_integer_cells_as_integers():
+    rows = [{"data": "2024-01-01", "cliques": "12"}, {"data": "2024-01-02", "cliques": "30"}]
+    timeline = DataProcessor().process(rows, [])["timeline"]
+    assert [row["cliques"] for row in timeline] == [12, 30]
+    assert all(type(row["cliques"]) is int for row in timeline)
+
+
+def _campaign_rows():
+    return [
+        {"data": "2024-01-01", "canal": "Google Ads", "valor": 10},
+        {"data": "2024-01-02", "canal": "Meta Ads", "valor": 20},
+        {"data": "2024-01-03", "canal": "google_ads", "valor": 30},
+        {"data": "2024-01-04", "canal": "E-mail", "valor": 40},
+    ]
+
+
+def test_frontend_categories_match_sheet_values():
+    # Valores dos checkboxes/links de public/index.html
+    result = DataProcessor().process(_campaign_rows(), ["google-ads", "meta-ads"])
+    assert [row["valor"] for row in result["timeline"]] == [10, 20, 30]
+    assert result["valor"] == 20.0
+    assert [row["valor"] for row in DataProcessor().process(_campaign_rows(), ["email"])["timeline"]] == [40]
+
+
+def test_filter_without_matches_has_no_kpis():
+    import warnings
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = DataProcessor().process(_campaign_rows(), ["blog"])
+    assert result == {"timeline": []}
+
+
+def test_summary_skips_date_and_category_columns():
+    summary = DataProcessor().process(_campaign_rows(), [])
+    assert set(summary) == {"timeline", "valor"}
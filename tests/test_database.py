@@ -0,0 +1,107 @@
+# tests/test_database.py
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, StaticPool
+
+from src import database
+from src.config import settings
+from src.database import Base, build_engine, migrate_schema, normalize_database_url
+import src.models  # noqa: F401  (registra as tabelas em Base.metadata)
+
+
+def _migrate(path):
+    async def main():
+        engine = build_engine(f"sqlite+aiosqlite:///{path}")
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(migrate_schema)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_workers_starting_together_upgrade_the_schema_once(tmp_path):
+    path = tmp_path / "old.db"
+    _migrate(path)
+    # Banco "antigo": sem uma coluna e sem os índices de projects
+    db = sqlite3.connect(path)
+    for (name,) in db.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'projects' AND name NOT LIKE 'sqlite_%'"
+    ).fetchall():
+        db.execute(f"DROP INDEX {name}")
+    db.execute("ALTER TABLE projects DROP COLUMN settings")
+    db.commit()
+
+    errors = []
+
+    def worker():
+        try:
+            _migrate(path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    columns = {row[1] for row in db.execute("PRAGMA table_info(projects)")}
+    indexes = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    db.close()
+    assert {column.name for column in Base.metadata.tables["projects"].columns} <= columns
+    assert {index.name for index in Base.metadata.tables["projects"].indexes} <= indexes
+
+
+@pytest.mark.parametrize("url", [
+    "postgres://u:p@db/app",
+    "postgresql://u:p@db/app",
+    "postgresql+asyncpg://u:p@db/app",
+])
+def test_postgres_urls_use_asyncpg(url):
+    assert normalize_database_url(url) == "postgresql+asyncpg://u:p@db/app"
+
+
+def test_sqlite_file_gets_a_sized_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 3)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 2)
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path}/pool.db")
+    assert isinstance(engine.pool, AsyncAdaptedQueuePool)
+    assert engine.pool.size() == 3
+    assert engine.pool._max_overflow == 2
+
+
+@pytest.mark.parametrize("url", ["sqlite+aiosqlite://", "sqlite+aiosqlite:///:memory:"])
+def test_sqlite_in_memory_keeps_static_pool(url):
+    # StaticPool não aceita pool_size/max_overflow: passar quebraria o create_async_engine
+    assert isinstance(build_engine(url).pool, StaticPool)
+
+
+def test_overrides_win(tmp_path):
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path}/null.db", poolclass=NullPool)
+    assert isinstance(engine.pool, NullPool)
+
+
+def test_asyncpg_gets_statement_cache_and_timeout(monkeypatch):
+    calls = []
+    create_async_engine = database.create_async_engine
+
+    def fake_create_async_engine(url, connect_args, **options):
+        calls.append((url, connect_args, options))
+        return create_async_engine("sqlite+aiosqlite://")
+
+    monkeypatch.setattr(database, "create_async_engine", fake_create_async_engine)
+    monkeypatch.setattr(settings, "DB_PREPARED_STATEMENT_CACHE_SIZE", 50)
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 2000)
+    build_engine("postgres://u:p@db/app")
+
+    url, connect_args, options = calls[0]
+    assert url.drivername == "postgresql+asyncpg"
+    assert url.query["prepared_statement_cache_size"] == "50"
+    assert connect_args == {"statement_cache_size": 50, "server_settings": {"statement_timeout": "2000"}}
+    assert options["pool_size"] == settings.DB_POOL_SIZE
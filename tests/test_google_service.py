@@ -0,0 +1,113 @@
+# tests/test_google_service.py
+import asyncio
+
+import pytest
+
+from src.services import google_service as google_module
+from src.services.google_service import GoogleSheetService, WorksheetNotFound
+from src.services.sheet_cache import SheetCache
+
+
+class FakeWorksheet:
+    def __init__(self, title):
+        self.title = title
+
+
+class FakeSpreadsheet:
+    def __init__(self, key, tabs):
+        self.id = key
+        self.tabs = tabs  # título -> grade (cabeçalho + linhas)
+
+    def worksheets(self):
+        return [FakeWorksheet(title) for title in self.tabs]
+
+    def values_batch_get(self, ranges):
+        return {"valueRanges": [{"values": self.tabs[r.strip("'")]} for r in ranges]}
+
+
+class FakeClient:
+    def __init__(self, tabs):
+        self.tabs = tabs
+        self.opens = 0
+
+    def open_by_key(self, key):
+        self.opens += 1
+        return FakeSpreadsheet(key, dict(self.tabs))
+
+
+URL = "https://docs.google.com/spreadsheets/d/abc123/edit"
+
+
+def _service(tabs):
+    service = GoogleSheetService()
+    service.client = FakeClient(tabs)
+    return service
+
+
+def test_metadata_is_cached():
+    service = _service({"Jan": [["date", "valor"], ["2024-01", "1"]]})
+    assert service.fetch_many(URL, [0]) == {0: [{"date": "2024-01", "valor": 1}]}
+    service.fetch_many(URL, [0])
+    assert service.client.opens == 1
+
+
+def test_tab_added_after_first_read_is_found():
+    service = _service({"Jan": [["date", "valor"], ["2024-01", "1"]]})
+    service.fetch_many(URL, [0])
+    service.client.tabs["Fev"] = [["date", "valor"], ["2024-02", "2"]]
+
+    assert service.fetch_many(URL, [1]) == {1: [{"date": "2024-02", "valor": 2}]}
+    assert service.client.opens == 2
+
+
+def test_missing_tab_is_an_error_not_mock_data():
+    backend = _service({"Jan": [["date", "valor"], ["2024-01", "1"]]})
+    with pytest.raises(WorksheetNotFound):
+        backend.fetch_many(URL, [3])
+    with pytest.raises(WorksheetNotFound):
+        backend.fetch_many(URL, [-1])
+
+    backend.get_modified_time = lambda url: None
+    with pytest.raises(WorksheetNotFound):
+        asyncio.run(SheetCache(backend, ttl=60).get_snapshot(URL, worksheet=5))
+
+
+def test_metadata_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(google_module.settings, "GOOGLE_METADATA_CACHE_MAX_ENTRIES", 2)
+    service = _service({"Jan": [["date", "valor"], ["2024-01", "1"]]})
+    for key in ("a1", "b2", "c3"):
+        service.fetch_many(f"https://docs.google.com/spreadsheets/d/{key}/edit", [0])
+    assert len(service._spreadsheets) == 2
+
+
+def test_dashboard_for_missing_tab_returns_404(client, auth_headers, backend, monkeypatch):
+    def missing(url, worksheets, columns=None, rows=None):
+        raise WorksheetNotFound("A planilha tem 1 aba(s); aba 7 não encontrada.")
+
+    monkeypatch.setattr(backend, "fetch_many", missing)
+    response = client.post(
+        "/api/process-data",
+        json={"spreadsheet_url": "https://docs.google.com/spreadsheets/d/sem-aba/edit", "categories": [], "worksheet": 7},
+        headers=auth_headers,
+    )
+    assert response.status_code == 404
+    assert "aba 7" in response.json()["detail"]
+
+
+def test_service_over_the_fake_http_session_reads_the_synthetic_sheets():
+    from benchmarks.fake_sheets import FakeSheetsBackend, sheet_url, sheets_service
+
+    backend = FakeSheetsBackend(rows=30, width=3, latency_ms=0, version_latency_ms=0)
+    service = sheets_service(backend, worksheets=2)
+    url = sheet_url(7)
+
+    # Valores chegam como texto pela "API" e voltam numéricos via numericise
+    assert service.fetch_many(url, [0, 1]) == backend.fetch_many(url, [0, 1])
+    assert service.fetch_many(url, [0], ["valor"], (3, 9)) == backend.fetch_many(url, [0], ["valor"], (3, 9))
+    assert service.get_modified_time(url) == "2024-01-01T00:00:00.000Z"
+    with pytest.raises(WorksheetNotFound):
+        service.fetch_many(url, [2])
+
+    calls = service.client.http_client.session.calls
+    assert calls["values.batchGet"] == 3
+    assert calls["drive.files"] == 1
@@ -0,0 +1,65 @@
+# tests/test_metrics.py
+import logging
+import time
+
+from src.services.metrics import Histogram
+from src.services.profiler import SlowRequestProfiler
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("teste_seconds", "Teste.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5.0, "/a")
+
+    lines = histogram.render()
+    assert 'teste_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'teste_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'teste_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'teste_seconds_count{route="/a"} 3' in lines
+
+
+def test_responses_carry_server_timing_and_feed_metrics(client, auth_headers):
+    response = client.get("/api/projects", headers=auth_headers)
+    timing = response.headers["Server-Timing"]
+    assert "auth;dur=" in timing and "total;dur=" in timing
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain")
+    assert 'dashmaster_request_duration_seconds_count{method="GET",route="/api/projects",status="200"}' in metrics.text
+    assert 'dashmaster_stage_duration_seconds_count{route="/api/projects",stage="auth"}' in metrics.text
+
+
+def test_route_label_uses_the_path_template(client, auth_headers):
+    client.get("/api/projects/123456/dashboard", headers=auth_headers)
+    metrics = client.get("/metrics").text
+    assert 'route="/api/projects/{project_id}/dashboard"' in metrics
+    assert "123456" not in metrics
+
+
+def _spin(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profiler_logs_stacks_of_slow_requests_only(caplog):
+    profiler = SlowRequestProfiler(threshold_ms=50, interval_ms=1)
+
+    with caplog.at_level(logging.WARNING, logger="dashmaster.profile"):
+        samples = profiler.begin()
+        _spin(0.1)
+        profiler.end(samples, 0.1, "GET /lenta")
+
+        fast = profiler.begin()
+        _spin(0.01)
+        profiler.end(fast, 0.01, "GET /rapida")
+
+    assert sum(samples.values()) > 0
+    assert [record.getMessage().splitlines()[0].split(" (")[0] for record in caplog.records] == [
+        "Requisição lenta GET /lenta",
+    ]
+    assert "test_metrics.py:_spin" in caplog.records[0].getMessage()
+    # Sem requisições em andamento, a thread de amostragem para
+    assert not profiler._wakeup.is_set()
@@ -0,0 +1,70 @@
+# tests/test_overview.py
+import itertools
+import json
+
+from benchmarks.fake_sheets import sheet_url
+from src.config import settings
+
+_sheets = itertools.count(2000)
+
+
+def _create(client, headers, n) -> list:
+    ids = []
+    for i in range(n):
+        body = {"name": f"Cliente {i}", "spreadsheet_url": sheet_url(next(_sheets)), "categories": ["email"]}
+        ids.append(client.post("/api/projects", json=body, headers=headers).json()["id"])
+    return ids
+
+
+def _overview(client, headers, project_ids):
+    response = client.post("/api/projects/overview", json={"project_ids": project_ids}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    return lines[:-1], lines[-1]
+
+
+def test_overview_streams_kpis_and_a_summary_line(client, auth_headers, other_auth_headers):
+    ids = _create(client, auth_headers, 3)
+    theirs = _create(client, other_auth_headers, 1)[0]
+
+    projects, end = _overview(client, auth_headers, ids + [theirs, 10 ** 9])
+    by_id = {line["project_id"]: line for line in projects}
+    assert set(by_id) == set(ids) | {theirs, 10 ** 9}
+    # Projeto de outro usuário não vaza: mesmo status de um id inexistente
+    assert by_id[theirs]["status"] == by_id[10 ** 9]["status"] == "not_found"
+    for project_id in ids:
+        line = by_id[project_id]
+        assert line["status"] == "ok"
+        assert line["name"].startswith("Cliente")
+        assert set(line["kpis"]) == {"valor", "taxa_abertura", "engajamento"}
+        assert line["trend"]["metric"] == "valor"
+
+    assert end["type"] == "end"
+    assert {key: end[key] for key in ("ok", "not_found", "timeout", "error", "throttled")} == {
+        "ok": 3, "not_found": 2, "timeout": 0, "error": 0, "throttled": 0,
+    }
+    assert end["elapsed_ms"] >= 0
+
+
+def test_projects_past_the_deadline_come_back_as_timeout(client, auth_headers, backend, monkeypatch):
+    ids = _create(client, auth_headers, 2)
+    monkeypatch.setattr(settings, "OVERVIEW_DEADLINE_SECONDS", 0.1)
+    monkeypatch.setattr(backend, "latency", 0.5)
+
+    projects, end = _overview(client, auth_headers, ids)
+    assert sorted(line["project_id"] for line in projects) == sorted(ids)
+    assert {line["status"] for line in projects} == {"timeout"}
+    assert end["timeout"] == 2 and end["ok"] == 0
+    assert end["elapsed_ms"] < 500
+
+
+def test_overview_limits_the_number_of_projects(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "OVERVIEW_MAX_PROJECTS", 2)
+    too_many = client.post("/api/projects/overview", json={"project_ids": [1, 2, 3]}, headers=auth_headers)
+    assert too_many.status_code == 422
+    # Ids repetidos contam uma vez
+    repeated = client.post("/api/projects/overview", json={"project_ids": [1, 1, 2]}, headers=auth_headers)
+    assert repeated.status_code == 200
+    empty = client.post("/api/projects/overview", json={"project_ids": []}, headers=auth_headers)
+    assert empty.status_code == 422
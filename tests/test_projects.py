@@ -0,0 +1,124 @@
+# tests/test_projects.py
+def _create(client, headers, n, **fields):
+    ids = []
+    for i in range(n):
+        body = {"name": f"Projeto {i}", "spreadsheet_url": f"https://docs.google.com/spreadsheets/d/{i}", "categories": ["email"]}
+        body.update(fields)
+        ids.append(client.post("/api/projects", json=body, headers=headers).json()["id"])
+    return ids
+
+
+def test_patch_null_keeps_value(client, auth_headers):
+    project_id = _create(client, auth_headers, 1)[0]
+    response = client.patch(
+        f"/api/projects/{project_id}",
+        json={"is_active": None, "is_archived": None, "name": "Renomeado"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    project = response.json()
+    assert project["name"] == "Renomeado"
+    assert project["is_active"] is True
+    assert project["is_archived"] is False
+
+    archived = client.patch(f"/api/projects/{project_id}", json={"is_archived": True}, headers=auth_headers)
+    assert archived.json()["is_archived"] is True
+
+
+def test_unpaged_listing_returns_everything_up_to_the_maximum(client, auth_headers):
+    ids = _create(client, auth_headers, 120)
+    response = client.get("/api/projects", headers=auth_headers)
+    assert [project["id"] for project in response.json()] == sorted(ids, reverse=True)
+    assert "X-Next-Cursor" not in response.headers
+    assert response.headers["X-Has-More"] == "false"
+
+
+def test_unpaged_listing_past_the_maximum_signals_more(client, auth_headers):
+    body = {"spreadsheet_url": "https://docs.google.com/spreadsheets/d/x", "categories": ["email"]}
+    created = client.post(
+        "/api/projects/bulk", json={"create": [dict(body, name=f"P{i}") for i in range(501)]}, headers=auth_headers,
+    ).json()["created"]
+    oldest = min(item["id"] for item in created)
+
+    first = client.get("/api/projects", headers=auth_headers)
+    assert len(first.json()) == 500
+    assert first.headers["X-Has-More"] == "true"
+    rest = client.get("/api/projects", params={"cursor": first.headers["X-Next-Cursor"]}, headers=auth_headers)
+    assert [project["id"] for project in rest.json()] == [oldest]
+    assert rest.headers["X-Has-More"] == "false"
+
+
+def test_search_treats_wildcards_literally(client, auth_headers):
+    for name in ("50% off", "500 off", "a_b", "axb", "c\\d"):
+        _create(client, auth_headers, 1, name=name)
+
+    def search(q):
+        response = client.get("/api/projects", params={"q": q}, headers=auth_headers)
+        return sorted(project["name"] for project in response.json())
+
+    assert search("0%") == ["50% off"]
+    assert search("a_b") == ["a_b"]
+    assert search("c\\d") == ["c\\d"]
+    assert search("OFF") == ["50% off", "500 off"]
+
+
+def test_keyset_pages_follow_the_cursor(client, auth_headers):
+    ids = _create(client, auth_headers, 7)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3} if cursor is None else {"limit": 3, "cursor": cursor}
+        response = client.get("/api/projects", params=params, headers=auth_headers)
+        seen += [project["id"] for project in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_bulk_creates_updates_and_deletes_in_one_call(client, auth_headers):
+    keep, drop = _create(client, auth_headers, 2)
+    response = client.post("/api/projects/bulk", json={
+        "create": [
+            {"name": "Novo A", "spreadsheet_url": "https://docs.google.com/spreadsheets/d/a", "categories": ["email"]},
+            {"name": "Novo B", "spreadsheet_url": "https://docs.google.com/spreadsheets/d/b", "categories": ["sms"]},
+        ],
+        "update": [{"id": keep, "name": "Atualizado", "is_active": None}, {"id": 10 ** 9, "name": "Fantasma"}],
+        "delete": [drop, 10 ** 9],
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+
+    created = body["created"]
+    assert [item["project"]["name"] for item in created] == ["Novo A", "Novo B"]
+    assert [item["index"] for item in created] == [0, 1]
+    assert [(item["id"], item["status"]) for item in body["updated"]] == [(keep, "updated"), (10 ** 9, "not_found")]
+    assert body["updated"][0]["project"]["name"] == "Atualizado"
+    assert body["updated"][0]["project"]["is_active"] is True
+    assert [(item["id"], item["status"]) for item in body["deleted"]] == [(drop, "deleted"), (10 ** 9, "not_found")]
+
+    listed = {project["id"]: project["name"] for project in client.get("/api/projects", headers=auth_headers).json()}
+    assert drop not in listed
+    assert listed[keep] == "Atualizado"
+    assert {created[0]["id"], created[1]["id"]} <= set(listed)
+
+
+def test_bulk_does_not_touch_other_users_projects(client, auth_headers, other_auth_headers):
+    theirs = _create(client, other_auth_headers, 1)[0]
+    body = client.post(
+        "/api/projects/bulk",
+        json={"update": [{"id": theirs, "name": "Invadido"}], "delete": [theirs]},
+        headers=auth_headers,
+    ).json()
+    assert body["updated"][0]["status"] == "not_found"
+    assert body["deleted"][0]["status"] == "not_found"
+
+    listed = {project["id"]: project["name"] for project in client.get("/api/projects", headers=other_auth_headers).json()}
+    assert listed[theirs] == "Projeto 0"
+
+
+def test_bulk_over_the_limit_is_rejected(client, auth_headers, monkeypatch):
+    from src.config import settings
+
+    monkeypatch.setattr(settings, "BULK_MAX_ITEMS", 2)
+    response = client.post("/api/projects/bulk", json={"delete": [1, 2, 3]}, headers=auth_headers)
+    assert response.status_code == 413
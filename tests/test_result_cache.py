@@ -0,0 +1,68 @@
+# tests/test_result_cache.py
+import asyncio
+from types import SimpleNamespace
+
+from benchmarks.fake_sheets import sheet_url
+from src.routers import dashboard_router
+from src.routers.dashboard_router import DataRequest, _result_key
+
+
+def _request(**fields):
+    return DataRequest(**{"spreadsheet_url": sheet_url(3000), "categories": ["email", "ads"], **fields})
+
+
+def test_key_depends_on_content_and_view_only():
+    key = _result_key("d1", _request())
+    # Ordem das categorias e origem dos dados (já cobertos pelo digest) não mudam a chave
+    assert _result_key("d1", _request(categories=["ads", "email"])) == key
+    assert _result_key("d1", _request(spreadsheet_url=sheet_url(3001), worksheet=1, columns=["valor"])) == key
+    # Conteúdo novo ou outra visão: outra chave
+    assert _result_key("d2", _request()) != key
+    assert _result_key("d1", _request(granularity="month")) != key
+    assert _result_key("d1", _request(layout="columns")) != key
+    assert _result_key("d1", _request(forecast_horizon=7)) != key
+
+
+def _count_renders(monkeypatch) -> list:
+    renders = []
+    render = dashboard_router._render_dashboard
+
+    def counting(*args):
+        renders.append(args)
+        return render(*args)
+
+    monkeypatch.setattr(dashboard_router, "_render_dashboard", counting)
+    return renders
+
+
+def test_same_view_is_served_from_the_result_cache(client, auth_headers, monkeypatch):
+    renders = _count_renders(monkeypatch)
+    payload = {"spreadsheet_url": sheet_url(3002), "categories": ["email", "ads"]}
+
+    first = client.post("/api/process-data", json=payload, headers=auth_headers)
+    hits = dashboard_router.result_cache.hits
+    second = client.post("/api/process-data", json={**payload, "categories": ["ads", "email"]}, headers=auth_headers)
+    assert first.status_code == second.status_code == 200
+    assert second.content == first.content
+    assert len(renders) == 1
+    assert dashboard_router.result_cache.hits == hits + 1
+
+    other = client.post("/api/process-data", json={**payload, "granularity": "month"}, headers=auth_headers)
+    assert other.status_code == 200
+    assert len(renders) == 2
+
+
+def test_concurrent_misses_render_once(monkeypatch):
+    renders = _count_renders(monkeypatch)
+    rows = [{"date": f"2024-01-{day:02d}", "categoria": "email", "valor": day} for day in range(1, 11)]
+    snapshot = SimpleNamespace(data=rows, digest="concorrente", forecasts=None)
+    request = _request(categories=["email"])
+    key = _result_key(snapshot.digest, request)
+
+    async def main():
+        return await asyncio.gather(*(dashboard_router._dashboard_body(key, snapshot, request) for _ in range(5)))
+
+    bodies = asyncio.run(main())
+    assert len(renders) == 1
+    assert len(set(bodies)) == 1
+    assert dashboard_router.result_cache.get(key) == bodies[0]
@@ -0,0 +1,106 @@
+# tests/test_scheduler.py
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base, build_engine
+from src.services.scheduler import ProjectRefresher
+
+
+async def _noop(project):
+    pass
+
+
+def _run_with_sessions(tmp_path, scenario):
+    async def main():
+        engine = build_engine(f"sqlite+aiosqlite:///{tmp_path}/lease.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            await scenario(sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+        finally:
+            await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_only_one_worker_holds_the_lease(tmp_path):
+    async def scenario(Session):
+        first = ProjectRefresher(Session, _noop, lease=True, lease_seconds=60)
+        second = ProjectRefresher(Session, _noop, lease=True, lease_seconds=60)
+        assert await first.hold_lease()
+        assert not await second.hold_lease()
+        # Renovação pelo próprio líder
+        assert await first.hold_lease()
+        assert not await second.hold_lease()
+        # Shutdown libera: o outro assume no próximo tick
+        await first.release_lease()
+        assert await second.hold_lease()
+        assert not await first.hold_lease()
+
+    _run_with_sessions(tmp_path, scenario)
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    async def scenario(Session):
+        crashed = ProjectRefresher(Session, _noop, lease=True, lease_seconds=0.05)
+        survivor = ProjectRefresher(Session, _noop, lease=True, lease_seconds=60)
+        assert await crashed.hold_lease()
+        assert not await survivor.hold_lease()
+        await asyncio.sleep(0.1)
+        assert await survivor.hold_lease()
+
+    _run_with_sessions(tmp_path, scenario)
+
+
+def test_without_lease_every_worker_refreshes(tmp_path):
+    async def scenario(Session):
+        assert await ProjectRefresher(Session, _noop).hold_lease()
+        assert await ProjectRefresher(Session, _noop).hold_lease()
+
+    _run_with_sessions(tmp_path, scenario)
+
+
+def test_leader_renews_the_lease_during_a_long_run(tmp_path):
+    async def scenario(Session):
+        async def slow(project):
+            await asyncio.sleep(0.6)
+
+        leader = ProjectRefresher(Session, slow, lease=True, lease_seconds=0.2, jitter=0)
+        other = ProjectRefresher(Session, _noop, lease=True, lease_seconds=0.2)
+        leader._load_projects = _one_project
+        assert await leader.hold_lease()
+
+        run = asyncio.create_task(leader._run_leading())
+        # Bem depois do lease original (0.2 s) ter vencido
+        for _ in range(4):
+            await asyncio.sleep(0.12)
+            assert not await other.hold_lease()
+        await run
+
+    _run_with_sessions(tmp_path, scenario)
+
+
+def test_run_stops_when_the_lease_is_lost(tmp_path):
+    async def scenario(Session):
+        finished = []
+
+        async def slow(project):
+            await asyncio.sleep(1)
+            finished.append(project.id)
+
+        leader = ProjectRefresher(Session, slow, lease=True, lease_seconds=0.15, jitter=0)
+        leader._load_projects = _one_project
+        assert await leader.hold_lease()
+        # Outro worker tomou o lease (ex: o líder ficou parado além da validade)
+        leader.holder = "outro"
+        await asyncio.wait_for(leader._run_leading(), 0.5)
+        assert finished == []
+
+    _run_with_sessions(tmp_path, scenario)
+
+
+async def _one_project():
+    return [SimpleNamespace(id=1, spreadsheet_url="u", categories=[], settings={})]
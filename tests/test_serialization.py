@@ -0,0 +1,61 @@
+# tests/test_serialization.py
+import datetime
+import decimal
+import json
+
+import pytest
+
+from src.services.lazy import numpy as np
+from src.services.serialization import FastJSONResponse, dumps
+
+
+def test_numpy_scalars_and_arrays():
+    payload = {
+        "int": np.int64(7),
+        "float": np.float32(1.5),
+        "bool": np.bool_(True),
+        "array": np.arange(3, dtype=np.int64),
+        "matrix": np.array([[1.0, 2.0], [3.0, 4.0]]),
+        # Fatia não contígua: passa pelo tolist do _default
+        "strided": np.arange(6, dtype=np.float64)[::2],
+    }
+    assert json.loads(dumps(payload)) == {
+        "int": 7, "float": 1.5, "bool": True, "array": [0, 1, 2],
+        "matrix": [[1.0, 2.0], [3.0, 4.0]], "strided": [0.0, 2.0, 4.0],
+    }
+
+
+def test_nan_and_infinity_become_null():
+    payload = {"nan": float("nan"), "inf": np.float64("inf"), "array": np.array([1.0, np.nan])}
+    assert json.loads(dumps(payload)) == {"nan": None, "inf": None, "array": [1.0, None]}
+
+
+def test_dates_and_other_python_types():
+    payload = {
+        "datetime": datetime.datetime(2024, 1, 2, 3, 4, 5),
+        "date": datetime.date(2024, 1, 2),
+        "datetime64": np.array(["2024-01-02"], dtype="datetime64[D]"),
+        "timedelta": datetime.timedelta(minutes=1, seconds=30),
+        "decimal": decimal.Decimal("1.25"),
+        "set": {3},
+        1: "chave int",
+    }
+    assert json.loads(dumps(payload)) == {
+        "datetime": "2024-01-02T03:04:05",
+        "date": "2024-01-02",
+        "datetime64": ["2024-01-02T00:00:00"],
+        "timedelta": 90.0,
+        "decimal": 1.25,
+        "set": [3],
+        "1": "chave int",
+    }
+
+
+def test_unknown_types_are_an_error():
+    with pytest.raises(TypeError):
+        dumps({"objeto": object()})
+
+
+def test_response_renders_with_orjson():
+    response = FastJSONResponse({"valor": np.float64(2.5), "serie": np.arange(2)})
+    assert response.body == b'{"valor":2.5,"serie":[0,1]}'
@@ -0,0 +1,100 @@
+# tests/test_sheet_cache.py
+import asyncio
+
+from benchmarks.fake_sheets import FakeSheetsBackend, sheet_url
+from src.services.sheet_cache import SheetCache
+
+
+def _backend():
+    return FakeSheetsBackend(rows=200, width=3, latency_ms=20, version_latency_ms=0)
+
+
+def test_served_from_memory_within_ttl():
+    backend = _backend()
+    cache = SheetCache(backend, ttl=60)
+
+    async def scenario():
+        first = await cache.get_snapshot(sheet_url(0))
+        second = await cache.get_snapshot(sheet_url(0))
+        assert second is first
+
+    asyncio.run(scenario())
+    assert backend.fetches == 1
+    assert backend.version_checks == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_expired_entry_revalidated_by_modified_time():
+    backend = _backend()
+    cache = SheetCache(backend, ttl=0.05)
+
+    async def scenario():
+        first = await cache.get_snapshot(sheet_url(0))
+        await asyncio.sleep(0.06)
+        # modifiedTime igual: nada é baixado de novo
+        second = await cache.get_snapshot(sheet_url(0))
+        assert second is first
+        assert backend.fetches == 1
+        assert cache.revalidations == 1
+
+        await asyncio.sleep(0.06)
+        backend.get_modified_time = lambda url: "2025-06-01T00:00:00.000Z"
+        third = await cache.get_snapshot(sheet_url(0))
+        assert third is not first
+        assert third.version == "2025-06-01T00:00:00.000Z"
+
+    asyncio.run(scenario())
+    assert backend.fetches == 2
+    assert backend.version_checks == 2
+
+
+def test_concurrent_misses_share_one_download():
+    backend = _backend()
+    cache = SheetCache(backend, ttl=60)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_snapshot(sheet_url(0)) for _ in range(10)))
+
+    snapshots = asyncio.run(scenario())
+    assert backend.fetches == 1
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+    assert cache.stats()["coalesced"] == 9
+
+
+def test_worksheets_of_one_sheet_fetched_together():
+    backend = _backend()
+    cache = SheetCache(backend, ttl=60)
+    snapshots = asyncio.run(cache.get_snapshots(sheet_url(0), [0, 1, 2]))
+    assert sorted(snapshots) == [0, 1, 2]
+    assert backend.fetches == 1
+
+
+def test_lru_evicts_least_recently_used_sheet():
+    backend = _backend()
+    one_sheet = asyncio.run(SheetCache(backend, ttl=60).get_snapshot(sheet_url(0))).size
+    cache = SheetCache(backend, ttl=60, max_bytes=int(one_sheet * 1.5))
+    backend.fetches = 0
+
+    async def scenario():
+        await cache.get_snapshot(sheet_url(0))
+        await cache.get_snapshot(sheet_url(1))
+        # A primeira saiu para dar lugar à segunda: volta a ser baixada
+        await cache.get_snapshot(sheet_url(0))
+
+    asyncio.run(scenario())
+    assert backend.fetches == 3
+    assert cache.stats()["evictions"] == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_failure_falls_back_to_mock_without_caching():
+    backend = _backend()
+    cache = SheetCache(backend, ttl=60)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("planilha quebrada")
+
+    backend.fetch_many = broken
+    snapshot = asyncio.run(cache.get_snapshot(sheet_url(0)))
+    assert snapshot.rows == backend.get_mock_data()
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,140 @@
+# tests/test_sheet_sync.py
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.fake_sheets import FakeSheetsBackend
+from src.database import Base, build_engine
+from src.models import SheetRow
+from src.services.sheet_sync import SheetSync
+
+URL = "https://docs.google.com/spreadsheets/d/sync-test"
+
+
+class _Backend(FakeSheetsBackend):
+    """Planilha editável, que anota quantas sessões do banco estavam abertas a cada chamada."""
+
+    def __init__(self, sessions):
+        super().__init__(rows=50, width=2, latency_ms=0, version_latency_ms=0)
+        self.sessions = sessions
+        self.version = "v1"
+        self.open_during_calls = []
+
+    def get_modified_time(self, spreadsheet_url):
+        self.open_during_calls.append(self.sessions.open)
+        return self.version
+
+    def fetch_many(self, spreadsheet_url, worksheets, columns=None, rows=None):
+        self.open_during_calls.append(self.sessions.open)
+        return super().fetch_many(spreadsheet_url, worksheets, columns, rows)
+
+
+class _Sessions:
+    def __init__(self, factory):
+        self.factory = factory
+        self.open = 0
+
+    @contextlib.asynccontextmanager
+    async def __call__(self):
+        async with self.factory() as session:
+            self.open += 1
+            try:
+                yield session
+            finally:
+                self.open -= 1
+
+
+def _run(tmp_path, scenario):
+    async def main():
+        engine = build_engine(f"sqlite+aiosqlite:///{tmp_path}/sync.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = _Sessions(sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+        backend = _Backend(sessions)
+        try:
+            await scenario(SheetSync(backend, sessions), backend, sessions)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(main())
+
+
+async def _stored_rows(sessions) -> int:
+    async with sessions() as session:
+        return (await session.execute(select(func.count()).select_from(SheetRow))).scalar_one()
+
+
+def test_google_is_read_outside_db_sessions(tmp_path):
+    async def scenario(sync, backend, sessions):
+        assert (await sync.sync(1, URL)).mode == "full"
+        sheet = backend._sheet(URL, 0)
+        sheet.append(dict(sheet[0]))
+        backend.version = "v2"
+        assert (await sync.sync(1, URL)).mode == "append"
+        assert backend.open_during_calls and set(backend.open_during_calls) == {0}
+
+    _run(tmp_path, scenario)
+
+
+def test_append_only_inserts_new_rows(tmp_path):
+    async def scenario(sync, backend, sessions):
+        await sync.sync(1, URL)
+        sheet = backend._sheet(URL, 0)
+        sheet.extend(dict(sheet[0]) for _ in range(3))
+        backend.version = "v2"
+
+        result = await sync.sync(1, URL)
+        assert result.mode == "append"
+        assert result.previous_row_count == 50
+        assert len(result.new_rows) == 3
+        assert await _stored_rows(sessions) == 53
+
+        # Mesma versão: nada é baixado
+        fetches = backend.fetches
+        assert (await sync.sync(1, URL)).mode == "noop"
+        assert backend.fetches == fetches
+
+    _run(tmp_path, scenario)
+
+
+def test_edited_tail_triggers_full_resync(tmp_path):
+    async def scenario(sync, backend, sessions):
+        await sync.sync(1, URL)
+        last = backend._sheet(URL, 0)[-1]
+        metric = list(last)[-1]
+        last[metric] = -1.0
+        backend.version = "v2"
+
+        result = await sync.sync(1, URL)
+        assert result.mode == "full"
+        assert result.rows[-1][metric] == -1.0
+        assert await _stored_rows(sessions) == 50
+
+    _run(tmp_path, scenario)
+
+
+def test_forecast_fits_follow_appends_only(tmp_path):
+    async def scenario(sync, backend, sessions):
+        project = SimpleNamespace(id=1, spreadsheet_url=URL)
+        first = await sync.get_snapshot(project)
+        first.forecasts["visão"] = "ajuste"
+
+        sheet = backend._sheet(URL, 0)
+        sheet.append(dict(sheet[0]))
+        backend.version = "v2"
+        appended = await sync.get_snapshot(project, force=True)
+        assert len(appended.rows) == 51
+        assert appended.forecasts is first.forecasts
+
+        # Edição na cauda: ressincronização completa, ajustes recomeçam
+        sheet[-1] = dict(sheet[1])
+        backend.version = "v3"
+        resynced = await sync.get_snapshot(project, force=True)
+        assert resynced.forecasts == {}
+
+    _run(tmp_path, scenario)
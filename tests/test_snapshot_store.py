@@ -0,0 +1,87 @@
+# tests/test_snapshot_store.py
+import os
+import shutil
+
+from src.services.lazy import numpy as np
+from src.services.snapshot_store import ColumnarSnapshotStore
+
+
+def _columns(n: int, offset: float = 0.0) -> dict:
+    return {
+        "date": [f"2024-01-{i % 28 + 1:02d}" for i in range(n)],
+        "categoria": ["email" if i % 2 else "ads" for i in range(n)],
+        "valor": np.arange(n, dtype=np.float64) + offset,
+        "leads": np.arange(n, dtype=np.int64),
+    }
+
+
+def test_round_trip(tmp_path):
+    store = ColumnarSnapshotStore(str(tmp_path), max_bytes=10 ** 9)
+    source = store.source_key(("url", 0))
+    written = _columns(100)
+
+    pointer = store.write(source, "d1", "v1", written)
+    assert store.current(source) == pointer
+    columns, resident = store.open(pointer)
+
+    assert list(columns) == list(written)
+    assert columns["date"] == written["date"]
+    assert columns["categoria"] == written["categoria"]
+    assert columns["valor"].dtype == np.float64 and np.array_equal(columns["valor"], written["valor"])
+    assert columns["leads"].dtype == np.int64 and np.array_equal(columns["leads"], written["leads"])
+    # Numéricas vêm do mmap, sem cópia; só as de texto (listas + dicionário) contam
+    assert not columns["valor"].flags.writeable
+    assert resident == 2 * 8 * 100 + 64 * (28 + 2)
+
+
+def test_replaced_snapshot_stays_readable_through_the_open_mmap(tmp_path):
+    store = ColumnarSnapshotStore(str(tmp_path), max_bytes=10 ** 9)
+    source = store.source_key("fonte")
+    old_pointer = store.write(source, "old", "v1", _columns(50))
+    old_columns, _ = store.open(old_pointer)
+
+    new_pointer = store.write(source, "new", "v2", _columns(50, offset=1000))
+    # A versão antiga sai do disco, mas quem a abriu continua lendo
+    assert not os.path.exists(os.path.join(str(tmp_path), old_pointer["name"]))
+    assert old_columns["valor"][:3].tolist() == [0.0, 1.0, 2.0]
+    assert store.current(source)["digest"] == "new"
+
+    new_columns, _ = store.open(new_pointer)
+    assert new_columns["valor"][:3].tolist() == [1000.0, 1001.0, 1002.0]
+
+
+def test_oldest_snapshots_are_evicted_over_the_limit(tmp_path):
+    probe = ColumnarSnapshotStore(str(tmp_path / "probe"), max_bytes=10 ** 9)
+    probe.write("p", "d", "v", _columns(200))
+    one_snapshot = probe.stats()["disk_bytes"]
+
+    store = ColumnarSnapshotStore(str(tmp_path / "store"), max_bytes=int(one_snapshot * 2.5))
+    pointers = []
+    for i in range(4):
+        pointers.append(store.write(f"fonte{i}", f"d{i}", "v", _columns(200)))
+        # mtime distintos: a remoção segue a ordem de gravação
+        os.utime(os.path.join(store.directory, pointers[-1]["name"]), (i, i))
+
+    stats = store.stats()
+    assert stats["disk_bytes"] <= store.max_bytes
+    assert stats["snapshots"] == 2 and stats["evictions"] == 2
+    # Os mais antigos saíram; o recém-gravado sempre fica
+    assert store.open(pointers[0]) is None
+    assert store.open(pointers[1]) is None
+    assert store.open(pointers[3]) is not None
+
+
+def test_snapshot_removed_concurrently_opens_as_miss(tmp_path):
+    store = ColumnarSnapshotStore(str(tmp_path), max_bytes=10 ** 9)
+    source = store.source_key("fonte")
+    pointer = store.write(source, "d1", "v1", _columns(10))
+
+    # Outro worker removeu o diretório entre a leitura do ponteiro e o open
+    shutil.rmtree(os.path.join(store.directory, pointer["name"]))
+    assert store.current(source) == pointer
+    assert store.open(pointer) is None
+
+    # Diretório pela metade (sem uma coluna): também é miss, não erro
+    pointer = store.write(source, "d2", "v2", _columns(10))
+    os.remove(os.path.join(store.directory, pointer["name"], "2.npy"))
+    assert store.open(pointer) is None
@@ -0,0 +1,28 @@
+# tests/test_timeseries.py
+from src.services.data_processor import DataProcessor
+from src.services.lazy import numpy as np
+from src.services.timeseries import bucket_dates, parse_dates
+
+
+def test_week_bucket_starts_on_monday():
+    dates = parse_dates(["2024-01-03", "2024-01-07", "2024-01-08"])
+    assert bucket_dates(dates, "week").astype(str).tolist() == ["2024-01-01", "2024-01-01", "2024-01-08"]
+
+
+def test_week_bucket_keeps_nat():
+    dates = parse_dates(["Total", "2024-01-03"])
+    buckets = bucket_dates(dates, "week")
+    assert np.isnat(buckets[0])
+    assert str(buckets[1]) == "2024-01-01"
+
+
+def test_aggregate_drops_unparseable_date_rows():
+    rows = [
+        {"date": "2024-01-03", "valor": 1},
+        {"date": "2024-01-04", "valor": 2},
+        {"date": "Total", "valor": 100},
+    ]
+    for granularity in ("day", "week", "month"):
+        timeline = DataProcessor().process(rows, [], granularity=granularity)["timeline"]
+        assert sum(point["valor"] for point in timeline) == 3
+        assert all(point["date"].startswith("2024-01") for point in timeline)